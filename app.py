@@ -16,7 +16,12 @@ st.set_page_config(
 )
 
 sys.path.insert(0, ".")
-from src.generator import ask_bot, GROQ_MODEL
+from src.rerank import RERANK_ENABLED, RERANK_K
+from src.warmup import start_warmup
+
+# Важкі модулі (langchain, chromadb, torch) та модель вантажаться у фоні,
+# поки рендериться UI; src.generator імпортується ліниво при першому запиті
+warmup = start_warmup()
 
 # ════
 # CSS
@@ -159,6 +164,18 @@ html, body, [data-testid="stAppViewContainer"] {
     border-radius: 50%;
     box-shadow: 0 0 8px var(--accent-green);
 }
+.status-dot.loading {
+    background-color: var(--accent-gold);
+    box-shadow: 0 0 8px var(--accent-gold);
+    animation: status-pulse 1s ease-in-out infinite;
+}
+.status-dot.error {
+    background-color: #e5534b;
+    box-shadow: 0 0 8px #e5534b;
+}
+@keyframes status-pulse {
+    50% { opacity: 0.3; }
+}
 
 /* Лічильник запитів */
 .queries-count {
@@ -470,7 +487,7 @@ def render_user_msg(text: str):
     html = f'<div class="msg-user-container"><div class="msg-user-bubble">{safe_text}</div></div>'
     st.markdown(html, unsafe_allow_html=True)
 
-def render_bot_msg(text: str, sources: list = None, error: str = None):
+def bot_msg_html(text: str, sources: list = None, error: str = None) -> str:
     import re
     # Конвертуємо markdown-переноси та жирний шрифт у HTML теги
     safe_text = str(text).replace('\n', '<br>')
@@ -495,19 +512,84 @@ def render_bot_msg(text: str, sources: list = None, error: str = None):
             f'</div>'
         )
         
-    html = (
+    return (
         f'<div class="msg-bot-container">'
         f'<div class="msg-bot-icon">🏛️</div>'
         f'<div class="msg-bot-content-wrap">{content_html}</div>'
         f'</div>'
     )
-    st.markdown(html, unsafe_allow_html=True)
+
+def render_bot_msg(text: str, sources: list = None, error: str = None, ttft: float = None, total: float = None):
+    st.markdown(bot_msg_html(text, sources, error), unsafe_allow_html=True)
+    # Час до першого токена поруч із загальним часом відповіді
+    if ttft is not None and total is not None:
+        st.caption(f"Перший токен: {ttft:.2f} с · відповідь: {total:.2f} с")
+
+def stream_bot_msg(query: str, k: int) -> dict:
+    """Рендерить відповідь по мірі надходження токенів; повертає підсумок ask_bot_stream."""
+    from src.generator import ask_bot_stream   # вже в sys.modules після прогріву
+
+    placeholder = st.empty()
+    placeholder.markdown(bot_msg_html("FinRAG-асистент друкує..."), unsafe_allow_html=True)
+
+    sources, parts, result = [], [], {}
+    for event in ask_bot_stream(query, k=k):
+        if event["type"] == "sources":
+            sources = event["sources"]
+        elif event["type"] == "token":
+            parts.append(event["text"])
+            placeholder.markdown(bot_msg_html("".join(parts) + "▌", sources), unsafe_allow_html=True)
+        elif event["type"] == "done":
+            result = event["result"]
+
+    placeholder.markdown(
+        bot_msg_html(result["answer"], result["sources"], result.get("error")),
+        unsafe_allow_html=True,
+    )
+    return result
 
 
 # ═════════════════════════════════════════════════════════════════
 # САЙДБАР
 # ═════════════════════════════════════════════════════════════════
 
+_STATUS_ITEMS = [
+    ("llm",        "LLM МОДЕЛЬ",  "Groq"),
+    ("embeddings", "EMBEDDINGS",  "multilingual-MiniLM-L12"),
+    ("index",      "ВЕКТОРНА БД", "ChromaDB · локальна"),
+]
+
+
+# Поки триває прогрів — статус оновлюється щосекунди без rerun усієї сторінки
+_status_polling = not warmup.done.is_set()
+
+
+@st.fragment(run_every=1.0 if _status_polling else None)
+def render_status():
+    items = []
+    for component, label, default in _STATUS_ITEMS:
+        status = warmup.status(component)
+        text   = warmup.info.get(component, default)
+        if status == "loading":
+            text += " · завантаження…"
+        elif status == "error":
+            text = warmup.errors.get(component, "недоступно")[:60]
+        items.append(
+            f'<div class="status-item">'
+            f'<div class="status-label">{label}</div>'
+            f'<div class="status-badge"><span class="status-dot {status}"></span>{text}</div>'
+            f'</div>'
+        )
+    st.markdown("".join(items), unsafe_allow_html=True)
+
+    if warmup.done.is_set():
+        with st.expander(f"Старт за {warmup.total_s:.1f} с"):
+            st.code(warmup.report(), language=None)
+        # run_every фіксується при rerun сторінки — один rerun вимикає опитування
+        if _status_polling:
+            st.rerun()
+
+
 with st.sidebar:
     st.markdown("""
     <div class="sidebar-logo">
@@ -519,33 +601,24 @@ with st.sidebar:
     </div>
     
     <div class="sidebar-section-title">СТАТУС СИСТЕМИ</div>
-    
-    <div class="status-item">
-        <div class="status-label">LLM МОДЕЛЬ</div>
-        <div class="status-badge"><span class="status-dot"></span>{0}</div>
-    </div>
-    
-    <div class="status-item">
-        <div class="status-label">EMBEDDINGS</div>
-        <div class="status-badge"><span class="status-dot"></span>multilingual-MiniLM-L12</div>
-    </div>
-    
-    <div class="status-item">
-        <div class="status-label">ВЕКТОРНА БД</div>
-        <div class="status-badge"><span class="status-dot"></span>ChromaDB · локальна</div>
-    </div>
-    
+    """, unsafe_allow_html=True)
+
+    render_status()
+
+    st.markdown("""
     <div class="sidebar-section-title">ЗАПИТІВ У СЕСІЇ</div>
-    <div class="queries-count">{1}</div>
+    <div class="queries-count">{0}</div>
     
     <hr style="border:0; border-top:1px solid rgba(255,255,255,0.08); margin: 2rem 0;">
     
     <div class="sidebar-section-title">НАЛАШТУВАННЯ</div>
-    """.format(GROQ_MODEL, st.session_state.total_queries), unsafe_allow_html=True)
+    """.format(st.session_state.total_queries), unsafe_allow_html=True)
 
     k_value = st.slider(
         "Кількість фрагментів (k)",
-        min_value=4, max_value=12, value=8,
+        min_value=3 if RERANK_ENABLED else 4, max_value=12,
+        # З rerank найкращі чанки точно нагорі → вистачає 3–4
+        value=RERANK_K if RERANK_ENABLED else 8,
         label_visibility="visible"
     )
 
@@ -605,7 +678,7 @@ for msg in st.session_state.messages:
         # Щоб обійти обгортку st.chat_message і малювати власний HTML
         render_user_msg(msg["content"])
     else:
-        render_bot_msg(msg["content"], msg.get("sources"), msg.get("error"))
+        render_bot_msg(msg["content"], msg.get("sources"), msg.get("error"), msg.get("ttft"), msg.get("total"))
 
 
 # ─── ОБРОБКА ВВЕДЕННЯ (КНОПКА) ───────────────────────
@@ -617,14 +690,15 @@ if st.session_state.pending_suggestion:
     st.session_state.messages.append({"role": "user", "content": query})
     render_user_msg(query)
 
-    with st.spinner("FinRAG-асистент друкує..."):
-        result = ask_bot(query, k=k_value)
+    result = stream_bot_msg(query, k=k_value)
 
     st.session_state.messages.append({
         "role":    "assistant",
         "content": result["answer"],
         "sources": result["sources"],
         "error":   result.get("error"),
+        "ttft":    result.get("ttft"),
+        "total":   result["timings"].get("total"),
     })
     st.session_state.total_queries += 1
     st.rerun()
@@ -635,14 +709,15 @@ if query := st.chat_input("Запитай про тарифи, комісії, 
     st.session_state.messages.append({"role": "user", "content": query})
     render_user_msg(query)
 
-    with st.spinner("FinRAG-асистент друкує..."):
-        result = ask_bot(query, k=k_value)
+    result = stream_bot_msg(query, k=k_value)
 
     st.session_state.messages.append({
         "role":    "assistant",
         "content": result["answer"],
         "sources": result["sources"],
         "error":   result.get("error"),
+        "ttft":    result.get("ttft"),
+        "total":   result["timings"].get("total"),
     })
     st.session_state.total_queries += 1
     st.rerun()
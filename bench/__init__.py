@@ -0,0 +1,15 @@
+"""
+bench/
+─────────────────────────────────────────────────────────────────
+Офлайн-бенчмарки FinRAG (без Groq API і без sleep між викликами):
+
+  • fake_llm.py — детермінована заміна ChatGroq;
+  • corpus.py   — генератор синтетичних тарифних PDF (1x…1000x);
+  • run.py      — латентність retrieve / format_context / ask_bot
+                  (p50/p95/p99) та пропускна здатність інгестії,
+                  результат — JSON для порівняння між комітами.
+
+Запуск:
+    python -m bench.run --scales 1,10
+─────────────────────────────────────────────────────────────────
+"""
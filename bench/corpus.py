@@ -0,0 +1,222 @@
+"""
+bench/corpus.py
+─────────────────────────────────────────────────────────────────
+Генератор синтетичного корпусу українських тарифних PDF.
+
+Для оцінки якості retrieval (bench/eval.py) корпус дає розмічені
+запити: питання про тариф послуги для продукту → сторінки, де він є.
+
+Масштаб 1x ≈ поточний набір тарифів (BASE_DOCUMENTS документів по
+PAGES_PER_DOCUMENT сторінок); 10x/100x/1000x множать кількість
+документів. Текст детермінований (seed), тож корпуси однакові між
+запусками і комітами.
+
+PDF пишуться без сторонніх залежностей: шрифт Type0/Identity-H з
+ToUnicode CMap — pypdf витягує з них звичайний кириличний текст.
+
+    python -m bench.corpus --scale 10 --out bench/data/corpus-10x
+─────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import random
+import zlib
+from pathlib import Path
+
+BASE_DOCUMENTS     = 3
+PAGES_PER_DOCUMENT = 20
+LINES_PER_PAGE     = 32
+
+SEED = 20240901
+
+_PRODUCTS = [
+    "картка Універсальна", "картка Зелена", "кредитна картка Максимум",
+    "Депозит Стандартний", "Депозит Онлайн", "рахунок ФОП", "Сервіс накопичення Банка",
+    "споживчий кредит", "картка Mastercard Gold", "зарплатна картка",
+]
+
+_SERVICES = [
+    ("Зняття власних коштів у банкоматах банку", "%"),
+    ("Зняття власних коштів у банкоматах інших банків", "%"),
+    ("Зняття готівки в касах банку", "%"),
+    ("Переказ з картки на картку інших банків", "%"),
+    ("Переказ між власними рахунками", "грн"),
+    ("Щомісячне обслуговування рахунку", "грн"),
+    ("Випуск та обслуговування картки", "грн"),
+    ("Перевипуск картки до закінчення строку дії", "грн"),
+    ("Відсоткова ставка за користування кредитним лімітом", "% річних"),
+    ("Мінімальний щомісячний платіж", "%"),
+    ("Пільговий період кредитування", "днів"),
+    ("Ставка за депозитом на 12 місяців", "% річних"),
+    ("Ліміт переказів на добу", "грн"),
+    ("Ліміт зняття готівки на місяць", "грн"),
+    ("Платіж за реквізитами", "%"),
+    ("Надання виписки за рахунком", "грн"),
+]
+
+_NOTES = [
+    "Комісія утримується в момент здійснення операції.",
+    "Тариф діє з дати набрання чинності договору комплексного банківського обслуговування.",
+    "Умови можуть бути змінені банком з попереднім повідомленням клієнта.",
+    "Для клієнтів ФОП діють окремі ліміти відповідно до тарифного пакету.",
+    "Нарахування відсотків здійснюється щоденно на фактичний залишок коштів.",
+    "Операції в іноземній валюті конвертуються за курсом банку на дату списання.",
+]
+
+
+def _value(rng: random.Random, unit: str) -> str:
+    if unit == "грн":
+        return f"{rng.choice([0, 0, 5, 10, 25, 50, 100, 150, 300, 50000, 100000])} грн"
+    if unit == "днів":
+        return f"до {rng.choice([30, 55, 62, 90])} днів"
+    if unit == "% річних":
+        return f"{rng.randint(1, 48)},{rng.randint(0, 9)}% річних"
+    return f"{rng.randint(0, 4)},{rng.randint(0, 9)}%"
+
+
+def _page_lines(rng: random.Random, doc_no: int, page_no: int) -> list[str]:
+    product = _PRODUCTS[(doc_no + page_no) % len(_PRODUCTS)]
+    lines = [f"Тарифи банку. Документ {doc_no + 1}, розділ {page_no + 1}: {product}", ""]
+    while len(lines) < LINES_PER_PAGE:
+        if rng.random() < 0.15:
+            lines.append(rng.choice(_NOTES))
+            continue
+        service, unit = rng.choice(_SERVICES)
+        lines.append(f"{len(lines) - 1}. {service} ({product}) — {_value(rng, unit)}")
+    return lines
+
+
+# ─────────────────────────────────────────────────────────────────
+# Мінімальний PDF-writer (кирилиця через Identity-H + ToUnicode)
+# ─────────────────────────────────────────────────────────────────
+
+def _to_unicode_cmap(codepoints: list[int]) -> bytes:
+    runs: list[list[int]] = []
+    for cp in codepoints:
+        if runs and cp == runs[-1][1] + 1 and cp >> 8 == runs[-1][0] >> 8:
+            runs[-1][1] = cp
+        else:
+            runs.append([cp, cp])
+
+    cmap = (
+        "/CIDInit /ProcSet findresource begin 12 dict begin begincmap "
+        "/CIDSystemInfo << /Registry (Adobe) /Ordering (UCS) /Supplement 0 >> def "
+        "/CMapName /Adobe-Identity-UCS def /CMapType 2 def "
+        "1 begincodespacerange <0000> <FFFF> endcodespacerange\n"
+    )
+    for i in range(0, len(runs), 100):
+        block = runs[i:i + 100]
+        cmap += f"{len(block)} beginbfrange\n"
+        cmap += "".join(f"<{a:04X}> <{b:04X}> <{a:04X}>\n" for a, b in block)
+        cmap += "endbfrange\n"
+    cmap += "endcmap CMapName currentdict /CMap defineresource pop end end"
+    return cmap.encode()
+
+
+def write_pdf(path: Path, pages: list[list[str]]) -> None:
+    """Пише PDF: кожна сторінка — список рядків тексту."""
+    codepoints = sorted({ord(ch) for lines in pages for line in lines for ch in line} | {32})
+    objects: list[bytes] = [b""] * 5     # catalog, pages, font, cid font, cmap
+
+    cmap = _to_unicode_cmap(codepoints)
+    objects[2] = b"<< /Type /Font /Subtype /Type0 /BaseFont /ArialMT /Encoding /Identity-H /DescendantFonts [4 0 R] /ToUnicode 5 0 R >>"
+    objects[3] = b"<< /Type /Font /Subtype /CIDFontType2 /BaseFont /ArialMT /CIDSystemInfo << /Registry (Adobe) /Ordering (Identity) /Supplement 0 >> /DW 500 >>"
+    objects[4] = b"<< /Length %d >>\nstream\n" % len(cmap) + cmap + b"\nendstream"
+
+    kids = []
+    for lines in pages:
+        ops = ["BT /F1 9 Tf 11 TL 40 800 Td"]
+        ops += ["<" + "".join(f"{ord(ch):04X}" for ch in line) + "> Tj T*" for line in lines]
+        ops.append("ET")
+        content = zlib.compress("\n".join(ops).encode())
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>".encode()
+        )
+        kids.append(len(objects))
+
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.7\n")
+    offsets = []
+    for i, obj in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{off:010d} 00000 n \n" for off in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(bytes(out))
+
+
+# ─────────────────────────────────────────────────────────────────
+# Корпус
+# ─────────────────────────────────────────────────────────────────
+
+def _file_name(doc_no: int) -> str:
+    return f"tariffs_{doc_no + 1:05d}.pdf"
+
+
+def _document_pages(doc_no: int) -> list[list[str]]:
+    """Рядки всіх сторінок документа (детерміновано за SEED і номером)."""
+    rng = random.Random(SEED + doc_no)
+    return [_page_lines(rng, doc_no, page_no) for page_no in range(PAGES_PER_DOCUMENT)]
+
+
+def generate_corpus(out_dir: Path, scale: int = 1) -> dict:
+    """
+    Генерує корпус масштабу scale у out_dir (якщо він уже є з тими ж
+    параметрами — повторно не пише). Повертає {"documents", "pages"}.
+    """
+    out_dir = Path(out_dir)
+    documents = BASE_DOCUMENTS * scale
+    marker    = out_dir / ".corpus"
+    stamp     = f"{SEED}:{documents}:{PAGES_PER_DOCUMENT}:{LINES_PER_PAGE}"
+
+    if not (marker.exists() and marker.read_text(encoding="utf-8") == stamp):
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for old in out_dir.glob("*.pdf"):
+            old.unlink()
+        for doc_no in range(documents):
+            write_pdf(out_dir / _file_name(doc_no), _document_pages(doc_no))
+        marker.write_text(stamp, encoding="utf-8")
+
+    return {"documents": documents, "pages": documents * PAGES_PER_DOCUMENT}
+
+
+def labeled_queries(scale: int = 1, count: int = 30) -> list[dict]:
+    """
+    Розмічені запити для корпусу масштабу scale:
+    [{"query": ..., "expected": [{"source": ..., "page": ...}, ...]}].
+    Очікувані сторінки — ті, де є рядок "<послуга> (<продукт>)".
+    """
+    pages_by_line: dict[tuple[str, str], list[dict]] = {}
+    for doc_no in range(BASE_DOCUMENTS * scale):
+        for page_no, lines in enumerate(_document_pages(doc_no)):
+            text = "\n".join(lines)
+            for service, _ in _SERVICES:
+                for product in _PRODUCTS:
+                    if f"{service} ({product})" in text:
+                        pages_by_line.setdefault((service, product), []).append(
+                            {"source": _file_name(doc_no), "page": page_no + 1},
+                        )
+
+    rng   = random.Random(SEED)
+    pairs = sorted(pages_by_line)
+    rng.shuffle(pairs)
+    return [
+        {"query": f"{service} — який тариф для продукту {product}?", "expected": pages_by_line[(service, product)]}
+        for service, product in pairs[:count]
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FinRAG — синтетичний тарифний корпус")
+    parser.add_argument("--scale", type=int, default=1, help="Множник розміру корпусу (1, 10, 100, 1000)")
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args()
+
+    info = generate_corpus(args.out, args.scale)
+    print(f"Корпус {args.scale}x: {info['documents']} документів, {info['pages']} сторінок → {args.out}")
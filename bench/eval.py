@@ -0,0 +1,237 @@
+"""
+bench/eval.py
+─────────────────────────────────────────────────────────────────
+Оцінка якості retrieval проти латентності з перебором параметрів.
+
+Для кожної комбінації CHUNK_SIZE/CHUNK_OVERLAP корпус інгеститься
+у тимчасову ChromaDB, далі для кожної комбінації k × EXPANSION_LIMIT ×
+Keyword Scan (on/off) проганяється розмічений набір запитів:
+
+  • recall@k — частка очікуваних (source, page), знайдених у top-k,
+    від min(|очікуваних|, k) (щоб k=3 не карався за 10 релевантних сторінок);
+  • MRR      — 1 / ранг першого релевантного чанку;
+  • латентність retrieve() — p50/p95, мс.
+
+Pareto-таблиця позначає ★ конфігурації, які не домінуються жодною
+іншою за (recall ↑, k ↓ — токени промпту, p50 ↓).
+
+Окремо перебирається поріг семантичного кешу відповідей
+(FINRAG_SEMANTIC_CACHE_THRESHOLD): кеш наповнюється розміченими
+запитами, далі для кожного шукається перефразування (ті самі слова в
+іншому порядку) — hit rate, — а для решти запитів будь-який hit
+з чужим набором очікуваних сторінок рахується як хибний.
+
+Розмітка — JSONL: {"query": "...", "expected": [{"source": "x.pdf", "page": 3}]}.
+Без --labels використовується синтетичний корпус bench/corpus.py.
+
+    python -m bench.eval --embeddings fake
+    python -m bench.eval --labels labels.jsonl --pdf_dir data/raw
+─────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from bench.corpus import generate_corpus, labeled_queries
+from bench.run import DATA_DIR, RESULTS_DIR, _git_commit, _install_fake_embeddings, percentiles
+
+SWEEP_K          = (3, 4, 6, 8, 12)
+SWEEP_EXPANSION  = (0, 2, 5)
+SWEEP_KEYWORD    = (True, False)
+SWEEP_CHUNKING   = ((900, 200), (600, 100), (1200, 200))   # (CHUNK_SIZE, CHUNK_OVERLAP)
+SWEEP_CACHE_THRESHOLD = (0.85, 0.90, 0.93, 0.95, 0.97)
+
+
+def load_labels(path: Path) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def score_query(docs: list, expected: list[dict], k: int) -> tuple[float, float]:
+    """(recall@k, reciprocal rank) для одного запиту."""
+    relevant = {(e["source"], int(e["page"])) for e in expected}
+    found    = [(d.metadata.get("source"), d.metadata.get("page")) for d in docs[:k]]
+
+    hits   = relevant & set(found)
+    recall = len(hits) / min(len(relevant), k) if relevant else 0.0
+    rr     = next((1.0 / rank for rank, key in enumerate(found, 1) if key in relevant), 0.0)
+    return recall, rr
+
+
+def _evaluate(db_dir: str, labels: list[dict], k: int) -> dict:
+    from src import retrieval
+
+    recalls, rrs, latencies = [], [], []
+    for item in labels:
+        retrieval._get_query_cache.cache_clear()    # embedding запиту — частина латентності
+        t0   = time.perf_counter()
+        docs = retrieval.retrieve(item["query"], k=k, db_dir=db_dir)
+        latencies.append(time.perf_counter() - t0)
+
+        recall, rr = score_query(docs, item["expected"], k)
+        recalls.append(recall)
+        rrs.append(rr)
+
+    lat = percentiles(latencies)
+    return {
+        "recall": sum(recalls) / len(recalls),
+        "mrr":    sum(rrs) / len(rrs),
+        "p50_ms": lat["p50"],
+        "p95_ms": lat["p95"],
+    }
+
+
+def sweep(pdf_dir: Path, labels: list[dict], chunking=SWEEP_CHUNKING) -> list[dict]:
+    """Повний перебір; повертає рядок на кожну конфігурацію."""
+    from src import ingest, retrieval
+
+    rows = []
+    for chunk_size, overlap in chunking:
+        db_dir = Path(tempfile.mkdtemp(prefix="finrag-eval-"))
+        try:
+            ingest.CHUNK_SIZE, ingest.CHUNK_OVERLAP = chunk_size, overlap
+            ingest.run_ingestion(pdf_dir, db_dir, full=True)
+            retrieval.retrieve(labels[0]["query"], db_dir=str(db_dir))    # прогрів індексів
+
+            for expansion, keyword, k in itertools.product(SWEEP_EXPANSION, SWEEP_KEYWORD, SWEEP_K):
+                retrieval.EXPANSION_LIMIT      = expansion
+                retrieval.KEYWORD_SCAN_ENABLED = keyword
+                rows.append({
+                    "chunk_size": chunk_size,
+                    "overlap":    overlap,
+                    "expansion":  expansion,
+                    "keyword":    keyword,
+                    "k":          k,
+                    **_evaluate(str(db_dir), labels, k),
+                })
+        finally:
+            shutil.rmtree(db_dir, ignore_errors=True)
+    return rows
+
+
+def _paraphrase(query: str) -> str:
+    """"<послуга> — який тариф для продукту X?" → "Який тариф для продукту X: <послуга>?"."""
+    head, sep, tail = query.partition(" — ")
+    if not sep:
+        return query.lower()
+    tail = tail.rstrip("?")
+    return f"{tail[:1].upper()}{tail[1:]}: {head[:1].lower()}{head[1:]}?"
+
+
+def cache_sweep(labels: list[dict], thresholds=SWEEP_CACHE_THRESHOLD) -> list[dict]:
+    """hit rate на перефразуваннях і частка хибних hits для кожного порогу."""
+    from src import retrieval
+    from src.cache import SemanticAnswerCache
+
+    queries     = [item["query"] for item in labels]
+    paraphrases = [_paraphrase(q) for q in queries]
+    vectors     = retrieval._embed_queries(queries + paraphrases)
+    words       = [frozenset(retrieval._extract_keywords(q)) for q in queries + paraphrases]
+    expected    = [frozenset((e["source"], int(e["page"])) for e in item["expected"]) for item in labels]
+    n = len(labels)
+
+    rows = []
+    for threshold in thresholds:
+        hits = false_hits = 0
+        for i in range(n):
+            # Кеш без самого запиту i: будь-який hit для нього — чужа відповідь
+            cache = SemanticAnswerCache(threshold=threshold)
+            for j in range(n):
+                if j != i:
+                    cache.store(vectors[j], 4, "eval", {"expected": expected[j]}, words[j])
+            hit = cache.lookup(vectors[i], 4, "eval", words[i])
+            false_hits += hit is not None and hit[0]["expected"] != expected[i]
+
+            cache.store(vectors[i], 4, "eval", {"expected": expected[i]}, words[i])
+            hit = cache.lookup(vectors[n + i], 4, "eval", words[n + i])
+            hits += hit is not None and hit[0]["expected"] == expected[i]
+        rows.append({"threshold": threshold, "hit_rate": hits / n, "false_hit_rate": false_hits / n})
+    return rows
+
+
+def mark_pareto(rows: list[dict]) -> list[dict]:
+    """Позначає недоміновані конфігурації: recall ↑, k ↓, p50 ↓."""
+    def dominates(a: dict, b: dict) -> bool:
+        no_worse = a["recall"] >= b["recall"] and a["k"] <= b["k"] and a["p50_ms"] <= b["p50_ms"]
+        better   = a["recall"] > b["recall"] or a["k"] < b["k"] or a["p50_ms"] < b["p50_ms"]
+        return no_worse and better
+
+    for row in rows:
+        row["pareto"] = not any(dominates(other, row) for other in rows if other is not row)
+    return rows
+
+
+def print_table(rows: list[dict], pareto_only: bool = False) -> None:
+    print(
+        f"\n   {'chunk':>5} {'ovlp':>4} {'exp':>3} {'kw':>3} {'k':>3} "
+        f"{'recall@k':>9} {'MRR':>6} {'p50, мс':>8} {'p95, мс':>8}"
+    )
+    for r in sorted(rows, key=lambda r: (-r["recall"], r["k"], r["p50_ms"])):
+        if pareto_only and not r["pareto"]:
+            continue
+        print(
+            f"{'★' if r['pareto'] else ' '}  {r['chunk_size']:>5} {r['overlap']:>4} {r['expansion']:>3} "
+            f"{'on' if r['keyword'] else 'off':>3} {r['k']:>3} "
+            f"{r['recall']:>9.3f} {r['mrr']:>6.3f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f}"
+        )
+
+
+def print_cache_table(rows: list[dict]) -> None:
+    print(f"\n   {'поріг кешу':>10} {'hit rate':>9} {'хибні hits':>11}")
+    for r in rows:
+        print(f"   {r['threshold']:>10.2f} {r['hit_rate']:>9.3f} {r['false_hit_rate']:>11.3f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FinRAG — recall/MRR vs латентність")
+    parser.add_argument("--labels", type=Path, default=None, help="JSONL з розміткою (за замовч.: синтетичний корпус)")
+    parser.add_argument("--pdf_dir", type=Path, default=None, help="PDF для --labels")
+    parser.add_argument("--scale", type=int, default=1, help="Масштаб синтетичного корпусу")
+    parser.add_argument("--queries", type=int, default=30, help="Кількість синтетичних запитів")
+    parser.add_argument("--embeddings", choices=("model", "fake"), default="model")
+    parser.add_argument("--all", action="store_true", help="Показати всі конфігурації, не лише Pareto")
+    parser.add_argument("--out", type=Path, default=None)
+    args = parser.parse_args()
+
+    # До імпорту src.*: без дискових кешів
+    logging.basicConfig(level=logging.WARNING)
+    os.environ["FINRAG_QUERY_CACHE_DB"]      = ""
+    os.environ["FINRAG_EMBEDDING_CACHE_DIR"] = ""
+
+    if args.labels:
+        if not args.pdf_dir:
+            parser.error("--labels потребує --pdf_dir")
+        labels, pdf_dir = load_labels(args.labels), args.pdf_dir
+    else:
+        pdf_dir = DATA_DIR / f"corpus-{args.scale}x"
+        generate_corpus(pdf_dir, args.scale)
+        labels = labeled_queries(args.scale, args.queries)
+
+    if args.embeddings == "fake":
+        _install_fake_embeddings()
+
+    rows = mark_pareto(sweep(pdf_dir, labels))
+    print_table(rows, pareto_only=not args.all)
+    cache_rows = cache_sweep(labels)
+    print_cache_table(cache_rows)
+
+    commit = _git_commit()
+    out = args.out or RESULTS_DIR / f"eval-{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "meta": {"commit": commit, "embeddings": args.embeddings, "queries": len(labels)},
+        "rows": rows,
+        "cache": cache_rows,
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nРезультат: {out}")
+
+
+if __name__ == "__main__":
+    main()
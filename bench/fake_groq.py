@@ -0,0 +1,215 @@
+"""
+bench/fake_groq.py
+─────────────────────────────────────────────────────────────────
+Локальний фейковий Groq API з rate limit — для офлайн-перевірки
+src/ratelimit.py без ключа та мережі.
+
+Сервер відповідає на POST /openai/v1/chat/completions (звичайна
+відповідь і SSE-стрім з usage), рахує запити у ковзному вікні --window с
+і понад --rpm віддає 429 з retry-after, як справжній Groq.
+
+--burst N одночасно шле N запитів двома клієнтами:
+  • звичайний ChatGroq (max_retries=0) — скільки впало з 429;
+  • RateLimitedChatGroq — скільки впало і скільки чекали в черзі.
+
+    python -m bench.fake_groq --burst 40 --rpm 20
+    python -m bench.fake_groq --check --burst 30 --rpm 10   # у межах бюджету — жодного 429
+    python -m bench.fake_groq --serve --port 8765   # лише сервер
+    # GROQ_API_BASE=http://127.0.0.1:8765 GROQ_API_KEY=fake ...
+─────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench.run import percentiles
+
+DEFAULT_PORT = 8765
+WINDOW_S     = 60.0
+ANSWER       = "Комісія за зняття готівки у банкоматах банку — 0,9% від суми."
+
+
+class FakeGroq:
+    """Стан сервера: ліміт запитів у ковзному вікні та лічильники."""
+
+    def __init__(self, rpm: int, window_s: float = WINDOW_S):
+        self.rpm      = rpm
+        self.window_s = window_s
+        self.accepted: deque[float] = deque()
+        self.served   = 0
+        self.rejected = 0
+        self._lock    = threading.Lock()
+
+    def admit(self) -> float | None:
+        """None — запит прийнято, інакше — retry-after, с."""
+        with self._lock:
+            now = time.monotonic()
+            while self.accepted and now - self.accepted[0] >= self.window_s:
+                self.accepted.popleft()
+            if len(self.accepted) >= self.rpm:
+                self.rejected += 1
+                return self.window_s - (now - self.accepted[0])
+            self.accepted.append(now)
+            self.served += 1
+            return None
+
+
+def _handler(state: FakeGroq):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            retry_after = state.admit()
+            if retry_after is not None:
+                self._json(429, {"error": {
+                    "message": "Rate limit reached for model: requests per minute (RPM)",
+                    "type":    "requests",
+                    "code":    "rate_limit_exceeded",
+                }}, {"retry-after": f"{retry_after:.2f}"})
+                return
+
+            prompt = sum(len(str(m.get("content", ""))) for m in body.get("messages", [])) // 3
+            usage  = {"prompt_tokens": prompt, "completion_tokens": 20, "total_tokens": prompt + 20}
+            model  = body.get("model", "fake")
+            if body.get("stream"):
+                self._stream(model, usage)
+            else:
+                self._json(200, {
+                    "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()), "model": model,
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": ANSWER}, "finish_reason": "stop"}],
+                    "usage": usage,
+                })
+
+        def _stream(self, model: str, usage: dict) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            words = ANSWER.split(" ")
+            for i, word in enumerate(words):
+                last  = i == len(words) - 1
+                chunk = {
+                    "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"role": "assistant", "content": word + ("" if last else " ")},
+                        "finish_reason": "stop" if last else None,
+                    }],
+                }
+                if last:
+                    chunk["x_groq"] = {"usage": usage}
+                self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+
+        def _json(self, status: int, payload: dict, headers: dict | None = None) -> None:
+            data = json.dumps(payload, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(rpm: int, port: int = 0, window_s: float = WINDOW_S) -> tuple[ThreadingHTTPServer, FakeGroq]:
+    """Запускає сервер у фоновому потоці (port=0 — вільний порт)."""
+    state  = FakeGroq(rpm, window_s)
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(state))
+    threading.Thread(target=server.serve_forever, name="fake-groq", daemon=True).start()
+    return server, state
+
+
+# ─────────────────────────────────────────────────────────────────
+# Сплеск запитів: ChatGroq vs RateLimitedChatGroq
+# ─────────────────────────────────────────────────────────────────
+
+def _burst(llm_cls, base_url: str, n: int, stream: bool) -> dict:
+    from src.ratelimit import queue_time
+
+    llm = llm_cls(model_name="fake", groq_api_key="fake", base_url=base_url, max_retries=0)
+
+    def call(i: int) -> tuple[bool, float, float]:
+        t0 = time.perf_counter()
+        try:
+            if stream:
+                message = None
+                for chunk in llm.stream(f"Питання {i}"):
+                    message = chunk if message is None else message + chunk
+            else:
+                message = llm.invoke(f"Питання {i}")
+            return True, time.perf_counter() - t0, queue_time(message)
+        except Exception:
+            return False, time.perf_counter() - t0, 0.0
+
+    with ThreadPoolExecutor(max_workers=n) as pool:
+        results = list(pool.map(call, range(n)))
+
+    return {
+        "ok":         sum(ok for ok, _, _ in results),
+        "failed":     sum(not ok for ok, _, _ in results),
+        "latency_ms": percentiles([s for ok, s, _ in results if ok]),
+        "queue_ms":   percentiles([q for ok, _, q in results if ok]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FinRAG — фейковий Groq API з rate limit")
+    parser.add_argument("--rpm", type=int, default=20, help="Ліміт сервера, запитів за вікно")
+    parser.add_argument("--window", type=float, default=5.0, help="Вікно ліміту, с (Groq — 60)")
+    parser.add_argument("--burst", type=int, default=40, help="Одночасних запитів у сплеску")
+    parser.add_argument("--stream", action="store_true", help="Стрімінгові виклики")
+    parser.add_argument("--serve", action="store_true", help="Лише запустити сервер")
+    parser.add_argument(
+        "--check", action="store_true",
+        help="Лише RateLimitedChatGroq; код 1, якщо сервер віддав хоч один 429 або запит упав",
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    if args.serve:
+        server, _ = serve(args.rpm, args.port, args.window)
+        print(f"Fake Groq: http://127.0.0.1:{args.port} (ліміт {args.rpm} запитів / {args.window:g} с)")
+        server.serve_forever()
+        return
+
+    from langchain_groq import ChatGroq
+
+    from src import ratelimit
+
+    # Клієнтський бюджет — той самий, що в сервера (TPM не обмежуємо)
+    limiter = ratelimit.RateLimiter(args.rpm, 10 ** 9, window_s=args.window)
+    ratelimit.get_limiter = lambda: limiter
+
+    clients = [("RateLimitedChatGroq", ratelimit.RateLimitedChatGroq)]
+    if not args.check:
+        clients.insert(0, ("ChatGroq", ChatGroq))
+
+    for name, llm_cls in clients:
+        server, state = serve(args.rpm, window_s=args.window)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        report   = _burst(llm_cls, base_url, args.burst, args.stream)
+        server.shutdown()
+
+        lat, queue = report["latency_ms"], report["queue_ms"]
+        print(
+            f"{name:<20} ok={report['ok']:>3}  failed={report['failed']:>3}  429 від сервера={state.rejected:>3}  "
+            f"p50={lat.get('p50', 0):8.0f}  p95={lat.get('p95', 0):8.0f} мс  "
+            f"у черзі p95={queue.get('p95', 0):8.0f} мс"
+        )
+        if args.check and (state.rejected or report["failed"]):
+            print(f"FAIL: у межах бюджету {args.rpm} запитів / {args.window:g} с сервер віддав {state.rejected} × 429")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
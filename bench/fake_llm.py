@@ -0,0 +1,55 @@
+"""
+bench/fake_llm.py
+─────────────────────────────────────────────────────────────────
+Детермінована заміна ChatGroq для офлайн-бенчмарків.
+
+Відповідь залежить лише від промпту: питання + перший тарифний рядок
+контексту (з відсотком або сумою). Стрімінг — по словах, без затримок,
+тож бенчмарк міряє лише власний код FinRAG.
+─────────────────────────────────────────────────────────────────
+"""
+
+import re
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_TARIFF_LINE = re.compile(r"^.*\d.*(%|грн).*$", re.MULTILINE)
+
+
+class FakeTariffChatModel(BaseChatModel):
+    """Чат-модель без мережі: однаковий промпт → однакова відповідь."""
+
+    @property
+    def _llm_type(self) -> str:
+        return "finrag-fake-tariff"
+
+    def _answer(self, messages: list[BaseMessage]) -> str:
+        prompt   = "\n".join(str(m.content) for m in messages)
+        question = str(messages[-1].content).removeprefix("Питання клієнта: ")
+        match    = _TARIFF_LINE.search(prompt)
+        if match is None:
+            return "На жаль, я не знайшов цієї інформації в актуальних тарифах банку."
+        return f"За тарифами банку ({question.strip()}):\n• {match.group(0).strip()}"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message = AIMessage(content=self._answer(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        words = self._answer(messages).split(" ")
+        for i, word in enumerate(words):
+            text = word if i == len(words) - 1 else word + " "
+            yield ChatGenerationChunk(message=AIMessageChunk(content=text))
+
+
+def install_fake_llm() -> FakeTariffChatModel:
+    """Підміняє Groq у src.generator на FakeTariffChatModel."""
+    from src import generator
+
+    model = FakeTariffChatModel()
+    generator._get_llm.cache_clear()
+    generator._get_chain.cache_clear()
+    generator._get_llm = lambda: model
+    return model
@@ -0,0 +1,265 @@
+"""
+bench/run.py
+─────────────────────────────────────────────────────────────────
+Офлайн-бенчмарк FinRAG на синтетичному корпусі.
+
+Для кожного масштабу (в окремому процесі — чисті кеші та singleton-и):
+  1. генерує корпус (bench/data/corpus-<N>x, перевикористовується);
+  2. повна інгестія у тимчасову ChromaDB → сторінок/с, чанків/с,
+     embeddings/с;
+  3. латентність retrieve(), format_context() та ask_bot() з
+     FakeTariffChatModel замість Groq → p50/p95/p99, мс.
+
+Кеші, що маскують роботу (вектори запитів, семантичний кеш, кеш
+відповідей LLM, кеш embeddings чанків), вимкнені або скидаються
+перед кожним виміром.
+
+    python -m bench.run --scales 1,10,100 --repeats 3
+    python -m bench.run --embeddings fake      # без embedding-моделі
+
+Результат — JSON у bench/results/<час>-<коміт>.json.
+─────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from bench.corpus import generate_corpus
+
+BENCH_DIR   = Path(__file__).resolve().parent
+DATA_DIR    = BENCH_DIR / "data"
+RESULTS_DIR = BENCH_DIR / "results"
+
+DEFAULT_SCALES  = "1,10"
+DEFAULT_REPEATS = 3
+DEFAULT_K       = 4     # як у ask_bot
+
+# Розмірність для --embeddings fake (як у MiniLM-L12)
+FAKE_EMBEDDING_DIM = 384
+
+
+def percentiles(samples_s: list[float]) -> dict:
+    """p50/p95/p99/mean у мілісекундах (nearest-rank)."""
+    if not samples_s:
+        return {"n": 0}
+    ordered = sorted(samples_s)
+
+    def rank(p: float) -> float:
+        return ordered[min(len(ordered) - 1, max(0, int(round(p * len(ordered))) - 1))] * 1000
+
+    return {
+        "n":    len(ordered),
+        "p50":  rank(0.50),
+        "p95":  rank(0.95),
+        "p99":  rank(0.99),
+        "mean": sum(ordered) / len(ordered) * 1000,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCH_DIR.parent, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# ─────────────────────────────────────────────────────────────────
+# Один масштаб (виконується в дочірньому процесі)
+# ─────────────────────────────────────────────────────────────────
+
+def _install_fake_embeddings() -> None:
+    """
+    DeterministicFakeEmbedding замість моделі — і в ingest, і в retrieval.
+    Вектори одиничні, як у справжньої моделі (normalize_embeddings=True):
+    інакше L2 у Chroma і косинус у numpy-backend-і ранжують по-різному.
+    """
+    import numpy as np
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+
+    from src import ingest, retrieval
+
+    class UnitFakeEmbedding(DeterministicFakeEmbedding):
+        def embed_documents(self, texts: list[str]) -> list[list[float]]:
+            return [self._unit(v) for v in super().embed_documents(texts)]
+
+        def embed_query(self, text: str) -> list[float]:
+            return self._unit(super().embed_query(text))
+
+        @staticmethod
+        def _unit(vector: list[float]) -> list[float]:
+            v = np.asarray(vector, dtype=np.float32)
+            return (v / (np.linalg.norm(v) or 1.0)).tolist()
+
+    fake = UnitFakeEmbedding(size=FAKE_EMBEDDING_DIM)
+    ingest._load_embeddings   = lambda: (fake, "fake")
+    retrieval._load_embeddings = lambda: (fake, "fake")
+    ingest.encode_texts = lambda emb, texts, batch_size=32, workers=1: emb.embed_documents(texts)
+
+
+def _ingest(corpus_dir: Path, db_dir: Path, workers: int) -> dict:
+    """Повна інгестія з вимірами фаз (обгортки над функціями src.ingest)."""
+    from src import ingest
+
+    timings = {"parse_s": 0.0, "split_s": 0.0, "encode_s": 0.0}
+    counts  = {"pages": 0, "chunks": 0}
+
+    def timed(name, fn, count=None):
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            result = fn(*args, **kwargs)
+            timings[name] += time.perf_counter() - t0
+            if count:
+                counts[count] += len(result)
+            return result
+        return wrapper
+
+    ingest.load_pdfs       = timed("parse_s", ingest.load_pdfs, "pages")
+    ingest.split_documents = timed("split_s", ingest.split_documents, "chunks")
+    ingest.encode_texts    = timed("encode_s", ingest.encode_texts)
+
+    started = time.perf_counter()
+    ingest.run_ingestion(corpus_dir, db_dir, full=True, workers=workers)
+    total = time.perf_counter() - started
+
+    return {
+        **counts,
+        **timings,
+        "total_s":          total,
+        "pages_per_s":      counts["pages"] / total,
+        "chunks_per_s":     counts["chunks"] / total,
+        "embeddings_per_s": counts["chunks"] / max(timings["encode_s"], 1e-9),
+    }
+
+
+def _latencies(db_dir: str, queries: list[str], k: int, repeats: int) -> dict:
+    from bench.fake_llm import install_fake_llm
+    from src import generator, retrieval
+    from src.prompts import format_context
+
+    install_fake_llm()
+
+    def reset_caches() -> None:
+        retrieval._get_query_cache.cache_clear()
+        generator._get_answer_cache().clear()
+
+    # Прогрів: модель, індекси, пули потоків
+    retrieval.retrieve(queries[0], k=k, db_dir=db_dir)
+    generator.ask_bot(queries[0], k=k)
+
+    samples: dict[str, list[float]] = {"retrieve": [], "format_context": [], "ask_bot": []}
+    for _ in range(repeats):
+        for q in queries:
+            reset_caches()
+            t0 = time.perf_counter()
+            docs = retrieval.retrieve(q, k=k, db_dir=db_dir)
+            samples["retrieve"].append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            format_context(docs)
+            samples["format_context"].append(time.perf_counter() - t0)
+
+            reset_caches()
+            t0 = time.perf_counter()
+            generator.ask_bot(q, k=k)
+            samples["ask_bot"].append(time.perf_counter() - t0)
+
+    return {name: percentiles(values) for name, values in samples.items()}
+
+
+def run_scale(scale: int, embeddings: str, k: int, repeats: int, workers: int) -> dict:
+    """Корпус → інгестія → латентності для одного масштабу."""
+    corpus_dir = DATA_DIR / f"corpus-{scale}x"
+    corpus     = generate_corpus(corpus_dir, scale)
+    db_dir     = Path(tempfile.mkdtemp(prefix=f"finrag-bench-{scale}x-"))
+
+    # До імпорту src.*: тихі логи (ingest сам налаштовує INFO лише якщо
+    # логування ще не налаштоване), власна база, без дискових кешів
+    logging.basicConfig(level=logging.WARNING)
+    os.environ["FINRAG_DB_DIR"]              = str(db_dir)
+    os.environ["FINRAG_QUERY_CACHE_DB"]      = ""
+    os.environ["FINRAG_EMBEDDING_CACHE_DIR"] = ""
+    os.environ["FINRAG_LLM_CACHE_DB"]        = ""
+
+    try:
+        if embeddings == "fake":
+            _install_fake_embeddings()
+
+        from src.embeddings import COMPARE_QUERIES
+
+        ingest_report = _ingest(corpus_dir, db_dir, workers)
+        latency = _latencies(str(db_dir), COMPARE_QUERIES, k, repeats)
+    finally:
+        shutil.rmtree(db_dir, ignore_errors=True)
+
+    return {"corpus": corpus, "ingest": ingest_report, "latency_ms": latency}
+
+
+# ─────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="FinRAG — офлайн-бенчмарк")
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="Масштаби корпусу через кому (1,10,100,1000)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Проходів по набору запитів")
+    parser.add_argument("--k", type=int, default=DEFAULT_K)
+    parser.add_argument("--workers", type=int, default=1, help="Процесів для парсингу PDF")
+    parser.add_argument(
+        "--embeddings", choices=("model", "fake"), default="model",
+        help="model — справжня embedding-модель (з локального кешу HF); fake — детермінована заглушка",
+    )
+    parser.add_argument("--out", type=Path, default=None, help="Файл JSON (за замовч.: bench/results/...)")
+    args = parser.parse_args()
+
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    commit = _git_commit()
+    report = {
+        "meta": {
+            "commit":     commit,
+            "timestamp":  time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python":     platform.python_version(),
+            "platform":   platform.platform(),
+            "cpus":       os.cpu_count(),
+            "embeddings": args.embeddings,
+            "k":          args.k,
+            "repeats":    args.repeats,
+        },
+        "scales": {},
+    }
+
+    ctx = mp.get_context("spawn")
+    for scale in scales:
+        print(f"▶ {scale}x ...", flush=True)
+        with ctx.Pool(1) as pool:
+            result = pool.apply(run_scale, (scale, args.embeddings, args.k, args.repeats, args.workers))
+        report["scales"][f"{scale}x"] = result
+
+        ing = result["ingest"]
+        print(
+            f"  інгестія: {ing['pages']} стор., {ing['chunks']} чанків за {ing['total_s']:.1f} с | "
+            f"{ing['pages_per_s']:.1f} стор./с, {ing['chunks_per_s']:.1f} чанків/с, "
+            f"{ing['embeddings_per_s']:.1f} embeddings/с"
+        )
+        for name, stats in result["latency_ms"].items():
+            print(f"  {name:<15} p50={stats['p50']:8.2f}  p95={stats['p95']:8.2f}  p99={stats['p99']:8.2f} мс")
+
+    out = args.out or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nРезультат: {out}")
+
+
+if __name__ == "__main__":
+    main()
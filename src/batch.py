@@ -0,0 +1,110 @@
+"""
+src/batch.py
+─────────────────────────────────────────────────────────────────
+Пакетні відповіді FinRAG: JSONL з питаннями → JSONL з відповідями.
+
+Вхід — по рядку на питання: {"query": "...", ...} або просто "...".
+Усі інші поля рядка (id, категорія, ...) копіюються у вихід як є.
+Вихід — у тому ж порядку:
+  {..., "query", "answer", "sources", "error", "cached"}
+
+Питання обробляються порціями по --batch_size через ask_bot_batch
+(вектори та retrieval батчем, Groq — паралельно до --concurrency),
+тож результати з'являються у файлі поступово.
+
+    python -m src.batch --input questions.jsonl --output answers.jsonl
+─────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+from src.generator import BATCH_CONCURRENCY, ask_bot_batch
+
+BATCH_SIZE = 64     # питань на один виклик ask_bot_batch
+
+log = logging.getLogger(__name__)
+
+
+def read_questions(path: Path) -> list[dict]:
+    """Читає JSONL; рядок-рядок JSON стає {"query": ...}."""
+    items = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"query": item}
+            if not isinstance(item, dict) or not isinstance(item.get("query"), str):
+                raise ValueError(f"{path}:{line_no}: очікується рядок або об'єкт з полем \"query\"")
+            items.append(item)
+    return items
+
+
+def answer_file(
+    input_path:      Path,
+    output_path:     Path,
+    k:               int = 4,
+    max_concurrency: int = BATCH_CONCURRENCY,
+    batch_size:      int = BATCH_SIZE,
+) -> dict:
+    """Відповідає на всі питання з input_path; повертає підсумок."""
+    items   = read_questions(input_path)
+    started = time.perf_counter()
+    summary = {"questions": len(items), "errors": 0, "cached": 0}
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as out:
+        for start in range(0, len(items), batch_size):
+            chunk   = items[start:start + batch_size]
+            results = ask_bot_batch([item["query"] for item in chunk], k=k, max_concurrency=max_concurrency)
+
+            for item, result in zip(chunk, results):
+                summary["errors"] += result["error"] is not None
+                summary["cached"] += bool(result.get("cached"))
+                out.write(json.dumps({
+                    **item,
+                    "answer":  result["answer"],
+                    "sources": result["sources"],
+                    "error":   result["error"],
+                    "cached":  result.get("cached", False),
+                }, ensure_ascii=False) + "\n")
+            out.flush()
+            log.info("Оброблено %d / %d", min(start + batch_size, len(items)), len(items))
+
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(levelname)-8s  %(message)s")
+    sys.stdout.reconfigure(encoding="utf-8")
+
+    parser = argparse.ArgumentParser(description="FinRAG — пакетні відповіді: JSONL → JSONL")
+    parser.add_argument("--input", type=Path, required=True, help="JSONL з питаннями")
+    parser.add_argument("--output", type=Path, required=True, help="JSONL для відповідей")
+    parser.add_argument("--k", type=int, default=4, help="Кількість чанків контексту (за замовч.: 4)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=BATCH_CONCURRENCY,
+        help=f"Одночасних викликів Groq (за замовч.: {BATCH_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=BATCH_SIZE,
+        help=f"Питань на порцію (за замовч.: {BATCH_SIZE})",
+    )
+    args = parser.parse_args()
+
+    summary = answer_file(args.input, args.output, args.k, args.concurrency, args.batch_size)
+    print(
+        f"Готово: {summary['questions']} питань за {summary['seconds']:.1f} с "
+        f"(з кешу: {summary['cached']}, помилок: {summary['errors']}) → {args.output}"
+    )
@@ -0,0 +1,565 @@
+"""
+src/cache.py
+─────────────────────────────────────────────────────────────────
+Кеші FinRAG.
+
+QueryEmbeddingCache — вектори запитів:
+  • in-memory LRU (обмежений розмір) — гарячі запити без forward-pass;
+  • опціональний sqlite-рівень на диску — переживає рестарти.
+  Ключ = назва embedding-моделі + нормалізований текст запиту, тож
+  зміна EMBEDDING_MODEL ніколи не віддасть застарілі вектори.
+
+SemanticAnswerCache — готові відповіді ask_bot для майже однакових
+  питань (косинусна схожість ≥ поріг), з TTL, LRU-витісненням та
+  автоматичною інвалідацією при перебудові індексу.
+
+ChunkEmbeddingStore — вектори чанків для інгестії: float16-матриця +
+  індекс sha1 тексту, за моделлю; енкодер бачить лише нові тексти.
+
+RerankScoreCache — оцінки cross-encoder-а за парою
+  (нормалізований запит, id чанку), LRU у пам'яті.
+
+LLMResponseCache — точні відповіді Groq у sqlite: ключ = хеш моделі,
+  temperature, max_tokens та повністю відрендереного промпту. Розмір
+  обмежений (LRU), лічильник hits на запис, очистка старих версій
+  промпту:
+      python -m src.cache --prune
+─────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────────────────────────
+# Нормалізація запитів
+# ─────────────────────────────────────────────────────────────────
+
+def normalize_query(text: str) -> str:
+    """
+    Нормалізує запит для ключа кешу: регістр, пунктуація, пробіли.
+    "  Яка комісія за зняття готівки? " → "яка комісія за зняття готівки"
+    """
+    text = unicodedata.normalize("NFC", text).lower()
+    text = "".join(
+        " " if unicodedata.category(ch).startswith("P") else ch
+        for ch in text
+    )
+    return " ".join(text.split())
+
+
+def _query_key(model_name: str, text: str) -> str:
+    raw = f"{model_name}\x00{normalize_query(text)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+# ─────────────────────────────────────────────────────────────────
+# Кеш векторів запитів
+# ─────────────────────────────────────────────────────────────────
+
+class QueryEmbeddingCache:
+    """
+    Двохрівневий кеш векторів запитів: LRU у пам'яті + sqlite на диску.
+
+    Args:
+        model_name: Назва embedding-моделі (частина ключа).
+        max_items:  Розмір in-memory LRU.
+        db_path:    Шлях до sqlite-файлу; None — лише пам'ять.
+    """
+
+    def __init__(self, model_name: str, max_items: int = 2048, db_path: str | None = None):
+        self.model_name = model_name
+        self.max_items  = max_items
+        self.hits   = 0
+        self.misses = 0
+
+        self._lru: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = Lock()
+        self._db: sqlite3.Connection | None = None
+
+        if db_path:
+            try:
+                Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(db_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                    " model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL,"
+                    " PRIMARY KEY (model, key))"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                log.warning("Дисковий кеш запитів недоступний (%s): %s", db_path, e)
+                self._db = None
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_items:
+            self._lru.popitem(last=False)
+
+    def get_many(self, texts: list[str]) -> list[list[float] | None]:
+        """Повертає вектор для кожного тексту або None, якщо його немає в кеші."""
+        keys = [_query_key(self.model_name, t) for t in texts]
+        result: list[list[float] | None] = []
+
+        with self._lock:
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is None and self._db is not None:
+                    row = self._db.execute(
+                        "SELECT vector FROM query_embeddings WHERE model = ? AND key = ?",
+                        (self.model_name, key),
+                    ).fetchone()
+                    if row is not None:
+                        vector = array("f", row[0]).tolist()
+                if vector is not None:
+                    self._remember(key, vector)
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                result.append(vector)
+        return result
+
+    def put_many(self, texts: list[str], vectors: list[list[float]]) -> None:
+        """Зберігає вектори у пам'ять і (якщо увімкнено) на диск."""
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = _query_key(self.model_name, text)
+                vector = list(vector)
+                self._remember(key, vector)
+                rows.append((self.model_name, key, array("f", vector).tobytes()))
+
+            if self._db is not None and rows:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO query_embeddings (model, key, vector) "
+                        "VALUES (?, ?, ?)",
+                        rows,
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    log.warning("Не вдалося записати кеш запитів на диск: %s", e)
+
+
+# ─────────────────────────────────────────────────────────────────
+# Кеш оцінок reranker-а
+# ─────────────────────────────────────────────────────────────────
+
+class RerankScoreCache:
+    """
+    LRU-кеш оцінок cross-encoder-а: (модель, запит, id чанку) → score.
+    Повторні та перефразовані лише пунктуацією запити не проганяють
+    модель вдруге для вже оцінених кандидатів.
+    """
+
+    def __init__(self, model_name: str, max_items: int = 8192):
+        self.model_name = model_name
+        self.max_items  = max_items
+        self.hits   = 0
+        self.misses = 0
+
+        self._lru: OrderedDict[tuple[str, str, str], float] = OrderedDict()
+        self._lock = Lock()
+
+    def get_many(self, query: str, chunk_ids: list[str]) -> list[float | None]:
+        """Оцінка для кожного id чанку або None, якщо її немає в кеші."""
+        q = normalize_query(query)
+        result: list[float | None] = []
+        with self._lock:
+            for cid in chunk_ids:
+                key   = (self.model_name, q, cid)
+                score = self._lru.get(key)
+                if score is not None:
+                    self._lru.move_to_end(key)
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                result.append(score)
+        return result
+
+    def put_many(self, query: str, chunk_ids: list[str], scores: list[float]) -> None:
+        q = normalize_query(query)
+        with self._lock:
+            for cid, score in zip(chunk_ids, scores):
+                key = (self.model_name, q, cid)
+                self._lru[key] = float(score)
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.max_items:
+                self._lru.popitem(last=False)
+
+
+# ─────────────────────────────────────────────────────────────────
+# Семантичний кеш відповідей
+# ─────────────────────────────────────────────────────────────────
+
+def _unit(vector) -> np.ndarray:
+    """Вектор одиничної довжини (float32): косинус = скалярний добуток."""
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm > 0 else v
+
+
+class SemanticAnswerCache:
+    """
+    Кеш відповідей ask_bot за семантичною схожістю питань.
+
+    Питання вважається дублікатом, якщо косинусна схожість його вектора
+    з уже відповіданим питанням (з тим самим k) ≥ threshold і множина
+    ключових слів (retrieval._extract_keywords) однакова — дешевий
+    захист від "зняття готівки" ↔ "зняття готівки в іншому банку" з
+    дуже близькими векторами. Записи мають TTL, кількість обмежена
+    (LRU-витіснення), а зміна версії індексу (повторна інгестія)
+    очищає кеш повністю.
+    """
+
+    # Поля конкретного запиту, що не мають потрапляти у відповіді інших
+    REQUEST_FIELDS = ("ttft", "timings", "tokens", "cached", "coalesced", "cache_similarity")
+
+    def __init__(self, threshold: float = 0.95, ttl_s: float = 3600.0, max_items: int = 512):
+        self.threshold = threshold
+        self.ttl_s     = ttl_s
+        self.max_items = max_items
+        self.hits   = 0
+        self.misses = 0
+
+        self._entries: OrderedDict[int, tuple] = OrderedDict()   # id → (vector, k, keywords, created, result)
+        self._next_id = 0
+        self._version: str | None = None
+        self._matrix = None          # кешована матриця векторів (перебудовується ліниво)
+        self._matrix_ids: list[int] = []
+        self._lock = Lock()
+
+    def _check_version(self, version: str) -> None:
+        if version != self._version:
+            if self._entries:
+                log.info("Індекс змінився (%s → %s) — кеш відповідей очищено", self._version, version)
+            self._entries.clear()
+            self._matrix = None
+            self._version = version
+
+    def _drop(self, entry_id: int) -> None:
+        self._entries.pop(entry_id, None)
+        self._matrix = None
+
+    def lookup(
+        self,
+        vector:   list[float],
+        k:        int,
+        version:  str,
+        keywords: frozenset[str] = frozenset(),
+    ) -> tuple[dict, float] | None:
+        """Повертає (result, similarity) найближчого свіжого запису або None."""
+        now   = time.monotonic()
+        query = _unit(vector)
+        with self._lock:
+            self._check_version(version)
+
+            expired = [eid for eid, e in self._entries.items() if now - e[3] > self.ttl_s]
+            for eid in expired:
+                self._drop(eid)
+
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            if self._matrix is None:
+                self._matrix_ids = list(self._entries)
+                self._matrix = np.asarray(
+                    [self._entries[eid][0] for eid in self._matrix_ids], dtype=np.float32,
+                )
+
+            # Вектори нормалізовані (_unit) → косинус = скалярний добуток
+            sims = self._matrix @ query
+            for pos in np.argsort(-sims):
+                sim = float(sims[pos])
+                if sim < self.threshold:
+                    break
+                eid = self._matrix_ids[pos]
+                entry = self._entries[eid]
+                if entry[1] == k and entry[2] == keywords:
+                    self._entries.move_to_end(eid)
+                    self.hits += 1
+                    return entry[4], sim
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        vector:   list[float],
+        k:        int,
+        version:  str,
+        result:   dict,
+        keywords: frozenset[str] = frozenset(),
+    ) -> None:
+        """Додає відповідь у кеш, витісняючи найдавніше використані записи."""
+        answer = {key: value for key, value in result.items() if key not in self.REQUEST_FIELDS}
+        with self._lock:
+            self._check_version(version)
+            self._entries[self._next_id] = (_unit(vector), k, keywords, time.monotonic(), answer)
+            self._next_id += 1
+            self._matrix = None
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+
+# ─────────────────────────────────────────────────────────────────
+# Кеш embeddings чанків (для інгестії)
+# ─────────────────────────────────────────────────────────────────
+
+def text_hash(text: str) -> str:
+    """Контентна адреса чанку — sha1 тексту."""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ChunkEmbeddingStore:
+    """
+    Контентно-адресоване сховище векторів чанків на диску.
+
+    Для кожної моделі — float16-матриця `<model>.f16.npy` (рядок = вектор)
+    та індекс `<model>.index.json` (список sha1 текстів у порядку рядків).
+    Однаковий текст чанку більше ніколи не проганяється через енкодер:
+    повторні інгестії, нові колекції, відновлення після пошкодження БД.
+    """
+
+    def __init__(self, cache_dir: str | Path, model_name: str):
+        self.model_name = model_name
+        self.cache_dir  = Path(cache_dir)
+        slug = "".join(ch if ch.isalnum() else "_" for ch in model_name.split("/")[-1])
+        stem = f"{slug}-{hashlib.sha1(model_name.encode('utf-8')).hexdigest()[:8]}"
+        self._matrix_path = self.cache_dir / f"{stem}.f16.npy"
+        self._index_path  = self.cache_dir / f"{stem}.index.json"
+
+        self._hashes: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._matrix = None
+        self._pending: dict[str, np.ndarray] = {}
+
+        try:
+            self._hashes = json.loads(self._index_path.read_text(encoding="utf-8"))
+            self._matrix = np.load(self._matrix_path, mmap_mode="r")
+            if len(self._matrix) != len(self._hashes):
+                raise ValueError("розмір матриці не збігається з індексом")
+            self._rows = {h: i for i, h in enumerate(self._hashes)}
+        except FileNotFoundError:
+            self._hashes = []
+        except (OSError, ValueError) as e:
+            log.warning("Кеш embeddings чанків пошкоджений — починаємо заново: %s", e)
+            self._hashes, self._rows, self._matrix = [], {}, None
+
+    def __len__(self) -> int:
+        return len(self._rows) + len(self._pending)
+
+    def get_many(self, texts: list[str]) -> list[list[float] | None]:
+        """Вектор (float32) для кожного тексту або None, якщо його немає."""
+        result: list[list[float] | None] = []
+        for text in texts:
+            h = text_hash(text)
+            if h in self._pending:
+                result.append(self._pending[h].astype(np.float32).tolist())
+            elif h in self._rows:
+                result.append(np.asarray(self._matrix[self._rows[h]], dtype=np.float32).tolist())
+            else:
+                result.append(None)
+        return result
+
+    def add_many(self, texts: list[str], vectors: list[list[float]]) -> None:
+        """Додає нові вектори (збережуться на диск при save())."""
+        for text, vector in zip(texts, vectors):
+            h = text_hash(text)
+            if h not in self._rows:
+                self._pending[h] = np.asarray(vector, dtype=np.float16)
+
+    def save(self) -> None:
+        """Дописує нові вектори у матрицю та індекс (атомарна заміна файлів)."""
+        if not self._pending:
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        new_hashes = list(self._pending)
+        new_rows   = np.stack([self._pending[h] for h in new_hashes])
+        matrix = new_rows if self._matrix is None else np.concatenate(
+            [np.asarray(self._matrix, dtype=np.float16), new_rows],
+        )
+        hashes = self._hashes + new_hashes
+
+        tmp_matrix = self._matrix_path.with_suffix(".tmp.npy")
+        tmp_index  = self._index_path.with_suffix(".tmp")
+        np.save(tmp_matrix, matrix)
+        tmp_index.write_text(json.dumps(hashes), encoding="utf-8")
+        os.replace(tmp_matrix, self._matrix_path)
+        os.replace(tmp_index, self._index_path)
+
+        self._hashes  = hashes
+        self._rows    = {h: i for i, h in enumerate(hashes)}
+        self._matrix  = np.load(self._matrix_path, mmap_mode="r")
+        self._pending = {}
+        log.info("Кеш embeddings чанків збережено: %d векторів (%s)", len(hashes), self._matrix_path)
+
+
+def embed_with_store(
+    encode: Callable[[list[str]], list[list[float]]],
+    texts:  list[str],
+    store:  ChunkEmbeddingStore | None,
+) -> list[list[float]]:
+    """
+    Повертає вектори текстів: із сховища, а відсутні — через encode
+    (одним викликом, напр. embeddings.embed_documents) з подальшим
+    додаванням у сховище.
+    """
+    if store is None:
+        return encode(texts)
+
+    vectors = store.get_many(texts)
+    missing = [i for i, vec in enumerate(vectors) if vec is None]
+    log.info(
+        "Embeddings чанків: з кешу %d, до енкодера %d",
+        len(texts) - len(missing), len(missing),
+    )
+    if missing:
+        fresh = encode([texts[i] for i in missing])
+        store.add_many([texts[i] for i in missing], fresh)
+        for i, vec in zip(missing, fresh):
+            vectors[i] = vec
+    return vectors
+
+
+# ─────────────────────────────────────────────────────────────────
+# Кеш відповідей LLM (точний збіг промпту)
+# ─────────────────────────────────────────────────────────────────
+
+def llm_cache_key(model: str, temperature: float, max_tokens: int, prompt: str) -> str:
+    """Ключ відповіді LLM: усе, від чого залежить детермінована генерація."""
+    raw = f"{model}\x00{temperature!r}\x00{max_tokens}\x00{prompt}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Дисковий кеш відповідей LLM за точним збігом ключа (llm_cache_key).
+
+    sqlite-файл спільний між рестартами та репліками на одному томі.
+    Записів не більше max_items — при переповненні витісняються давно
+    не використані (last_used). prompt_version дозволяє прибрати
+    відповіді, згенеровані старими версіями системного промпту.
+    """
+
+    def __init__(self, db_path: str | Path, max_items: int = 10_000):
+        self.max_items = max_items
+        self.hits   = 0
+        self.misses = 0
+
+        self._lock = Lock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False, timeout=10)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS llm_responses ("
+            " key TEXT PRIMARY KEY, prompt_version TEXT NOT NULL, model TEXT NOT NULL,"
+            " answer TEXT NOT NULL, created REAL NOT NULL, last_used REAL NOT NULL,"
+            " hits INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS llm_responses_last_used ON llm_responses (last_used)"
+        )
+        self._db.commit()
+
+    def get(self, key: str) -> str | None:
+        """Повертає збережену відповідь (і рахує hit) або None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT answer FROM llm_responses WHERE key = ?", (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE llm_responses SET hits = hits + 1, last_used = ? WHERE key = ?",
+                (time.time(), key),
+            )
+            self._db.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, answer: str, prompt_version: str, model: str) -> None:
+        """Зберігає відповідь; за потреби витісняє найдавніше використані."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO llm_responses "
+                "(key, prompt_version, model, answer, created, last_used, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, prompt_version, model, answer, now, now),
+            )
+            self._db.execute(
+                "DELETE FROM llm_responses WHERE key IN ("
+                " SELECT key FROM llm_responses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_items,),
+            )
+            self._db.commit()
+
+    def prune(self, prompt_version: str) -> int:
+        """Видаляє записи інших версій промпту; повертає кількість видалених."""
+        with self._lock:
+            cur = self._db.execute(
+                "DELETE FROM llm_responses WHERE prompt_version != ?", (prompt_version,),
+            )
+            self._db.commit()
+            return cur.rowcount
+
+    def stats(self) -> dict:
+        """Кількість записів, сумарні hits та розподіл за версіями промпту."""
+        with self._lock:
+            entries, hits = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM llm_responses",
+            ).fetchone()
+            versions = dict(self._db.execute(
+                "SELECT prompt_version, COUNT(*) FROM llm_responses GROUP BY prompt_version",
+            ).fetchall())
+        return {"entries": entries, "hits": hits, "versions": versions}
+
+
+if __name__ == "__main__":
+    from src.generator import LLM_CACHE_DB, LLM_CACHE_SIZE
+    from src.prompts import PROMPT_VERSION
+
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="FinRAG — кеш відповідей LLM")
+    parser.add_argument("--db", default=LLM_CACHE_DB, help="sqlite-файл кешу")
+    parser.add_argument("--prune", action="store_true", help="Видалити записи старих версій промпту")
+    args = parser.parse_args()
+
+    if not args.db:
+        parser.error("кеш вимкнено (FINRAG_LLM_CACHE_DB порожній) — вкажи --db")
+
+    cache = LLMResponseCache(args.db, max_items=LLM_CACHE_SIZE)
+    if args.prune:
+        removed = cache.prune(PROMPT_VERSION)
+        print(f"Видалено записів старих версій промпту: {removed}")
+
+    stats = cache.stats()
+    print(f"Записів: {stats['entries']}, hits: {stats['hits']}, поточна версія промпту: {PROMPT_VERSION}")
+    for version, count in sorted(stats["versions"].items()):
+        mark = "*" if version == PROMPT_VERSION else " "
+        print(f"  {mark} {version}: {count}")
@@ -0,0 +1,252 @@
+"""
+src/embeddings.py
+─────────────────────────────────────────────────────────────────
+Завантаження embedding-моделі зі змінним backend-ом (спільне для
+retrieval.py та ingest.py).
+
+Backend-и (FINRAG_EMBEDDING_BACKEND):
+  • torch — PyTorch fp32 на CPU (за замовчуванням, як і раніше);
+  • onnx  — експортована ONNX-модель з int8 динамічною квантизацією
+            (onnxruntime). Експорт робиться один раз у data/models/onnx.
+            Якщо optimum/onnxruntime недоступні — fallback на torch.
+
+Порівняння backend-ів (час завантаження, латентність запиту, RSS,
+recall-паритет проти fp32-індексу в ChromaDB):
+    python -m src.embeddings --compare
+─────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import inspect
+import logging
+import os
+import time
+from pathlib import Path
+
+from langchain_huggingface import HuggingFaceEmbeddings
+
+PROJECT_ROOT      = Path(__file__).resolve().parent.parent
+DEFAULT_DB_DIR    = Path(os.getenv("FINRAG_DB_DIR", PROJECT_ROOT / "data" / "chromadb"))
+EMBEDDING_MODEL   = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+CHROMA_COLLECTION = "finrag_tariffs"
+
+EMBEDDING_BACKEND = os.getenv("FINRAG_EMBEDDING_BACKEND", "torch")
+ONNX_DIR          = PROJECT_ROOT / "data" / "models" / "onnx"
+# Набір інструкцій для int8-квантизації: avx2 | avx512 | avx512_vnni | arm64
+ONNX_QUANT_CONFIG = os.getenv("FINRAG_ONNX_QUANT", "avx2")
+
+BACKENDS = ("torch", "onnx")
+
+log = logging.getLogger(__name__)
+
+
+def cache_model_key(model_name: str, backend: str) -> str:
+    """
+    Ідентифікатор моделі для кешів векторів: int8-вектори трохи
+    відрізняються від fp32, тож backend — частина ключа.
+    """
+    if backend == "torch":
+        return model_name
+    return f"{model_name}#{backend}-int8-{ONNX_QUANT_CONFIG}"
+
+
+def _load_torch(model_name: str) -> HuggingFaceEmbeddings:
+    return HuggingFaceEmbeddings(
+        model_name=model_name,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"normalize_embeddings": True},
+    )
+
+
+def _load_onnx_int8(model_name: str) -> HuggingFaceEmbeddings:
+    """Завантажує (за потреби — спершу експортує) int8 ONNX-модель."""
+    local_dir = ONNX_DIR / model_name.split("/")[-1]
+    file_name = f"onnx/model_qint8_{ONNX_QUANT_CONFIG}.onnx"
+
+    if not (local_dir / file_name).exists():
+        from sentence_transformers import SentenceTransformer
+        from sentence_transformers.backend import export_dynamic_quantized_onnx_model
+
+        log.info("Експорт ONNX int8 (%s): %s → %s", ONNX_QUANT_CONFIG, model_name, local_dir)
+        model = SentenceTransformer(model_name, device="cpu", backend="onnx")
+        model.save_pretrained(str(local_dir))
+        export_dynamic_quantized_onnx_model(model, ONNX_QUANT_CONFIG, str(local_dir))
+
+    return HuggingFaceEmbeddings(
+        model_name=str(local_dir),
+        model_kwargs={
+            "device": "cpu",
+            "backend": "onnx",
+            "model_kwargs": {"file_name": file_name},
+        },
+        encode_kwargs={"normalize_embeddings": True},
+    )
+
+
+def load_embeddings(
+    model_name: str = EMBEDDING_MODEL,
+    backend:    str | None = None,
+) -> tuple[HuggingFaceEmbeddings, str]:
+    """
+    Повертає (embeddings, фактичний backend).
+
+    Якщо ONNX недоступний (немає optimum/onnxruntime, помилка експорту) —
+    логуємо попередження і повертаємось до torch fp32.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        log.warning("Невідомий embedding backend '%s' — використовуємо torch", backend)
+        backend = "torch"
+
+    if backend == "onnx":
+        try:
+            return _load_onnx_int8(model_name), "onnx"
+        except Exception as e:
+            log.warning("ONNX backend недоступний (%s) — fallback на torch fp32", e)
+
+    return _load_torch(model_name), "torch"
+
+
+def encode_texts(
+    embeddings: HuggingFaceEmbeddings,
+    texts:      list[str],
+    batch_size: int = 32,
+    workers:    int = 1,
+) -> list[list[float]]:
+    """
+    Кодує тексти для інгестії з налаштовуваним batch size.
+
+    workers > 1 — пул процесів sentence-transformers (по процесу на
+    CPU-воркер): великі ре-інгестії завантажують усі ядра, а не одне.
+    """
+    client = embeddings._client
+    if workers <= 1 or len(texts) < batch_size * 2:
+        vectors = client.encode(
+            texts, batch_size=batch_size, normalize_embeddings=True, show_progress_bar=False,
+        )
+        return vectors.tolist()
+
+    pool = client.start_multi_process_pool(target_devices=["cpu"] * workers)
+    try:
+        # sentence-transformers >= 5: encode(pool=...), раніше — encode_multi_process
+        if "pool" in inspect.signature(client.encode).parameters:
+            vectors = client.encode(
+                texts, pool=pool, batch_size=batch_size, normalize_embeddings=True,
+            )
+        else:
+            vectors = client.encode_multi_process(
+                texts, pool, batch_size=batch_size, normalize_embeddings=True,
+            )
+    finally:
+        client.stop_multi_process_pool(pool)
+    return vectors.tolist()
+
+
+# ─────────────────────────────────────────────────────────────────
+# Порівняння backend-ів
+# ─────────────────────────────────────────────────────────────────
+
+COMPARE_QUERIES = [
+    "Яка комісія за зняття готівки?",
+    "Умови кредитної картки",
+    "Відсоткова ставка по кредиту",
+    "Обслуговування картки",
+    "Умови депозиту",
+    "Ліміти переказів",
+    "Які комісії за обслуговування картки?",
+    "Умови зняття готівки з картки",
+    "Мінімальний щомісячний платіж по кредиту",
+    "Пільговий період кредитної картки",
+]
+
+
+def _rss_mb() -> float:
+    """Піковий RSS поточного процесу в МБ."""
+    import resource
+    import sys
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _profile_backend(backend: str, queries: list[str], repeats: int) -> dict:
+    """Виконується в окремому процесі — щоб RSS і час завантаження були чесними."""
+    started = time.perf_counter()
+    embeddings, active = load_embeddings(EMBEDDING_MODEL, backend)
+    embeddings.embed_query(queries[0])          # прогрів
+    load_s = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(repeats):
+        for q in queries:
+            t0 = time.perf_counter()
+            embeddings.embed_query(q)
+            latencies.append(time.perf_counter() - t0)
+    latencies.sort()
+
+    return {
+        "backend":    active,
+        "load_s":     load_s,
+        "query_p50_ms": latencies[len(latencies) // 2] * 1000,
+        "query_p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "rss_mb":     _rss_mb(),
+        "vectors":    embeddings.embed_documents(queries),
+    }
+
+
+def compare_backends(db_dir: Path, k: int = 10, repeats: int = 5) -> list[dict]:
+    """
+    Звіт по backend-ах + recall@k-паритет: top-k по fp32-векторах
+    ChromaDB для запитів, закодованих кожним backend-ом, порівнюється
+    з top-k для torch fp32.
+    """
+    import multiprocessing as mp
+
+    import chromadb
+    import numpy as np
+
+    ctx = mp.get_context("spawn")
+    reports = []
+    for backend in BACKENDS:
+        with ctx.Pool(1) as pool:
+            reports.append(pool.apply(_profile_backend, (backend, COMPARE_QUERIES, repeats)))
+
+    collection = chromadb.PersistentClient(path=str(db_dir)).get_collection(CHROMA_COLLECTION)
+    index = np.asarray(collection.get(include=["embeddings"])["embeddings"], dtype=np.float32)
+
+    def top_k(vectors) -> list[set[int]]:
+        scores = np.asarray(vectors, dtype=np.float32) @ index.T
+        return [set(np.argsort(-row)[:k].tolist()) for row in scores]
+
+    reference = top_k(reports[0]["vectors"])
+    for report in reports:
+        hits = top_k(report["vectors"])
+        report["recall_at_k"] = float(np.mean([
+            len(ref & got) / len(ref) for ref, got in zip(reference, hits)
+        ]))
+        report.pop("vectors")
+    return reports
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)-8s | %(message)s",
+        datefmt="%H:%M:%S",
+    )
+    parser = argparse.ArgumentParser(description="FinRAG — embedding backends")
+    parser.add_argument("--compare", action="store_true", help="Порівняти torch та onnx backend-и")
+    parser.add_argument("--db_dir", type=Path, default=DEFAULT_DB_DIR)
+    parser.add_argument("--k", type=int, default=10, help="k для recall@k-паритету")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    if not args.compare:
+        parser.print_help()
+    else:
+        print(f"\n{'backend':<8} {'load, с':>8} {'p50, мс':>8} {'p95, мс':>8} {'RSS, МБ':>8} {'recall@' + str(args.k):>10}")
+        for r in compare_backends(args.db_dir, k=args.k, repeats=args.repeats):
+            print(
+                f"{r['backend']:<8} {r['load_s']:>8.2f} {r['query_p50_ms']:>8.1f} "
+                f"{r['query_p95_ms']:>8.1f} {r['rss_mb']:>8.0f} {r['recall_at_k']:>10.3f}"
+            )
@@ -4,21 +4,47 @@ src/generator.py
 Generation-модуль: виклик Groq API (LLaMA 3),
 формування відповіді та об'єднання з метаданими джерел.
 
-Публічний API: функція ask_bot(query) → dict
+Публічний API:
+  • ask_bot(query) → dict
+  • ask_bot_stream(query) → ітератор подій (джерела, токени, підсумок)
+  • aask_bot(query) → dict (asyncio-версія для async веб-сервісів)
+  • ask_bot_batch(queries) → list[dict] (сотні питань: FAQ, звіти)
+
+Кожен результат містить "timings" (секунди по етапах) і "tokens" Groq;
+ті самі числа агрегуються в src.telemetry (гістограми, /metrics).
 ─────────────────────────────────────────────────────────────────
 """
 
+import asyncio
 import logging
 import os
+import sqlite3
+import time
+from collections.abc import Iterator
 from functools import lru_cache
+from pathlib import Path
 
 from dotenv import load_dotenv
-from langchain_groq import ChatGroq
-from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 
-from src.prompts import RAG_PROMPT, format_context
-from src.retrieval import retrieve, extract_sources
+from src.cache import LLMResponseCache, SemanticAnswerCache, llm_cache_key, normalize_query
+from src.profiling import profiled
+from src.prompts import PROMPT_VERSION, RAG_PROMPT, pack_context, render_prompt
+from src.ratelimit import RateLimitedChatGroq, queue_time
+from src.retrieval import (
+    _embed_queries,
+    _extract_keywords,
+    _timed,
+    aembed_query,
+    aretrieve,
+    embed_query,
+    extract_sources,
+    index_version,
+    retrieve,
+    retrieve_batch,
+)
+from src.singleflight import Call, SingleFlight
+from src.telemetry import record_request, record_singleflight
 
 load_dotenv()
 
@@ -32,14 +58,36 @@ GROQ_MODEL         = "llama-3.3-70b-versatile"
 GROQ_TEMPERATURE   = 0.0   # 0 = детермінований, мінімум вигадок
 GROQ_MAX_TOKENS    = 1024
 
+# Семантичний кеш відповідей: поріг косинусної схожості, TTL, розмір
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("FINRAG_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL_S     = 3600
+SEMANTIC_CACHE_SIZE      = 512
+
+# Дисковий кеш відповідей Groq за точним промптом ("" вимикає)
+LLM_CACHE_DB   = os.getenv(
+    "FINRAG_LLM_CACHE_DB",
+    str(Path(__file__).resolve().parent.parent / "data" / "cache" / "llm_responses.sqlite"),
+)
+LLM_CACHE_SIZE = 10_000
+
+# Single-flight: скільки follower чекає на leader-а, перш ніж рахувати сам
+SINGLEFLIGHT_WAIT_S = 120
+
+# Скільки викликів Groq ask_bot_batch виконує одночасно
+BATCH_CONCURRENCY = int(os.getenv("FINRAG_BATCH_CONCURRENCY", "4"))
+
 
 # ─────────────────────────────────────────────────────────────────
 # Singleton LLM
 # ─────────────────────────────────────────────────────────────────
 
 @lru_cache(maxsize=1)
-def _get_llm() -> ChatGroq:
-    """Повертає singleton-підключення до Groq."""
+def _get_llm() -> RateLimitedChatGroq:
+    """
+    Повертає singleton-підключення до Groq. Виклики йдуть через
+    клієнтський rate limiter (src.ratelimit): черга замість 429,
+    повтори — там само, тож SDK власних повторів не робить.
+    """
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
         raise EnvironmentError(
@@ -49,41 +97,158 @@ def _get_llm() -> ChatGroq:
         )
     log.info("Ініціалізація Groq: %s (temp=%.1f)", GROQ_MODEL, GROQ_TEMPERATURE)
     
-    return ChatGroq(
+    return RateLimitedChatGroq(
         model_name=GROQ_MODEL,
         groq_api_key=api_key,
         temperature=GROQ_TEMPERATURE,
         max_tokens=GROQ_MAX_TOKENS,
+        max_retries=0,
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_answer_cache() -> SemanticAnswerCache:
+    """Повертає singleton семантичного кешу відповідей."""
+    return SemanticAnswerCache(
+        threshold=SEMANTIC_CACHE_THRESHOLD,
+        ttl_s=SEMANTIC_CACHE_TTL_S,
+        max_items=SEMANTIC_CACHE_SIZE,
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_llm_cache() -> LLMResponseCache | None:
+    """Повертає singleton дискового кешу відповідей LLM (або None, якщо вимкнено)."""
+    if not LLM_CACHE_DB:
+        return None
+    try:
+        return LLMResponseCache(LLM_CACHE_DB, max_items=LLM_CACHE_SIZE)
+    except sqlite3.Error as e:
+        log.warning("Кеш відповідей LLM недоступний (%s): %s", LLM_CACHE_DB, e)
+        return None
+
+
+def _llm_cache_key(query: str, context: str) -> str:
+    """Ключ кешу: модель, параметри генерації та повністю відрендерений промпт."""
+    return llm_cache_key(
+        GROQ_MODEL, GROQ_TEMPERATURE, GROQ_MAX_TOKENS, render_prompt(query, context),
     )
 
 
+def _cached_llm_answer(key: str) -> str | None:
+    cache = _get_llm_cache()
+    answer = cache.get(key) if cache is not None else None
+    if answer is not None:
+        log.info("Кеш відповідей LLM: hit — Groq не викликається")
+    return answer
+
+
+def _store_llm_answer(key: str, answer: str) -> None:
+    cache = _get_llm_cache()
+    if cache is not None and answer.strip():
+        cache.put(key, answer, PROMPT_VERSION, GROQ_MODEL)
+
+
+@lru_cache(maxsize=1)
+def _get_singleflight() -> SingleFlight:
+    """Повертає singleton реєстру однакових питань у польоті."""
+    return SingleFlight()
+
+
+def _flight_key(query: str, k: int, version: str) -> tuple:
+    return normalize_query(query), k, version
+
+
+def _shareable(result: dict) -> dict:
+    """Результат без полів конкретного запиту (ttft, timings, ...) — для інших сесій."""
+    return {key: value for key, value in result.items() if key not in SemanticAnswerCache.REQUEST_FIELDS}
+
+
+def _follow(call: Call, query: str, timings: dict) -> dict | None:
+    """
+    Чекає результат leader-а (його помилка пробрасується й тут).
+    None — leader не завершив (таймаут, перерваний стрім): рахуємо самі.
+    """
+    log.info("Single-flight: чекаю на однаковий запит у польоті '%s'", query[:80])
+    t0   = time.perf_counter()
+    done = call.wait(SINGLEFLIGHT_WAIT_S)
+    timings["singleflight_wait"] = time.perf_counter() - t0
+    if not done:
+        log.warning("Single-flight: leader не завершив за %dс — рахую самостійно", SINGLEFLIGHT_WAIT_S)
+        return None
+    result = call.get()
+    if result is None:
+        log.info("Single-flight: запит leader-а перервано — рахую самостійно")
+    else:
+        record_singleflight()
+    return result
+
+
 # ─────────────────────────────────────────────────────────────────
 # RAG-ланцюжок
 # ─────────────────────────────────────────────────────────────────
 
-def _build_chain():
+@lru_cache(maxsize=1)
+def _get_chain():
     """
-    Будує LangChain LCEL-ланцюжок:
-      question -> retrieval -> prompt -> LLM -> str
+    Будує (один раз) LangChain LCEL-ланцюжок:
+      question -> retrieval -> prompt -> LLM -> AIMessage
+    Повертає повідомлення (а не str), щоб мати usage_metadata з токенами.
+    Ланцюжок stateless — один екземпляр обслуговує sync та async виклики.
     """
     llm = _get_llm()
     chain = (
         RunnablePassthrough()
         | RAG_PROMPT
         | llm
-        | StrOutputParser()
     )
     return chain
 
 
+# Токени, якщо Groq не викликався (кеш-хіт)
+_NO_TOKENS = {"prompt": 0, "completion": 0}
+
+
+def _usage(message) -> dict:
+    """Токени промпту та відповіді з метаданих відповіді Groq (None — невідомо)."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    return {"prompt": usage.get("input_tokens"), "completion": usage.get("output_tokens")}
+
+
+def _finish(result: dict, timings: dict, started: float) -> dict:
+    """Додає timings (з "total") та агрегує запит у телеметрію процесу."""
+    timings["total"] = time.perf_counter() - started
+    if result.get("ttft") is not None:
+        timings["ttft"] = result["ttft"]        # стрімінг: гістограма поруч з етапами
+    tokens = result.get("tokens")
+    record_request(timings, tokens, _outcome(result))
+    return {**result, "tokens": tokens, "timings": timings}
+
+
+def _outcome(result: dict) -> str:
+    """Підсумок запиту для телеметрії: cached | error | not_found | answered."""
+    if result.get("cached"):
+        return "cached"
+    if result.get("error") is not None:
+        return "error"
+    if not result.get("docs"):
+        return "not_found"
+    return "answered"
+
+
 # ─────────────────────────────────────────────────────────────────
 # Публічний API
 # ─────────────────────────────────────────────────────────────────
 
+@profiled
 def ask_bot(query: str, k: int = 4) -> dict:
     """
     Головна функція FinRAG-асистента.
 
+    Якщо майже таке саме питання (з тим самим k) нещодавно вже
+    отримало відповідь — повертає її з семантичного кешу без
+    retrieval та виклику Groq.
+
     Args:
         query: Питання користувача.
         k:     Кількість чанків для RAG-контексту.
@@ -94,74 +259,408 @@ def ask_bot(query: str, k: int = 4) -> dict:
           - "sources" (list):      [{"source": "file.pdf", "pages": [3, 4]}, ...]
           - "docs"    (list):      Оригінальні Document-об'єкти (для дебагу)
           - "error"   (str|None):  Опис помилки якщо вона сталася
+          - "cached"  (bool):      Чи відповідь узята з семантичного кешу
+          - "cache_similarity" (float|None): Схожість зі збереженим питанням
+          - "coalesced" (bool):    Чи це результат однакового питання, що
+                                   одночасно рахувався в іншій сесії
+          - "tokens"  (dict|None): {"prompt", "completion"} — токени Groq
+          - "timings" (dict):      Секунди по етапах: embed_query, semantic_cache,
+                                   keyword_scan, embed_queries, semantic_search,
+                                   fusion, dedup, context, llm_cache, llm
+                                   (з них llm_queue — очікування rate limit), total;
+                                   у ask_bot_stream ще ttft — до першого токена
+                                   у followers single-flight — singleflight_wait
+                                   (+ expansion_queries — кількість підзапитів)
+    """
+    started = time.perf_counter()
+    timings: dict = {}
+
+    cache   = _get_answer_cache()
+    vector  = _timed(timings, "embed_query", embed_query, query)
+    version = index_version()
+    words   = frozenset(_extract_keywords(query))
+
+    hit = _timed(timings, "semantic_cache", cache.lookup, vector, k, version, words)
+    if hit is not None:
+        cached_result, similarity = hit
+        log.info("Семантичний кеш: hit (схожість %.3f) для '%s'", similarity, query[:80])
+        return _finish(
+            {**cached_result, "tokens": _NO_TOKENS, "cached": True, "coalesced": False, "cache_similarity": similarity},
+            timings, started,
+        )
+
+    # Таке саме питання вже рахується в іншій сесії → чекаємо його результат
+    flight = _get_singleflight()
+    key    = _flight_key(query, k, version)
+    call, leader = flight.begin(key)
+    if not leader:
+        shared = _follow(call, query, timings)
+        if shared is not None:
+            return _finish(
+                {**shared, "tokens": _NO_TOKENS, "cached": False, "coalesced": True, "cache_similarity": None},
+                timings, started,
+            )
+
+    try:
+        result = _answer(query, k, timings)
+    except Exception as exc:
+        if leader:
+            flight.finish(key, call, error=exc)
+        raise
+    if leader:
+        flight.finish(key, call, result=_shareable(result))
+
+    # Кешуємо лише успішні відповіді з джерелами
+    if result["error"] is None and result["sources"]:
+        cache.store(vector, k, version, result, words)
+
+    return _finish({**result, "cached": False, "coalesced": False, "cache_similarity": None}, timings, started)
+
+
+_NOT_FOUND_ANSWER = "На жаль, я не знайшов жодної релевантної інформації в тарифах банку."
+
+
+def _error_result(exc: Exception, docs: list) -> dict:
+    """
+    Класифікує помилку виклику LLM і повертає dict-результат
+    (спільно для ask_bot та ask_bot_stream).
+    """
+    if isinstance(exc, EnvironmentError):
+        log.error("Помилка конфігурації: %s", exc)
+        return {
+            "answer":  "API ключ не налаштовано. Перевір наявність GROQ_API_KEY у файлі .env",
+            "sources": [],
+            "docs":    docs,
+            "error":   f"EnvironmentError: {exc}",
+        }
+
+    err_str = str(exc)
+
+    if "429" in err_str or "rate limit" in err_str.lower():
+        log.warning("Rate limit exceeded: %s", err_str[:200])
+        return {
+            "answer": (
+                "Перевищено ліміт запитів до Groq API.\n\n"
+                "Будь ласка, зачекайте хвилину і спробуйте знову."
+            ),
+            "sources": [],
+            "docs":    docs,
+            "error":   "RATE_LIMIT_EXCEEDED",
+        }
+
+    elif "authentication" in err_str.lower() or "401" in err_str:
+        log.warning("Invalid API Key: %s", err_str[:200])
+        return {
+            "answer": "Невірний ключ Groq API. Перевірте GROQ_API_KEY в .env",
+            "sources": [],
+            "docs":    docs,
+            "error":   "INVALID_API_KEY"
+        }
+
+    log.error("Невідома помилка: %s", err_str[:300])
+    return {
+        "answer":  f"Помилка при зверненні до Groq API: {err_str[:150]}",
+        "sources": [],
+        "docs":    docs,
+        "error":   err_str,
+    }
+
+
+def _build_context(docs: list) -> tuple[str, list]:
+    """
+    Пакує чанки в контекст у межах бюджету токенів і логує економію.
+    Повертає (context, чанки, що потрапили в контекст) — джерела
+    цитуються лише з них, а не з усього retrieval.
     """
+    packed = pack_context(docs)
+    log.info(
+        "Контекст: %d токенів, %d фрагментів (з %d чанків), злиття перекриттів зекономило %d токенів; "
+        "не влізло в бюджет: %d фрагментів (%d токенів)",
+        packed["tokens"], packed["fragments"], len(docs), packed["tokens_saved"],
+        packed["dropped"], packed["dropped_tokens"],
+    )
+    return packed["context"], packed["docs"]
+
+
+def _answer(query: str, k: int, timings: dict) -> dict:
+    """Повний RAG-прохід: retrieval → контекст → Groq (без семантичного кешу)."""
     log.info("Запит: %s", query[:80])
 
     # 1. Retrieval (verbose=False у production, True тільки для debug-скриптів)
-    docs = retrieve(query, k=k, verbose=False)
+    docs = retrieve(query, k=k, verbose=False, timings=timings)
 
     if not docs:
         return {
-            "answer":  "На жаль, я не знайшов жодної релевантної інформації в тарифах банку.",
+            "answer":  _NOT_FOUND_ANSWER,
             "sources": [],
             "docs":    [],
             "error":   None,
+            "tokens":  _NO_TOKENS,
         }
 
     # 2. Формуємо контекст
-    context = format_context(docs)
+    context, used = _timed(timings, "context", _build_context, docs)
+
+    # 3. LLM — з обробкою помилок (ідентичний промпт → відповідь з кешу)
+    key    = _llm_cache_key(query, context)
+    answer = _timed(timings, "llm_cache", _cached_llm_answer, key)
+    tokens = _NO_TOKENS
+    if answer is None:
+        try:
+            chain   = _get_chain()
+            message = _timed(timings, "llm", chain.invoke, {"question": query, "context": context})
+        except Exception as exc:
+            return _error_result(exc, docs)
+        answer, tokens = message.content, _usage(message)
+        timings["llm_queue"] = queue_time(message)
+        _store_llm_answer(key, answer)
+
+    # 4. Витягуємо джерела (лише з чанків, що потрапили в контекст)
+    sources = extract_sources(used)
+
+    log.info(
+        "Відповідь сформовано. Джерел: %d, символів: %d",
+        len(sources), len(answer),
+    )
+
+    return {
+        "answer":  answer.strip(),
+        "sources": sources,
+        "docs":    docs,
+        "error":   None,
+        "tokens":  tokens,
+    }
+
+
+@profiled
+def ask_bot_stream(query: str, k: int = 4) -> Iterator[dict]:
+    """
+    Стрімінгова версія ask_bot: віддає результат по мірі генерації.
+
+    Події (dict із ключем "type"):
+      - {"type": "sources", "sources": [...]}  — одразу після retrieval
+      - {"type": "token",   "text": "..."}     — фрагменти відповіді від Groq
+      - {"type": "done",    "result": {...}}   — підсумковий dict як у ask_bot
+                                                 + "ttft" (сек до першого токена)
+
+    Помилки класифікуються так само, як в ask_bot (RATE_LIMIT_EXCEEDED,
+    INVALID_API_KEY, ...) і приходять у підсумковій події "done".
+    """
+    started = time.perf_counter()
+    timings: dict = {}
 
-    # 3. LLM — з обробкою помилок
+    cache   = _get_answer_cache()
+    vector  = _timed(timings, "embed_query", embed_query, query)
+    version = index_version()
+    words   = frozenset(_extract_keywords(query))
+
+    hit = _timed(timings, "semantic_cache", cache.lookup, vector, k, version, words)
+    if hit is not None:
+        cached_result, similarity = hit
+        log.info("Семантичний кеш: hit (схожість %.3f) для '%s'", similarity, query[:80])
+        yield {"type": "sources", "sources": cached_result["sources"]}
+        yield {"type": "token", "text": cached_result["answer"]}
+        yield {"type": "done", "result": _finish({
+            **cached_result,
+            "tokens": _NO_TOKENS,
+            "cached": True,
+            "coalesced": False,
+            "cache_similarity": similarity,
+            "ttft": time.perf_counter() - started,
+        }, timings, started)}
+        return
+
+    flight = _get_singleflight()
+    key    = _flight_key(query, k, version)
+    call, leader = flight.begin(key)
+    if not leader:
+        shared = _follow(call, query, timings)
+        if shared is not None:
+            yield {"type": "sources", "sources": shared["sources"]}
+            yield {"type": "token", "text": shared["answer"]}
+            yield {"type": "done", "result": _finish({
+                **shared,
+                "tokens": _NO_TOKENS,
+                "cached": False,
+                "coalesced": True,
+                "cache_similarity": None,
+                "ttft": time.perf_counter() - started,
+            }, timings, started)}
+            return
+
+    result = None
     try:
-        chain  = _build_chain()
-        answer = chain.invoke({"question": query, "context": context})
+        for event in _stream_answer(query, k, timings, started):
+            if event["type"] == "done":
+                result = event["result"]
+                if leader:
+                    flight.finish(key, call, result=_shareable(result))
+                if result["error"] is None and result["sources"]:
+                    cache.store(vector, k, version, result, words)
+                event = {"type": "done", "result": _finish({
+                    **result,
+                    "cached": False,
+                    "coalesced": False,
+                    "cache_similarity": None,
+                }, timings, started)}
+            yield event
+    except Exception as exc:
+        if leader and not call.done.is_set():
+            flight.finish(key, call, error=exc)
+        raise
+    finally:
+        # Стрім перервано (користувач пішов) — followers рахують самі
+        if leader and not call.done.is_set():
+            flight.finish(key, call)
 
-    except EnvironmentError as exc:
-        log.error("Помилка конфігурації: %s", exc)
-        return {
-            "answer":  "API ключ не налаштовано. Перевір наявність GROQ_API_KEY у файлі .env",
+
+def _stream_answer(query: str, k: int, timings: dict, started: float) -> Iterator[dict]:
+    """Події ask_bot_stream після промаху кешу; "done" — сирий результат."""
+    log.info("Запит (stream): %s", query[:80])
+    docs = retrieve(query, k=k, verbose=False, timings=timings)
+
+    if not docs:
+        yield {"type": "sources", "sources": []}
+        yield {"type": "token", "text": _NOT_FOUND_ANSWER}
+        yield {"type": "done", "result": {
+            "answer":  _NOT_FOUND_ANSWER,
             "sources": [],
-            "docs":    docs,
-            "error":   f"EnvironmentError: {exc}",
-        }
+            "docs":    [],
+            "error":   None,
+            "tokens":  _NO_TOKENS,
+            "ttft":    time.perf_counter() - started,
+        }}
+        return
+
+    context, used = _timed(timings, "context", _build_context, docs)
+    sources = extract_sources(used)
+    yield {"type": "sources", "sources": sources}
+
+    parts: list[str] = []
+    ttft: float | None = None
+
+    key    = _llm_cache_key(query, context)
+    cached = _timed(timings, "llm_cache", _cached_llm_answer, key)
+    tokens = _NO_TOKENS
+    full   = None        # склеєні AIMessageChunk — для usage_metadata
 
+    llm_started = time.perf_counter()
+    try:
+        if cached is not None:
+            chunks = [cached]
+        else:
+            chunks = _get_chain().stream({"question": query, "context": context})
+        for chunk in chunks:
+            if not isinstance(chunk, str):
+                full  = chunk if full is None else full + chunk
+                chunk = chunk.content
+            if not chunk:
+                continue
+            if ttft is None:
+                ttft = time.perf_counter() - started
+                log.info("TTFT: %.2fс", ttft)
+            parts.append(chunk)
+            yield {"type": "token", "text": chunk}
     except Exception as exc:
-        err_str = str(exc)
-
-        if "429" in err_str or "rate limit" in err_str.lower():
-            log.warning("Rate limit exceeded: %s", err_str[:200])
-            return {
-                "answer": (
-                    "Перевищено ліміт запитів до Groq API.\n\n"
-                    "Будь ласка, зачекайте хвилину і спробуйте знову."
-                ),
-                "sources": [],
-                "docs":    docs,
-                "error":   "RATE_LIMIT_EXCEEDED",
-            }
-            
-        elif "authentication" in err_str.lower() or "401" in err_str:
-            log.warning("Invalid API Key: %s", err_str[:200])
-            return {
-                "answer": "Невірний ключ Groq API. Перевірте GROQ_API_KEY в .env",
-                "sources": [],
-                "docs":    docs,
-                "error":   "INVALID_API_KEY"
-            }
+        timings["llm"] = time.perf_counter() - llm_started
+        yield {"type": "done", "result": {**_error_result(exc, docs), "ttft": ttft}}
+        return
+    if cached is None:
+        timings["llm"] = time.perf_counter() - llm_started
+        timings["llm_queue"] = queue_time(full)
+        tokens = _usage(full)
+
+    answer = "".join(parts)
+    if cached is None:
+        _store_llm_answer(key, answer)
+    answer = answer.strip()
+    result = {
+        "answer":  answer,
+        "sources": sources,
+        "docs":    docs,
+        "error":   None,
+        "tokens":  tokens,
+    }
+    log.info(
+        "Відповідь сформовано (stream). Джерел: %d, символів: %d, час: %.2fс",
+        len(sources), len(answer), time.perf_counter() - started,
+    )
+    yield {"type": "done", "result": {**result, "ttft": ttft}}
+
+
+async def aask_bot(query: str, k: int = 4) -> dict:
+    """
+    Асинхронна версія ask_bot (той самий формат результату).
+
+    Embedding і ChromaDB виконуються в executor, виклик Groq — через
+    chain.ainvoke, тож один event loop тримає сотні питань одночасно.
+    """
+    started = time.perf_counter()
+    timings: dict = {}
+
+    cache   = _get_answer_cache()
+    t0      = time.perf_counter()
+    vector  = await aembed_query(query)
+    timings["embed_query"] = time.perf_counter() - t0
+    version = index_version()
+    words   = frozenset(_extract_keywords(query))
+
+    hit = _timed(timings, "semantic_cache", cache.lookup, vector, k, version, words)
+    if hit is not None:
+        cached_result, similarity = hit
+        log.info("Семантичний кеш: hit (схожість %.3f) для '%s'", similarity, query[:80])
+        return _finish(
+            {**cached_result, "tokens": _NO_TOKENS, "cached": True, "coalesced": False, "cache_similarity": similarity},
+            timings, started,
+        )
+
+    result = await _aanswer(query, k, timings)
+
+    if result["error"] is None and result["sources"]:
+        cache.store(vector, k, version, result, words)
 
-        log.error("Невідома помилка: %s", err_str[:300])
+    return _finish({**result, "cached": False, "coalesced": False, "cache_similarity": None}, timings, started)
+
+
+async def _aanswer(query: str, k: int, timings: dict) -> dict:
+    """Асинхронний RAG-прохід: aretrieve → контекст → chain.ainvoke."""
+    log.info("Запит (async): %s", query[:80])
+
+    docs = await aretrieve(query, k=k, timings=timings)
+
+    if not docs:
         return {
-            "answer":  f"Помилка при зверненні до Groq API: {err_str[:150]}",
+            "answer":  _NOT_FOUND_ANSWER,
             "sources": [],
-            "docs":    docs,
-            "error":   err_str,
+            "docs":    [],
+            "error":   None,
+            "tokens":  _NO_TOKENS,
         }
 
-    # 4. Витягуємо джерела
-    sources = extract_sources(docs)
+    context, used = _timed(timings, "context", _build_context, docs)
+
+    # sqlite-кеш Groq — блокуючий I/O, тож поза event loop
+    key    = _llm_cache_key(query, context)
+    t0     = time.perf_counter()
+    answer = await asyncio.to_thread(_cached_llm_answer, key)
+    timings["llm_cache"] = time.perf_counter() - t0
+    tokens = _NO_TOKENS
+    if answer is None:
+        t0 = time.perf_counter()
+        try:
+            chain   = _get_chain()
+            message = await chain.ainvoke({"question": query, "context": context})
+        except Exception as exc:
+            return _error_result(exc, docs)
+        finally:
+            timings["llm"] = time.perf_counter() - t0
+        answer, tokens = message.content, _usage(message)
+        timings["llm_queue"] = queue_time(message)
+        await asyncio.to_thread(_store_llm_answer, key, answer)
 
+    sources = extract_sources(used)
     log.info(
-        "Відповідь сформовано. Джерел: %d, символів: %d",
+        "Відповідь сформовано (async). Джерел: %d, символів: %d",
         len(sources), len(answer),
     )
 
@@ -170,4 +669,176 @@ def ask_bot(query: str, k: int = 4) -> dict:
         "sources": sources,
         "docs":    docs,
         "error":   None,
+        "tokens":  tokens,
     }
+
+
+def ask_bot_batch(
+    queries:         list[str],
+    k:               int = 4,
+    max_concurrency: int = BATCH_CONCURRENCY,
+) -> list[dict]:
+    """
+    Пакетна версія ask_bot для сотень питань (FAQ, звіти).
+
+    Вектори всіх питань рахуються одним батчем, retrieval для промахів
+    семантичного кешу — одним retrieve_batch, а виклики Groq ідуть
+    паралельно через chain.batch не більше max_concurrency одночасно.
+    Однакові (після normalize_query) питання рахуються один раз.
+
+    Returns:
+        Список dict у порядку queries — формат як у ask_bot; "timings" —
+        етапи батчу, через які пройшло питання. Помилка одного питання
+        (rate limit, збій embedding чи retrieval, ...) лишається у його
+        "error" і не зупиняє решту.
+    """
+    started = time.perf_counter()
+    timings: dict = {}
+    cache   = _get_answer_cache()
+    version = index_version()
+    results: list[dict | None] = [None] * len(queries)
+
+    # 0. Вектори батчем; якщо батч упав — по одному, помилка лише у своєму питанні
+    t0 = time.perf_counter()
+    try:
+        vectors = _embed_queries(list(queries))
+    except Exception as exc:
+        log.warning("Batch: embedding батчем не вдався (%s) — по одному", exc)
+        vectors = [None] * len(queries)
+        for i, query in enumerate(queries):
+            try:
+                vectors[i] = embed_query(query)
+            except Exception as item_exc:
+                results[i] = _error_result(item_exc, [])
+    timings["embed_queries"] = time.perf_counter() - t0
+    words = [frozenset(_extract_keywords(q)) for q in queries]
+
+    # 1. Семантичний кеш
+    t0 = time.perf_counter()
+    pending = []
+    for i, vector in enumerate(vectors):
+        if vector is None:
+            continue
+        hit = cache.lookup(vector, k, version, words[i])
+        if hit is None:
+            pending.append(i)
+            continue
+        cached_result, similarity = hit
+        results[i] = {
+            **cached_result,
+            "tokens": _NO_TOKENS, "cached": True, "coalesced": False, "cache_similarity": similarity,
+        }
+    timings["semantic_cache"] = time.perf_counter() - t0
+
+    # Однакові питання: рахуємо перше, решта отримує його результат
+    leaders: dict[str, int] = {}
+    duplicates: dict[int, int] = {}     # індекс → індекс питання-лідера
+    for i in pending:
+        leader = leaders.setdefault(normalize_query(queries[i]), i)
+        if leader != i:
+            duplicates[i] = leader
+    unique = [i for i in pending if i not in duplicates]
+
+    # 2. Retrieval одним батчем (при збої — по одному) → контекст → кеш відповідей Groq
+    t0 = time.perf_counter()
+    try:
+        found = retrieve_batch([queries[i] for i in unique], k=k)
+    except Exception as exc:
+        log.warning("Batch: retrieval батчем не вдався (%s) — по одному", exc)
+        found = []
+        for i in unique:
+            try:
+                found.append(retrieve(queries[i], k=k))
+            except Exception as item_exc:
+                found.append(item_exc)
+    timings["retrieve"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    calls = []      # (індекс, docs, чанки в контексті, context, ключ кешу)
+    for i, docs in zip(unique, found):
+        if isinstance(docs, Exception):
+            results[i] = _error_result(docs, [])
+            continue
+        if not docs:
+            results[i] = {
+                "answer":  _NOT_FOUND_ANSWER,
+                "sources": [],
+                "docs":    [],
+                "error":   None,
+                "tokens":  _NO_TOKENS,
+            }
+            continue
+        context, used = _build_context(docs)
+        key     = _llm_cache_key(queries[i], context)
+        answer  = _cached_llm_answer(key)
+        if answer is None:
+            calls.append((i, docs, used, context, key))
+        else:
+            results[i] = {
+                "answer":  answer.strip(),
+                "sources": extract_sources(used),
+                "docs":    docs,
+                "error":   None,
+                "tokens":  _NO_TOKENS,
+            }
+    timings["llm_cache"] = time.perf_counter() - t0
+
+    # 3. Groq — паралельно з обмеженням, помилки по кожному питанню окремо
+    if calls:
+        t0 = time.perf_counter()
+        try:
+            messages = _get_chain().batch(
+                [{"question": queries[i], "context": context} for i, _, _, context, _ in calls],
+                config={"max_concurrency": max_concurrency},
+                return_exceptions=True,
+            )
+        except Exception as exc:
+            messages = [exc] * len(calls)
+        timings["llm"] = time.perf_counter() - t0
+
+        for (i, docs, used, _, key), message in zip(calls, messages):
+            if isinstance(message, Exception):
+                results[i] = _error_result(message, docs)
+                continue
+            _store_llm_answer(key, message.content)
+            results[i] = {
+                "answer":  message.content.strip(),
+                "sources": extract_sources(used),
+                "docs":    docs,
+                "error":   None,
+                "tokens":  _usage(message),
+            }
+
+    for i in unique:
+        results[i] = {
+            **results[i],
+            "tokens": results[i].get("tokens"), "cached": False, "coalesced": False, "cache_similarity": None,
+        }
+        if results[i]["error"] is None and results[i]["sources"]:
+            cache.store(vectors[i], k, version, results[i], words[i])
+    for i, leader in duplicates.items():
+        results[i] = {**results[leader], "tokens": _NO_TOKENS, "coalesced": True}
+
+    # Кожне питання чекало етапи батчу, через які пройшло:
+    # збій embedding — лише перший, кеш-hit — перші два, решта — всі
+    total  = time.perf_counter() - started
+    passed = set(pending)
+    for i, result in enumerate(results):
+        if i in passed:
+            stages = timings
+        elif vectors[i] is not None:
+            stages = {"embed_queries": timings["embed_queries"], "semantic_cache": timings["semantic_cache"]}
+        else:
+            stages = {"embed_queries": timings["embed_queries"]}
+        results[i] = {
+            "tokens": None, "cached": False, "coalesced": False, "cache_similarity": None,
+            **result,
+            "timings": {**stages, "total": total},
+        }
+        record_request(results[i]["timings"], results[i]["tokens"], _outcome(results[i]))
+
+    log.info(
+        "Batch: %d питань (кеш: %d, дублікатів: %d, Groq: %d) за %.2fс",
+        len(queries), len(queries) - len(pending), len(duplicates), len(calls), total,
+    )
+    return results
@@ -8,13 +8,29 @@ Ingestion Pipeline (Етап 1):
     python -m src.ingest
     # або з кастомною теченою:
     python -m src.ingest --pdf_dir data/raw --db_dir data/chromadb
+    # повна перебудова замість інкрементальної:
+    python -m src.ingest --full
+    # паралельний парсинг PDF у 8 процесах, енкодинг у 4 з батчем 128:
+    python -m src.ingest --workers 8 --encode_workers 4 --batch_size 128
+    # додатково експортувати знімок для точного NumPy-backend-у:
+    python -m src.ingest --vector_backend numpy
+
+Інгестія інкрементальна: маніфест (хеші PDF → id чанків) у теці БД
+дозволяє парсити, ембедити та upsert-ити лише нові/змінені файли і
+видаляти чанки файлів, яких більше немає.
 ─────────────────────────────────────────────────────────────────
 """
 
 import argparse
+import hashlib
+import json
 import logging
 import os
 import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 from dotenv import load_dotenv
@@ -24,6 +40,17 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_chroma import Chroma
 
+from src.cache import ChunkEmbeddingStore, embed_with_store
+from src.embeddings import cache_model_key, encode_texts, load_embeddings
+from src.keyword_index import KEYWORD_INDEX_FILE, KeywordIndex
+from src.vector_backend import (
+    BACKENDS as VECTOR_BACKENDS,
+    NUMPY_SUBDIR,
+    VECTOR_BACKEND,
+    export_numpy_index,
+    numpy_index_version,
+)
+
 # ─────────────────────────────────────────────────────────────────
 # Конфігурація
 # ─────────────────────────────────────────────────────────────────
@@ -33,7 +60,7 @@ load_dotenv()
 # Розташування директорій (відносно кореня проекту)
 PROJECT_ROOT = Path(__file__).resolve().parent.parent
 DEFAULT_PDF_DIR = PROJECT_ROOT / "data" / "raw"
-DEFAULT_DB_DIR  = PROJECT_ROOT / "data" / "chromadb"
+DEFAULT_DB_DIR  = Path(os.getenv("FINRAG_DB_DIR", PROJECT_ROOT / "data" / "chromadb"))
 
 # Параметри чанкінгу (відповідно до Design Doc)
 CHUNK_SIZE    = 900   # символів — достатньо для одного логічного блоку тарифів
@@ -45,6 +72,29 @@ EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
 # Назва колекції у ChromaDB
 CHROMA_COLLECTION = "finrag_tariffs"
 
+# Маркер версії індексу (має збігатися з retrieval.py) — за ним
+# кеші retrieval/generator дізнаються, що базу перебудовано
+INDEX_VERSION_FILE = "index_version"
+
+# Маніфест інкрементальної інгестії: {файл: sha256 + id його чанків}
+MANIFEST_FILE = "ingest_manifest.json"
+
+# Розмір одного upsert/delete-батчу у ChromaDB (ліміт chromadb ≈ 5461)
+UPSERT_BATCH = 5000
+
+# Енкодинг чанків: розмір батчу моделі та кількість процесів енкодера
+ENCODE_BATCH_SIZE = 64
+ENCODE_WORKERS    = 1
+
+# Кількість процесів для парсингу PDF (1 = послідовно в поточному процесі)
+DEFAULT_WORKERS = 1
+
+# Контентно-адресований кеш векторів чанків (порожнє значення вимикає)
+EMBEDDING_CACHE_DIR = os.getenv(
+    "FINRAG_EMBEDDING_CACHE_DIR",
+    str(PROJECT_ROOT / "data" / "cache" / "chunk_embeddings"),
+)
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s | %(levelname)-8s | %(message)s",
@@ -57,17 +107,13 @@ log = logging.getLogger(__name__)
 # Допоміжні функції
 # ─────────────────────────────────────────────────────────────────
 
-def load_pdfs(pdf_dir: Path) -> list[Document]:
-    """
-    Завантажує всі PDF з зазначеної директорії.
-    Додає до метаданих: source (ім'я файлу) та page (номер сторінки).
-    Повертає список об'єктів Document.
-    """
+def find_pdfs(pdf_dir: Path) -> list[Path]:
+    """Повертає відсортований список PDF у директорії (або завершує скрипт)."""
     if not pdf_dir.exists():
         log.error("Директорія з PDF не знайдена: %s", pdf_dir)
         sys.exit(1)
 
-    pdf_files = list(pdf_dir.glob("*.pdf"))
+    pdf_files = sorted(pdf_dir.glob("*.pdf"))
 
     if not pdf_files:
         log.warning(
@@ -77,26 +123,70 @@ def load_pdfs(pdf_dir: Path) -> list[Document]:
         )
         sys.exit(0)
 
-    all_docs: list[Document] = []
+    return pdf_files
 
-    for pdf_path in pdf_files:
-        log.info("📄  Завантаження: %s", pdf_path.name)
-        try:
-            loader = PyPDFLoader(str(pdf_path))
-            docs = loader.load()  # кожен елемент = одна сторінка PDF
 
-            # Нормалізуємо метадані — залишаємо тільки те, що нам потрібно
-            for doc in docs:
-                doc.metadata = {
-                    "source": pdf_path.name,          # напр. "Tariff_Credit_Card.pdf"
-                    "page":   doc.metadata.get("page", 0) + 1,  # 1-indexed
-                }
+def _load_one_pdf(pdf_path: Path) -> tuple[list[Document], str | None]:
+    """
+    Парсить один PDF і нормалізує метадані сторінок.
+    Повертає (сторінки, None) або ([], текст помилки) — виконується
+    також у дочірніх процесах, тому помилки не пробрасуються.
+    """
+    try:
+        loader = PyPDFLoader(str(pdf_path))
+        docs = loader.load()  # кожен елемент = одна сторінка PDF
+    except Exception as exc:
+        return [], str(exc)
+
+    # Нормалізуємо метадані — залишаємо тільки те, що нам потрібно
+    for doc in docs:
+        doc.metadata = {
+            "source": pdf_path.name,          # напр. "Tariff_Credit_Card.pdf"
+            "page":   doc.metadata.get("page", 0) + 1,  # 1-indexed
+        }
+    return docs, None
+
+
+def load_pdfs(
+    pdf_dir:   Path,
+    pdf_files: list[Path] | None = None,
+    workers:   int = DEFAULT_WORKERS,
+) -> list[Document]:
+    """
+    Завантажує PDF з зазначеної директорії (або лише pdf_files, якщо задано).
+    Додає до метаданих: source (ім'я файлу) та page (номер сторінки).
+    Повертає список об'єктів Document у порядку файлів і сторінок.
 
-            all_docs.extend(docs)
-            log.info("   ✔ Завантажено сторінок: %d", len(docs))
+    workers > 1 — парсинг у пулі процесів (pypdf CPU-bound). Файл, що не
+    парситься, логується і пропускається, не зупиняючи весь батч.
+    """
+    if pdf_files is None:
+        pdf_files = find_pdfs(pdf_dir)
 
-        except Exception as exc:
-            log.error("   ✘ Помилка при завантаженні %s: %s", pdf_path.name, exc)
+    all_docs: list[Document] = []
+
+    def _collect(pdf_path: Path, docs: list[Document], error: str | None) -> None:
+        if error is not None:
+            log.error("   ✘ Помилка при завантаженні %s: %s", pdf_path.name, error)
+            return
+        all_docs.extend(docs)
+        log.info("   ✔ %s — завантажено сторінок: %d", pdf_path.name, len(docs))
+
+    if workers > 1 and len(pdf_files) > 1:
+        log.info("📄  Паралельне завантаження %d PDF (%d процесів)", len(pdf_files), workers)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_load_one_pdf, p) for p in pdf_files]
+            # Збираємо у порядку файлів — порядок сторінок зберігається
+            for pdf_path, future in zip(pdf_files, futures):
+                try:
+                    docs, error = future.result()
+                except Exception as exc:   # напр. падіння дочірнього процесу
+                    docs, error = [], str(exc)
+                _collect(pdf_path, docs, error)
+    else:
+        for pdf_path in pdf_files:
+            log.info("📄  Завантаження: %s", pdf_path.name)
+            _collect(pdf_path, *_load_one_pdf(pdf_path))
 
     log.info("─" * 50)
     log.info("Всього завантажено сторінок: %d з %d PDF-файлів", len(all_docs), len(pdf_files))
@@ -136,21 +226,136 @@ def split_documents(docs: list[Document]) -> list[Document]:
     return chunks
 
 
-def build_vector_store(chunks: list[Document], db_dir: Path) -> Chroma:
+def file_sha256(path: Path) -> str:
+    """SHA-256 вмісту файлу (для виявлення змінених PDF)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(chunk: Document) -> str:
     """
-    Ініціалізує локальну ChromaDB і зберігає вектори.
-    Завжди очищує стару колекцію перед записом — запобігає дублікатам.
+    Детермінований id чанку: source + page + start_index + хеш тексту.
+    Однаковий чанк при повторній інгестії отримує той самий id.
     """
-    db_dir.mkdir(parents=True, exist_ok=True)
+    meta = chunk.metadata
+    text_hash = hashlib.sha1(chunk.page_content.encode("utf-8")).hexdigest()
+    raw = f"{meta.get('source')}|{meta.get('page')}|{meta.get('start_index')}|{text_hash}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
 
+
+def load_manifest(db_dir: Path) -> dict:
+    """Читає маніфест інгестії; порожній dict, якщо його немає або він пошкоджений."""
+    try:
+        return json.loads((db_dir / MANIFEST_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(db_dir: Path, files: dict) -> None:
+    """Записує маніфест разом з параметрами, від яких залежать чанки та вектори."""
+    manifest = {
+        "embedding_model": _model_key(),
+        "collection":      CHROMA_COLLECTION,
+        "chunk_size":      CHUNK_SIZE,
+        "chunk_overlap":   CHUNK_OVERLAP,
+        "files":           files,
+    }
+    (db_dir / MANIFEST_FILE).write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8",
+    )
+
+
+def _manifest_compatible(manifest: dict) -> bool:
+    """
+    Чи можна оновлювати базу інкрементально (ті самі модель і чанкінг).
+    Модель порівнюється з фактично завантаженим backend-ом (ONNX міг
+    відкотитися на torch) — int8 і fp32 вектори не змішуються в колекції.
+    """
+    return bool(manifest.get("files")) and (
+        manifest.get("embedding_model") == _model_key()
+        and manifest.get("collection") == CHROMA_COLLECTION
+        and manifest.get("chunk_size") == CHUNK_SIZE
+        and manifest.get("chunk_overlap") == CHUNK_OVERLAP
+    )
+
+
+@lru_cache(maxsize=1)
+def _load_embeddings() -> tuple[HuggingFaceEmbeddings, str]:
     log.info("Завантаження embedding-моделі: %s", EMBEDDING_MODEL)
     log.info("    (Перший запуск може зайняти 1-2 хвилини)")
+    return load_embeddings(EMBEDDING_MODEL)
+
+
+def _get_embeddings() -> HuggingFaceEmbeddings:
+    return _load_embeddings()[0]
+
 
-    embeddings = HuggingFaceEmbeddings(
-        model_name=EMBEDDING_MODEL,
-        model_kwargs={"device": "cpu"},
-        encode_kwargs={"normalize_embeddings": True},
+def _model_key() -> str:
+    """Модель + фактичний backend — ключ кешу векторів чанків і маніфесту."""
+    return cache_model_key(EMBEDDING_MODEL, _load_embeddings()[1])
+
+
+
+def _upsert(
+    vector_store:   Chroma,
+    chunks:         list[Document],
+    batch_size:     int = ENCODE_BATCH_SIZE,
+    encode_workers: int = ENCODE_WORKERS,
+) -> None:
+    """
+    Рахує вектори чанків (через кеш embeddings, енкодер — лише для
+    нових текстів, за потреби в кількох процесах), а потім окремим
+    етапом upsert-ить їх з детермінованими id великими батчами.
+    """
+    started = time.perf_counter()
+    store = ChunkEmbeddingStore(EMBEDDING_CACHE_DIR, _model_key()) if EMBEDDING_CACHE_DIR else None
+    texts = [c.page_content for c in chunks]
+    vectors = embed_with_store(
+        lambda batch: encode_texts(_get_embeddings(), batch, batch_size, encode_workers),
+        texts,
+        store,
+    )
+    if store is not None:
+        store.save()
+    encoded = time.perf_counter()
+
+    for start in range(0, len(chunks), UPSERT_BATCH):
+        batch = chunks[start:start + UPSERT_BATCH]
+        vector_store._collection.upsert(
+            ids=[chunk_id(c) for c in batch],
+            embeddings=vectors[start:start + UPSERT_BATCH],
+            documents=[c.page_content for c in batch],
+            metadatas=[c.metadata for c in batch],
+        )
+    finished = time.perf_counter()
+
+    log.info(
+        "Embeddings: %d чанків за %.1fс (%.0f чанків/с, batch=%d, процесів=%d)",
+        len(chunks), encoded - started,
+        len(chunks) / max(encoded - started, 1e-9), batch_size, encode_workers,
     )
+    log.info(
+        "Запис у ChromaDB: %.1fс | загалом %.0f чанків/с",
+        finished - encoded, len(chunks) / max(finished - started, 1e-9),
+    )
+
+
+def build_vector_store(
+    chunks:         list[Document],
+    db_dir:         Path,
+    batch_size:     int = ENCODE_BATCH_SIZE,
+    encode_workers: int = ENCODE_WORKERS,
+) -> Chroma:
+    """
+    Ініціалізує локальну ChromaDB і зберігає вектори.
+    Завжди очищує стару колекцію перед записом — запобігає дублікатам.
+    """
+    db_dir.mkdir(parents=True, exist_ok=True)
+
+    embeddings = _get_embeddings()
 
     # Видаляємо стару колекцію якщо вона є — запобігаємо дублікатам
     try:
@@ -165,12 +370,12 @@ def build_vector_store(chunks: list[Document], db_dir: Path) -> Chroma:
 
     log.info("Збереження %d чанків у ChromaDB: %s", len(chunks), db_dir)
 
-    vector_store = Chroma.from_documents(
-        documents=chunks,
-        embedding=embeddings,
+    vector_store = Chroma(
         collection_name=CHROMA_COLLECTION,
+        embedding_function=embeddings,
         persist_directory=str(db_dir),
     )
+    _upsert(vector_store, chunks, batch_size, encode_workers)
 
     count = vector_store._collection.count()
     log.info("ChromaDB готова. Збережено векторів: %d", count)
@@ -178,6 +383,66 @@ def build_vector_store(chunks: list[Document], db_dir: Path) -> Chroma:
     return vector_store
 
 
+def update_vector_store(
+    chunks:         list[Document],
+    delete_ids:     list[str],
+    db_dir:         Path,
+    batch_size:     int = ENCODE_BATCH_SIZE,
+    encode_workers: int = ENCODE_WORKERS,
+) -> Chroma:
+    """
+    Інкрементально оновлює наявну колекцію: видаляє чанки змінених і
+    видалених файлів, upsert-ить чанки нових/змінених (embeddings
+    рахуються лише для них).
+    """
+    vector_store = Chroma(
+        collection_name=CHROMA_COLLECTION,
+        embedding_function=_get_embeddings(),
+        persist_directory=str(db_dir),
+    )
+
+    for start in range(0, len(delete_ids), UPSERT_BATCH):
+        vector_store._collection.delete(ids=delete_ids[start:start + UPSERT_BATCH])
+    if delete_ids:
+        log.info("Видалено застарілих чанків: %d", len(delete_ids))
+
+    if chunks:
+        log.info("Upsert %d чанків у ChromaDB: %s", len(chunks), db_dir)
+        _upsert(vector_store, chunks, batch_size, encode_workers)
+
+    count = vector_store._collection.count()
+    log.info("ChromaDB оновлено. Векторів у базі: %d", count)
+
+    return vector_store
+
+
+def read_index_version(db_dir: Path) -> str:
+    """Поточна версія індексу ("" — маркер-файлу ще немає)."""
+    try:
+        return (db_dir / INDEX_VERSION_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return ""
+
+
+def write_index_version(db_dir: Path) -> str:
+    """Записує нову версію індексу → інвалідує кеші, прив'язані до бази."""
+    version = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    (db_dir / INDEX_VERSION_FILE).write_text(version, encoding="utf-8")
+    log.info("Версія індексу: %s", version)
+    return version
+
+
+def write_keyword_index(collection, db_dir: Path, version: str) -> None:
+    """
+    Передобчислює keyword-індекс (постинги, tf, довжини чанків для BM25)
+    для поточної версії індексу — retrieval не перебудовує його при старті.
+    """
+    data  = collection.get(include=["documents"])
+    index = KeywordIndex(data["ids"], data["documents"])
+    index.save(db_dir / KEYWORD_INDEX_FILE, version)
+    log.info("Keyword-індекс збережено: %d чанків, %d токенів", len(index), index.vocabulary_size)
+
+
 def verify_store(vector_store: Chroma) -> None:
     """
     Швидка перевірка: виконує один тестовий запит до бази
@@ -206,22 +471,102 @@ def verify_store(vector_store: Chroma) -> None:
 # Точка входу
 # ─────────────────────────────────────────────────────────────────
 
-def run_ingestion(pdf_dir: Path, db_dir: Path) -> None:
-    """Головний пайплайн інгестії."""
+def _files_manifest(chunks: list[Document], hashes: dict[str, str]) -> dict:
+    """Будує записи маніфесту {файл: {sha256, chunks}} для завантажених файлів."""
+    files = {
+        name: {"sha256": hashes[name], "chunks": []}
+        for name in {c.metadata["source"] for c in chunks}
+    }
+    for c in chunks:
+        files[c.metadata["source"]]["chunks"].append(chunk_id(c))
+    return files
+
+
+def run_ingestion(
+    pdf_dir:        Path,
+    db_dir:         Path,
+    full:           bool = False,
+    workers:        int  = DEFAULT_WORKERS,
+    batch_size:     int  = ENCODE_BATCH_SIZE,
+    encode_workers: int  = ENCODE_WORKERS,
+    vector_backend: str  = VECTOR_BACKEND,
+) -> None:
+    """
+    Головний пайплайн інгестії (інкрементальний, якщо є сумісний маніфест).
+    ChromaDB — джерело правди; для vector_backend="numpy" після оновлення
+    колекції експортується знімок для точного NumPy-пошуку.
+    """
     log.info("=" * 50)
     log.info("🚀  FinRAG Ingestion Pipeline — старт")
     log.info("   PDF:    %s", pdf_dir)
     log.info("   DB:     %s", db_dir)
     log.info("=" * 50)
 
-    # Крок 1: Завантажити PDF
-    docs = load_pdfs(pdf_dir)
+    pdf_files = find_pdfs(pdf_dir)
+    hashes    = {p.name: file_sha256(p) for p in pdf_files}
+    manifest  = load_manifest(db_dir)
 
-    # Крок 2: Розбити на чанки
-    chunks = split_documents(docs)
+    if full or not _manifest_compatible(manifest):
+        log.info("Режим: повна перебудова")
 
-    # Крок 3: Зберегти у ChromaDB
-    vector_store = build_vector_store(chunks, db_dir)
+        # Крок 1: Завантажити PDF
+        docs = load_pdfs(pdf_dir, pdf_files, workers=workers)
+
+        # Крок 2: Розбити на чанки
+        chunks = split_documents(docs)
+
+        # Крок 3: Зберегти у ChromaDB
+        vector_store = build_vector_store(chunks, db_dir, batch_size, encode_workers)
+        files = _files_manifest(chunks, hashes)
+
+    else:
+        files   = dict(manifest["files"])
+        changed = [p for p in pdf_files if files.get(p.name, {}).get("sha256") != hashes[p.name]]
+        removed = [name for name in files if name not in hashes]
+
+        log.info(
+            "Режим: інкрементальний | нових/змінених: %d, видалених: %d, без змін: %d",
+            len(changed), len(removed), len(pdf_files) - len(changed),
+        )
+
+        if not changed and not removed:
+            log.info("Змін немає — індекс актуальний")
+            version = read_index_version(db_dir)
+            fresh   = not version
+            if fresh:
+                version = write_index_version(db_dir)
+            needs_numpy   = vector_backend == "numpy" and numpy_index_version(db_dir / NUMPY_SUBDIR) != version
+            needs_keyword = fresh or not (db_dir / KEYWORD_INDEX_FILE).exists()
+            if needs_numpy or needs_keyword:
+                store = Chroma(collection_name=CHROMA_COLLECTION, persist_directory=str(db_dir))
+                if needs_numpy:
+                    export_numpy_index(store._collection, db_dir, version)
+                if needs_keyword:
+                    write_keyword_index(store._collection, db_dir, version)
+            return
+
+        delete_ids = [
+            cid
+            for name in [*removed, *(p.name for p in changed)]
+            for cid in files.pop(name, {}).get("chunks", [])
+        ]
+
+        # Крок 1–2: Завантажити та розбити лише змінені PDF
+        docs   = load_pdfs(pdf_dir, changed, workers=workers) if changed else []
+        chunks = split_documents(docs) if docs else []
+
+        # Крок 3: Оновити ChromaDB
+        vector_store = update_vector_store(chunks, delete_ids, db_dir, batch_size, encode_workers)
+        files.update(_files_manifest(chunks, hashes))
+
+    version = write_index_version(db_dir)
+    if vector_backend == "numpy":
+        export_numpy_index(vector_store._collection, db_dir, version)
+
+    # Файли, що не вдалося розпарсити, не потрапляють у маніфест →
+    # наступний запуск спробує їх знову
+    save_manifest(db_dir, files)
+    write_keyword_index(vector_store._collection, db_dir, version)
 
     # Крок 4: Верифікація
     verify_store(vector_store)
@@ -248,5 +593,42 @@ if __name__ == "__main__":
         default=DEFAULT_DB_DIR,
         help=f"Директорія для ChromaDB (за замовч.: {DEFAULT_DB_DIR})",
     )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Повна перебудова колекції замість інкрементального оновлення",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Кількість процесів для парсингу PDF (за замовч.: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--encode_workers",
+        type=int,
+        default=ENCODE_WORKERS,
+        help=f"Кількість процесів embedding-енкодера (за замовч.: {ENCODE_WORKERS})",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=ENCODE_BATCH_SIZE,
+        help=f"Розмір батчу embedding-моделі (за замовч.: {ENCODE_BATCH_SIZE})",
+    )
+    parser.add_argument(
+        "--vector_backend",
+        choices=VECTOR_BACKENDS,
+        default=VECTOR_BACKEND,
+        help=f"Backend пошуку: numpy — додатково експортувати знімок (за замовч.: {VECTOR_BACKEND})",
+    )
     args = parser.parse_args()
-    run_ingestion(args.pdf_dir, args.db_dir)
+    run_ingestion(
+        args.pdf_dir,
+        args.db_dir,
+        full=args.full,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        encode_workers=args.encode_workers,
+        vector_backend=args.vector_backend,
+    )
@@ -0,0 +1,173 @@
+"""
+src/keyword_index.py
+─────────────────────────────────────────────────────────────────
+Інвертований індекс для Keyword Scan: token → (позиція чанку, tf).
+
+Замість вивантаження всієї колекції ChromaDB на кожен запит індекс
+будується один раз — при інгестії (src.ingest зберігає його разом зі
+статистиками BM25 у <db_dir>/keyword_index.json) або, якщо файлу
+немає чи він застарів, при першому відкритті бази.
+
+Збіг — за префіксом: keyword знаходить токени словника, що з нього
+починаються ("комісі" → "комісія", "комісії", ...), включно з точним
+збігом. Словник тримається відсортованим, тож пошук — bisect до
+першого кандидата і прохід лише по збігах: O(log |V| + збігів) замість
+перебору всього словника на кожне ключове слово.
+
+Ранжування — Okapi BM25: keyword = один терм запиту, його tf у чанку —
+сума tf усіх токенів словника з цим префіксом, df — кількість чанків
+з хоча б одним таким токеном.
+─────────────────────────────────────────────────────────────────
+"""
+
+import json
+import math
+import os
+import re
+from bisect import bisect_left
+from collections import Counter
+from pathlib import Path
+
+# Алфавіт має збігатися з регуляркою ключових слів у retrieval.py
+_TOKEN_RE = re.compile(r"[а-яіїєґ]+")
+
+# Ключові слова запиту мають 4+ літер → коротші токени ніколи не збігаються
+MIN_TOKEN_LEN = 4
+
+# Параметри BM25 (класичні значення Okapi)
+BM25_K1 = 1.5
+BM25_B  = 0.75
+
+# Файл з передобчисленим індексом у теці ChromaDB
+KEYWORD_INDEX_FILE = "keyword_index.json"
+
+
+def token_counts(text: str) -> Counter:
+    """Частоти токенів чанку (нижній регістр, 4+ літер)."""
+    return Counter(
+        tok for tok in _TOKEN_RE.findall(text.lower())
+        if len(tok) >= MIN_TOKEN_LEN
+    )
+
+
+def tokenize(text: str) -> set[str]:
+    """Повертає множину унікальних токенів чанку (нижній регістр, 4+ літер)."""
+    return set(token_counts(text))
+
+
+class KeywordIndex:
+    """
+    Постинг-індекс чанків колекції зі статистиками BM25.
+
+    Зберігає лише id чанків у порядку колекції — текст і метадані
+    дочитуються з бази тільки для тих чанків, що повертаються.
+    """
+
+    def __init__(self, ids: list[str], texts: list[str] | None = None):
+        self.ids = list(ids)
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._lengths:  list[int] = []
+        for pos, text in enumerate(texts or []):
+            counts = token_counts(text)
+            self._lengths.append(sum(counts.values()))
+            for tok, tf in counts.items():
+                self._postings.setdefault(tok, []).append((pos, tf))
+        self._finalize()
+
+    def _finalize(self) -> None:
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        self._vocabulary = sorted(self._postings)      # для bisect у _matching_tokens
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._postings)
+
+    # ── Збереження / завантаження ────────────────────────────────
+
+    def save(self, path: Path, version: str) -> None:
+        """Атомарно зберігає індекс, прив'язаний до версії індексу бази."""
+        payload = {
+            "version":  version,
+            "ids":      self.ids,
+            "lengths":  self._lengths,
+            "postings": self._postings,
+        }
+        tmp = Path(f"{path}.tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: Path, version: str) -> "KeywordIndex | None":
+        """Завантажує індекс; None — якщо файлу немає або він для іншої версії."""
+        try:
+            payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if not version or payload.get("version") != version:
+            return None
+
+        index = cls(payload["ids"])
+        index._lengths  = payload["lengths"]
+        index._postings = {
+            tok: [(pos, tf) for pos, tf in plist]
+            for tok, plist in payload["postings"].items()
+        }
+        index._finalize()
+        return index
+
+    # ── Пошук ────────────────────────────────────────────────────
+
+    def _matching_tokens(self, keyword: str) -> list[str]:
+        """Токени словника, що дорівнюють keyword або починаються з нього."""
+        vocabulary = self._vocabulary
+        tokens: list[str] = []
+        # Токени з префіксом keyword ідуть у відсортованому словнику суцільно
+        for i in range(bisect_left(vocabulary, keyword), len(vocabulary)):
+            if not vocabulary[i].startswith(keyword):
+                break
+            tokens.append(vocabulary[i])
+        return tokens
+
+    def _term_frequencies(self, keyword: str) -> dict[int, int]:
+        """позиція чанку → сумарний tf токенів з префіксом keyword."""
+        tf: dict[int, int] = {}
+        for tok in self._matching_tokens(keyword):
+            for pos, count in self._postings[tok]:
+                tf[pos] = tf.get(pos, 0) + count
+        return tf
+
+    def lookup(self, keywords: list[str]) -> list[str]:
+        """
+        Повертає id чанків, що містять хоча б одне ключове слово,
+        у порядку колекції (як і старий повний перебір).
+        """
+        positions: set[int] = set()
+        for kw in keywords:
+            for tok in self._matching_tokens(kw):
+                positions.update(pos for pos, _ in self._postings[tok])
+        return [self.ids[pos] for pos in sorted(positions)]
+
+    def search(self, keywords: list[str], limit: int) -> list[tuple[str, float]]:
+        """
+        Top-limit чанків за BM25: [(id, score)] за спаданням score;
+        рівні — у порядку колекції.
+        """
+        n_docs = len(self.ids)
+        if not n_docs:
+            return []
+
+        scores: dict[int, float] = {}
+        for kw in dict.fromkeys(keywords):
+            tf = self._term_frequencies(kw)
+            if not tf:
+                continue
+            idf = math.log(1 + (n_docs - len(tf) + 0.5) / (len(tf) + 0.5))
+            for pos, freq in tf.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[pos] / (self._avg_length or 1))
+                scores[pos] = scores.get(pos, 0.0) + idf * freq * (BM25_K1 + 1) / (freq + norm)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(self.ids[pos], score) for pos, score in ranked]
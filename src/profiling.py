@@ -0,0 +1,353 @@
+"""
+src/profiling.py
+─────────────────────────────────────────────────────────────────
+Опційне профілювання запитів та лог повільних запитів.
+
+Вмикається змінною FINRAG_PROFILE (за замовчуванням вимкнено —
+декоратор @profiled тоді повертає функцію без змін):
+
+  • sample   — один семплер стеків на процес (sys._current_frames кожні
+               PROFILE_INTERVAL_S), що розносить стеки по запитах за
+               thread id. Дешевий, тож працює на кожному запиті: профіль
+               є і для випадкової частки, і для будь-якого повільного
+               запиту. Бачить потік запиту та задачі пулу retrieval,
+               передані через carry (ChromaDB, keyword scan), але не
+               чужі паралельні запити.
+  • cprofile — детермінований cProfile лише для випадкової частки
+               запитів; бачить тільки потік, що викликав функцію.
+               Повільні запити поза вибіркою потрапляють у лог без профілю.
+
+Стрімінг (ask_bot_stream) профілюється лише поки генератор працює:
+між next() профайлер на паузі, тож час рендеру в UI не потрапляє
+у профіль, а покинутий генератор не лишає потік "зайнятим".
+
+Запит профілюється з імовірністю FINRAG_PROFILE_SAMPLE або якщо він
+повільніший за FINRAG_PROFILE_SLOW_MS. Для кожного такого запиту у
+FINRAG_PROFILE_DIR пишеться JSON: запит, k, id чанків, timings етапів,
+причина та профіль (згорнуті стеки → flamegraph.pl / speedscope,
+для cProfile — ще й .prof для snakeviz / pstats). Повільні запити
+додатково дописуються в slow_queries.jsonl.
+─────────────────────────────────────────────────────────────────
+"""
+
+import cProfile
+import functools
+import inspect
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+
+PROFILE_MODES = ("sample", "cprofile")
+
+PROFILE_MODE        = os.getenv("FINRAG_PROFILE", "").strip().lower()          # "" — вимкнено
+PROFILE_SAMPLE_RATE = float(os.getenv("FINRAG_PROFILE_SAMPLE", "0.01"))       # частка запитів
+PROFILE_SLOW_S      = float(os.getenv("FINRAG_PROFILE_SLOW_MS", "2000")) / 1000
+PROFILE_DIR         = Path(os.getenv(
+    "FINRAG_PROFILE_DIR",
+    str(Path(__file__).resolve().parent.parent / "data" / "profiles"),
+))
+PROFILE_INTERVAL_S  = 0.005     # період семплера стеків
+PROFILE_TOP         = 30        # рядків у зведенні "найдорожчі функції"
+
+SLOW_LOG_FILE = "slow_queries.jsonl"
+
+# Верхні кадри простою (порожні пули потоків, очікування подій) — не семплюються
+IDLE_FRAMES = frozenset({"wait", "_worker", "select", "poll", "serve_forever", "_wait_for_tstate_lock"})
+
+log = logging.getLogger(__name__)
+
+if PROFILE_MODE and PROFILE_MODE not in PROFILE_MODES:
+    log.warning("FINRAG_PROFILE=%s не підтримується (%s) — профілювання вимкнено", PROFILE_MODE, PROFILE_MODES)
+    PROFILE_MODE = ""
+
+
+# ─────────────────────────────────────────────────────────────────
+# Профайлери
+# ─────────────────────────────────────────────────────────────────
+
+class StackSampler:
+    """
+    Семплер стеків на процес: один фоновий потік кожні interval секунд
+    знімає стеки потоків, закріплених за запитами (thread id → сесія),
+    і рахує однакові у сесії свого запиту. Поки закріплених потоків
+    немає — спить.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_S):
+        self.interval = interval
+        self._owners: dict[int, "_SampleSession"] = {}
+        self._busy   = threading.Event()
+        self._lock   = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def attach(self, session: "_SampleSession") -> None:
+        """Закріплює поточний потік за сесією (запускає семплер за потреби)."""
+        with self._lock:
+            self._owners[threading.get_ident()] = session
+            self._busy.set()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="finrag-profiler", daemon=True)
+                self._thread.start()
+
+    def detach(self, session: "_SampleSession") -> None:
+        """Відкріплює поточний потік, якщо він належить session."""
+        with self._lock:
+            if self._owners.get(threading.get_ident()) is session:
+                del self._owners[threading.get_ident()]
+            if not self._owners:
+                self._busy.clear()
+
+    def owner(self) -> "_SampleSession | None":
+        """Сесія, за якою закріплено поточний потік."""
+        with self._lock:
+            return self._owners.get(threading.get_ident())
+
+    def _run(self) -> None:
+        while self._busy.wait():
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, session in self._owners.items():
+                    frame = frames.get(thread_id)
+                    if frame is None or frame.f_code.co_name in IDLE_FRAMES:
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+                        frame = frame.f_back
+                    session.stacks[";".join(reversed(stack))] += 1
+                for session in set(self._owners.values()):
+                    session.samples += 1
+
+
+_sampler = StackSampler()
+
+
+class _SampleSession:
+    """Профіль одного запиту у спільному StackSampler."""
+
+    def __init__(self, sampler: StackSampler = _sampler):
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._sampler = sampler
+
+    def resume(self) -> None:
+        self._sampler.attach(self)
+
+    def pause(self) -> None:
+        self._sampler.detach(self)
+
+    def stop(self) -> dict:
+        """Відкріплює потік; повертає згорнуті стеки та найчастіші функції."""
+        self.pause()
+        with self._sampler._lock:
+            stacks, samples = Counter(self.stacks), self.samples
+
+        leaf = Counter()
+        for stack, n in stacks.items():
+            leaf[stack.rsplit(";", 1)[-1]] += n
+        return {
+            "interval_s": self._sampler.interval,
+            "samples":    samples,
+            "top":        [{"frame": f, "samples": n} for f, n in leaf.most_common(PROFILE_TOP)],
+            "collapsed":  dict(stacks.most_common()),
+        }
+
+
+def carry(fn):
+    """
+    Прив'язує fn до сесії семплера поточного запиту: задача пулу потоків
+    (retrieval) на час виконання семплюється як частина цього запиту.
+    Без FINRAG_PROFILE=sample чи поза профільованим запитом — fn як є.
+    """
+    session = _sampler.owner() if PROFILE_MODE == "sample" else None
+    if session is None:
+        return fn
+
+    @functools.wraps(fn)
+    def carried(*args, **kwargs):
+        session.resume()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            session.pause()
+    return carried
+
+
+class _CProfiler:
+    """cProfile з тим самим інтерфейсом resume/pause/stop, що й _SampleSession."""
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def resume(self) -> None:
+        self._profile.enable()
+
+    def pause(self) -> None:
+        self._profile.disable()
+
+    def stop(self) -> dict:
+        self._profile.disable()
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+        return {"stats": self._profile, "top": out.getvalue()}
+
+
+# ─────────────────────────────────────────────────────────────────
+# Запис профілів
+# ─────────────────────────────────────────────────────────────────
+
+def _describe(result) -> tuple[list, dict]:
+    """(docs, timings) з результату retrieve / ask_bot / події "done"."""
+    if isinstance(result, list):
+        return result, {}
+    if isinstance(result, dict):
+        result = result.get("result", result)
+        return result.get("docs") or [], result.get("timings") or {}
+    return [], {}
+
+
+def _write(record: dict, profile: dict | None, slow: bool) -> None:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{record['function']}-{uuid.uuid4().hex[:8]}"
+
+    if profile and "stats" in profile:
+        profile = dict(profile)
+        profile["stats"].dump_stats(PROFILE_DIR / f"{name}.prof")
+        profile["stats"] = f"{name}.prof"
+
+    path = PROFILE_DIR / f"{name}.json"
+    path.write_text(
+        json.dumps({**record, "profile": profile}, ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+    if slow:
+        with open(PROFILE_DIR / SLOW_LOG_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**record, "profile_file": path.name if profile else None}, ensure_ascii=False) + "\n")
+    log.info("Профіль %s (%s, %.0f мс): %s", record["function"], record["reason"], record["elapsed_s"] * 1000, path)
+
+
+def _finish(name: str, bound: inspect.BoundArguments, result, profiler, sampled: bool, started: float) -> None:
+    elapsed = time.perf_counter() - started
+    profile = profiler.stop() if profiler else None
+    slow    = elapsed >= PROFILE_SLOW_S
+    if not (sampled or slow):
+        return
+
+    docs, timings = _describe(result)
+    if not timings:
+        timings = bound.arguments.get("timings") or {}
+    record = {
+        "function":  name,
+        "reason":    "slow" if slow else "sampled",
+        "mode":      PROFILE_MODE,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "elapsed_s": elapsed,
+        "query":     bound.arguments.get("query"),
+        "k":         bound.arguments.get("k"),
+        "chunk_ids": [getattr(d, "id", None) for d in docs],
+        "timings":   timings,
+    }
+    try:
+        _write(record, profile, slow)
+    except OSError as e:
+        log.warning("Не вдалося записати профіль у %s: %s", PROFILE_DIR, e)
+
+
+# ─────────────────────────────────────────────────────────────────
+# Декоратор
+# ─────────────────────────────────────────────────────────────────
+
+_active = threading.local()     # вкладені виклики (ask_bot → retrieve) не профілюються окремо
+
+
+def _begin() -> tuple[bool, object | None]:
+    """Вирішує, чи запит у вибірці, і створює профайлер (ще на паузі)."""
+    sampled = random.random() < PROFILE_SAMPLE_RATE
+    if PROFILE_MODE == "sample":
+        profiler = _SampleSession()
+    elif sampled:
+        profiler = _CProfiler()
+    else:
+        profiler = None
+    return sampled, profiler
+
+
+def profiled(fn):
+    """
+    Обгортає retrieve / ask_bot / ask_bot_stream профілюванням за
+    FINRAG_PROFILE. Якщо профілювання вимкнене — повертає fn як є.
+    """
+    if not PROFILE_MODE:
+        return fn
+
+    signature = inspect.signature(fn)
+    name      = fn.__name__
+
+    def bind(args, kwargs) -> inspect.BoundArguments:
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        # retrieve заповнює timings лише якщо передано dict
+        if "timings" in bound.arguments and bound.arguments["timings"] is None:
+            bound.arguments["timings"] = {}
+        return bound
+
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def gen_wrapper(*args, **kwargs):
+            if getattr(_active, "depth", 0):
+                yield from fn(*args, **kwargs)
+                return
+            bound = bind(args, kwargs)
+            sampled, profiler = _begin()
+            started, last = time.perf_counter(), None
+            gen = fn(*bound.args, **bound.kwargs)
+            try:
+                while True:
+                    # Глибина та профайлер активні лише всередині next():
+                    # між подіями потік належить споживачу генератора
+                    _active.depth = 1
+                    if profiler:
+                        profiler.resume()
+                    try:
+                        last = next(gen)
+                    except StopIteration:
+                        return
+                    finally:
+                        _active.depth = 0
+                        if profiler:
+                            profiler.pause()
+                    yield last
+            finally:
+                gen.close()
+                _finish(name, bound, last, profiler, sampled, started)
+        return gen_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if getattr(_active, "depth", 0):
+            return fn(*args, **kwargs)
+        bound = bind(args, kwargs)
+        sampled, profiler = _begin()
+        started, result = time.perf_counter(), None
+        _active.depth = 1
+        if profiler:
+            profiler.resume()
+        try:
+            result = fn(*bound.args, **bound.kwargs)
+            return result
+        finally:
+            _active.depth = 0
+            _finish(name, bound, result, profiler, sampled, started)
+
+    return wrapper
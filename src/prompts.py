@@ -5,11 +5,29 @@ System Prompt та шаблони запитів для FinRAG.
 
 Основна мета — суворо обмежити модель відповідати лише на основі
 наданого контексту (антигалюцинаційна стратегія).
+
+Контекст пакується в бюджет токенів (FINRAG_CONTEXT_TOKENS): сусідні
+чанки однієї сторінки зливаються в один фрагмент без 200-символьного
+перекриття, фрагменти додаються в порядку рангу, поки є бюджет.
 ─────────────────────────────────────────────────────────────────
 """
 
+import hashlib
+import logging
+import math
+import os
+from functools import lru_cache
+
 from langchain_core.prompts import ChatPromptTemplate
 
+# Бюджет токенів контексту (розмір промпту → латентність і ліміти Groq)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("FINRAG_CONTEXT_TOKENS", "3000"))
+
+# Оцінка без токенізатора: ~3 символи на токен для українського тексту
+CHARS_PER_TOKEN = 3.0
+
+log = logging.getLogger(__name__)
+
 # ─────────────────────────────────────────────────────────────────
 # Системний промпт — ядро надійності FinRAG
 # ─────────────────────────────────────────────────────────────────
@@ -51,25 +69,161 @@ RAG_PROMPT = ChatPromptTemplate.from_messages([
     ("human",  HUMAN_PROMPT),
 ])
 
+# Версія промпту — змінюється при будь-якій правці шаблонів вище;
+# записи кешу відповідей LLM старих версій чистить `python -m src.cache --prune`
+PROMPT_VERSION = hashlib.sha1(f"{SYSTEM_PROMPT}\x00{HUMAN_PROMPT}".encode("utf-8")).hexdigest()[:12]
+
+
+def render_prompt(question: str, context: str) -> str:
+    """Повний текст промпту (system + human) — так, як його побачить LLM."""
+    messages = RAG_PROMPT.format_messages(question=question, context=context)
+    return "\n\n".join(f"{m.type}: {m.content}" for m in messages)
+
+# ─────────────────────────────────────────────────────────────────
+# Підрахунок токенів
+# ─────────────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """tiktoken cl100k (якщо встановлено) — близький до BPE Llama 3; інакше None."""
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        log.info("tiktoken недоступний (%s) — токени оцінюються за кількістю символів", e)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Кількість токенів тексту (точна з tiktoken, інакше — оцінка)."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
 # ─────────────────────────────────────────────────────────────────
 # Шаблон для форматування одного чанку в контексті
 # Зберігає прив'язку до сторінки — важливо для цитування джерел
 # ─────────────────────────────────────────────────────────────────
 
-def format_context(docs: list) -> str:
+def _fragment(i: int, source: str, page, text: str) -> str:
+    return f"[Фрагмент {i} | Джерело: {source}, стор. {page}]\n{text.strip()}"
+
+
+def _merge_spans(docs: list) -> list[dict]:
+    """
+    Зливає чанки однієї сторінки, що перекриваються або стикуються
+    (за metadata["start_index"]), в один span без повтору перекриття.
+    Порядок span-ів — за першою появою (рангом) їхніх чанків.
+    """
+    spans: list[dict] = []
+    for doc in docs:
+        meta  = doc.metadata
+        start = meta.get("start_index")
+        span  = {
+            "source": meta.get("source", "невідомий документ"),
+            "page":   meta.get("page", "?"),
+            "start":  start,
+            "text":   doc.page_content,
+            "chunks": 1,
+            "docs":   [doc],
+        }
+        if start is None:
+            spans.append(span)
+            continue
+
+        # Новий span може з'єднати кілька вже наявних — зливаємо до стабільності
+        merged = True
+        while merged:
+            merged = False
+            for other in spans:
+                if (
+                    other is span
+                    or other["start"] is None
+                    or (other["source"], other["page"]) != (span["source"], span["page"])
+                    or other["start"] > span["start"] + len(span["text"])
+                    or span["start"] > other["start"] + len(other["text"])
+                ):
+                    continue
+                first, second = sorted((other, span), key=lambda s: s["start"])
+                tail = first["start"] + len(first["text"]) - second["start"]
+                other["text"]   = first["text"] + second["text"][tail:]
+                other["start"]  = first["start"]
+                other["chunks"] += span["chunks"]
+                other["docs"]   += span["docs"]
+                spans = [s for s in spans if s is not span]
+                span, merged = other, True
+                break
+        if not any(s is span for s in spans):
+            spans.append(span)
+    return spans
+
+
+def pack_context(docs: list, token_budget: int = CONTEXT_TOKEN_BUDGET) -> dict:
+    """
+    Пакує чанки в контекст промпту в межах бюджету токенів.
+
+    Returns:
+        dict із ключами:
+          - "context"        (str):  Рядок-контекст для вставки у промпт
+          - "docs"           (list): Чанки, що реально потрапили в контекст
+                                     (у порядку ранжування) — джерела будуються з них
+          - "tokens"         (int):  Токенів у контексті
+          - "tokens_saved"   (int):  Економія злиття сусідніх чанків: токени тих
+                                     самих чанків, вставлених цілком, мінус "tokens"
+          - "fragments"      (int):  Фрагментів (злитих спанів) у контексті
+          - "dropped"        (int):  Фрагментів, що не влізли в бюджет
+          - "dropped_tokens" (int):  Токенів у відкинутих фрагментах
+    """
+    parts: list[str] = []
+    kept    = set()
+    used    = 0
+    dropped = 0
+    dropped_tokens = 0
+    for span in _merge_spans(docs):
+        part   = _fragment(len(parts) + 1, span["source"], span["page"], span["text"])
+        tokens = count_tokens(part)
+        # Найрелевантніший фрагмент потрапляє завжди, решта — поки є бюджет
+        if parts and used + tokens > token_budget:
+            dropped += 1
+            dropped_tokens += tokens
+            continue
+        parts.append(part)
+        kept.update(id(doc) for doc in span["docs"])
+        used += tokens
+
+    kept_docs = [doc for doc in docs if id(doc) in kept]
+    context   = "\n\n" + "\n\n".join(parts) + "\n"
+    naive     = format_context(kept_docs, token_budget=None)
+    tokens    = count_tokens(context)
+    return {
+        "context":        context,
+        "docs":           kept_docs,
+        "tokens":         tokens,
+        "tokens_saved":   max(0, count_tokens(naive) - tokens),
+        "fragments":      len(parts),
+        "dropped":        dropped,
+        "dropped_tokens": dropped_tokens,
+    }
+
+
+def format_context(docs: list, token_budget: int | None = CONTEXT_TOKEN_BUDGET) -> str:
     """
     Перетворює список LangChain Document-об'єктів
     на єдиний рядок-контекст для вставки у промпт.
 
     Кожен чанк маркується джерелом і сторінкою —
     щоб модель неявно "бачила" звідки інформація.
+    token_budget=None — без пакування (кожен чанк цілком).
     """
+    if token_budget is not None:
+        return pack_context(docs, token_budget)["context"]
+
     parts = []
     for i, doc in enumerate(docs, 1):
         source = doc.metadata.get("source", "невідомий документ")
         page   = doc.metadata.get("page", "?")
-        parts.append(
-            f"[Фрагмент {i} | Джерело: {source}, стор. {page}]\n"
-            f"{doc.page_content.strip()}"
-        )
+        parts.append(_fragment(i, source, page, doc.page_content))
     return "\n\n" + "\n\n".join(parts) + "\n"
@@ -0,0 +1,380 @@
+"""
+src/ratelimit.py
+─────────────────────────────────────────────────────────────────
+Клієнтський планувальник викликів Groq з урахуванням rate limit.
+
+Groq обмежує запити за хвилину (RPM) і токени за хвилину (TPM).
+Замість того щоб ловити 429 і одразу показувати користувачу
+"зачекайте хвилину", RateLimitedChatGroq:
+
+  1. резервує місце у двох ковзних вікнах (RPM і TPM за оцінкою
+     токенів промпту + COMPLETION_TOKENS_ESTIMATE) — як рахує Groq:
+     за будь-які 60 с не більше ліміту, без "повного відра" на старті;
+     якщо бюджет вичерпано — чекає в черзі, сплески розтягуються в часі;
+  2. після відповіді звіряє оцінку з фактичним usage;
+  3. на 429 ставить на паузу весь процес на retry-after (або
+     експоненційний backoff з jitter) і повторює до MAX_RETRIES разів;
+     5xx / обрив з'єднання — лише backoff цього запиту. Резерв невдалої
+     спроби повертається у бюджет, тож повтори не з'їдають його вдруге.
+
+Час у черзі (разом з паузами перед повторами) повертається у
+response_metadata["queue_s"] відповіді → timings["llm_queue"].
+Якщо очікування перевищило б MAX_QUEUE_S — RateLimitQueueTimeout
+(класифікується як RATE_LIMIT_EXCEEDED).
+
+Офлайн-перевірка з фейковим сервером, що віддає 429:
+    python -m bench.fake_groq --burst 40
+    python -m bench.fake_groq --check     # ненульовий код, якщо були 429
+─────────────────────────────────────────────────────────────────
+"""
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+import groq
+from langchain_groq import ChatGroq
+
+from src.prompts import count_tokens
+
+# Ліміти акаунта Groq (free tier для llama-3.3-70b-versatile: 30 RPM, 12K TPM)
+GROQ_RPM = int(os.getenv("FINRAG_GROQ_RPM", "30"))
+GROQ_TPM = int(os.getenv("FINRAG_GROQ_TPM", "12000"))
+
+COMPLETION_TOKENS_ESTIMATE = 256      # резерв на відповідь до звірки з usage
+MAX_RETRIES    = 4
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S  = 30.0
+MAX_QUEUE_S    = float(os.getenv("FINRAG_GROQ_MAX_QUEUE_S", "60"))
+
+# Помилки, після яких запит повторюється (429 — ще й пауза для всіх)
+RETRYABLE_ERRORS = (groq.RateLimitError, groq.InternalServerError, groq.APIConnectionError)
+
+log = logging.getLogger(__name__)
+
+
+class RateLimitQueueTimeout(RuntimeError):
+    """Очікування бюджету Groq довше за MAX_QUEUE_S."""
+
+
+class SlidingWindow:
+    """
+    Ковзне вікно: сума одиниць у будь-яких window_s секундах не більша
+    за limit (так рахує Groq). Резерв у майбутньому — черга: старт стає,
+    коли з вікна випаде достатньо старих резервів.
+
+    Старт резерву — оцінка моменту, коли сервер зарахує запит. Вона
+    уточнюється: touch — Groq точно отримав запит (відповідь чи перший
+    фрагмент), recheck — перед відправкою після очікування в черзі.
+    """
+
+    def __init__(self, limit: float, window_s: float = 60.0):
+        self.limit    = float(limit)
+        self.window_s = window_s
+        self._log: list[list[float]] = []       # [старт, одиниці]
+
+    def _earliest(self, amount: float, now: float) -> float:
+        """Найраніший старт ≥ now, при якому вікно, що на ньому закінчується, вміщує amount."""
+        self._log = [e for e in self._log if e[0] > now - self.window_s]
+        amount    = min(amount, self.limit)
+        candidates = sorted({now, *(t + self.window_s for t, _ in self._log if t + self.window_s > now)})
+        for start in candidates:
+            used = sum(units for t, units in self._log if start - self.window_s < t <= start)
+            if used + amount <= self.limit:
+                return start
+        return candidates[-1]
+
+    def reserve(self, amount: float, now: float) -> list[float]:
+        """Резервує amount; повертає запис [старт, amount] (старт ≥ now)."""
+        entry = [self._earliest(amount, now), amount]
+        self._log.append(entry)
+        return entry
+
+    def recheck(self, entry: list[float], now: float) -> None:
+        """Перераховує старт резерву з урахуванням уточнених стартів інших."""
+        self.refund(entry)
+        entry[0] = self._earliest(entry[1], now)
+        self._log.append(entry)
+
+    def touch(self, entry: list[float], now: float) -> None:
+        """Сервер уже отримав запит: старт резерву — не раніше now."""
+        entry[0] = max(entry[0], now)
+
+    def refund(self, entry: list[float]) -> None:
+        """Скасовує резерв (невдала спроба, перевищення ліміту черги)."""
+        self._log = [e for e in self._log if e is not entry]
+
+
+class RateLimiter:
+    """RPM + TPM бюджети процесу та спільна пауза після 429 (потокобезпечний)."""
+
+    def __init__(self, rpm: int, tpm: int, max_queue_s: float = MAX_QUEUE_S, window_s: float = 60.0):
+        self.requests    = SlidingWindow(rpm, window_s)
+        self.tokens      = SlidingWindow(tpm, window_s)
+        self.max_queue_s = max_queue_s
+        self.paused_until = 0.0
+        self.queued   = 0        # запитів, що чекали
+        self.queued_s = 0.0
+        self.retries  = 0
+        self._lock    = threading.Lock()
+
+    def _reserve(self, tokens: int) -> tuple[float, tuple]:
+        with self._lock:
+            now    = time.monotonic()
+            ticket = (self.requests.reserve(1, now), self.tokens.reserve(tokens, now))
+            wait   = max(ticket[0][0] - now, ticket[1][0] - now, self.paused_until - now, 0.0)
+            if wait > self.max_queue_s:
+                self._refund(ticket)
+                raise RateLimitQueueTimeout(
+                    f"Groq rate limit: очікування {wait:.0f}с довше за {self.max_queue_s:.0f}с"
+                )
+            if wait > 0:
+                self.queued   += 1
+                self.queued_s += wait
+            return wait, ticket
+
+    def _refund(self, ticket: tuple) -> None:
+        self.requests.refund(ticket[0])
+        self.tokens.refund(ticket[1])
+
+    def _recheck(self, ticket: tuple) -> float:
+        """Після очікування: скільки ще чекати з урахуванням уточнених стартів."""
+        with self._lock:
+            now = time.monotonic()
+            self.requests.recheck(ticket[0], now)
+            self.tokens.recheck(ticket[1], now)
+            return max(ticket[0][0] - now, ticket[1][0] - now, self.paused_until - now, 0.0)
+
+    def acquire(self, tokens: int) -> tuple[float, tuple]:
+        """Чекає своєї черги; повертає (час очікування, с; квиток резерву)."""
+        started = time.monotonic()
+        wait, ticket = self._reserve(tokens)
+        while wait > 0:
+            time.sleep(wait)
+            wait = self._recheck(ticket)
+        return time.monotonic() - started, ticket
+
+    async def aacquire(self, tokens: int) -> tuple[float, tuple]:
+        started = time.monotonic()
+        wait, ticket = self._reserve(tokens)
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self._recheck(ticket)
+        return time.monotonic() - started, ticket
+
+    def refund(self, ticket: tuple) -> None:
+        """Повертає резерв спроби, що не вдалася (429, 5xx, обрив)."""
+        with self._lock:
+            self._refund(ticket)
+
+    def received(self, ticket: tuple) -> None:
+        """
+        Groq точно отримав запит (є відповідь чи перший фрагмент).
+        Сервер рахує вікно від моменту отримання, а не від нашого
+        запланованого старту, тож старт резерву зсувається на зараз —
+        інакше мережева затримка дає 429 на межі вікна.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.requests.touch(ticket[0], now)
+            self.tokens.touch(ticket[1], now)
+
+    def settle(self, ticket: tuple, actual: int | None) -> None:
+        """Замінює зарезервовану оцінку токенів фактичним usage."""
+        if actual is None:
+            return
+        with self._lock:
+            ticket[1][1] = actual
+
+    def backoff(self, exc: Exception, attempt: int) -> float:
+        """
+        Пауза перед повтором: retry-after з відповіді (+ jitter) або
+        експоненційний backoff з full jitter. Після 429 пауза спільна —
+        нові запити процесу теж чекають, а не б'ються об ліміт.
+
+        Jitter не виводить паузу за max_queue_s: інакше retry-after, що
+        вкладається в ліміт черги, одразу давав би RateLimitQueueTimeout
+        у наступному acquire. Довший за ліміт retry-after — так і має.
+        """
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            jitter = min(BACKOFF_BASE_S, max(0.0, self.max_queue_s - retry_after))
+            delay  = retry_after + random.uniform(0, jitter)
+        else:
+            delay = random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt))
+
+        with self._lock:
+            self.retries += 1
+            if isinstance(exc, groq.RateLimitError):
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        log.info("Groq: %s, повтор %d через %.1fс", type(exc).__name__, attempt + 1, delay)
+        return delay
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"queued": self.queued, "queued_s": self.queued_s, "retries": self.retries}
+
+
+def _retry_after(exc: Exception) -> float | None:
+    """Секунди з заголовків retry-after-ms / retry-after (None — немає)."""
+    response = getattr(exc, "response", None)
+    headers  = getattr(response, "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+@lru_cache(maxsize=1)
+def get_limiter() -> RateLimiter:
+    """Singleton бюджетів Groq на процес."""
+    return RateLimiter(GROQ_RPM, GROQ_TPM)
+
+
+# ─────────────────────────────────────────────────────────────────
+# ChatGroq з чергою та повторами
+# ─────────────────────────────────────────────────────────────────
+
+def _estimate_tokens(messages: list, max_tokens: int | None) -> int:
+    prompt = sum(count_tokens(str(m.content)) for m in messages)
+    return prompt + min(max_tokens or COMPLETION_TOKENS_ESTIMATE, COMPLETION_TOKENS_ESTIMATE)
+
+
+def _give_up(exc: Exception, attempt: int) -> bool:
+    if attempt >= MAX_RETRIES:
+        log.warning("Groq: %s — повтори вичерпано (%d)", type(exc).__name__, MAX_RETRIES)
+        return True
+    return False
+
+
+class RateLimitedChatGroq(ChatGroq):
+    """
+    ChatGroq, що проходить через get_limiter(). Повтори робить сам,
+    тож створювати з max_retries=0 (щоб SDK не повторював 429 повз чергу).
+    """
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        limiter  = get_limiter()
+        estimate = _estimate_tokens(messages, self.max_tokens)
+        queued   = 0.0
+        for attempt in range(MAX_RETRIES + 1):
+            wait, ticket = limiter.acquire(estimate)
+            queued += wait
+            try:
+                result = super()._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except RETRYABLE_ERRORS as exc:
+                limiter.refund(ticket)
+                if _give_up(exc, attempt):
+                    raise
+                delay = limiter.backoff(exc, attempt)
+                if not isinstance(exc, groq.RateLimitError):
+                    time.sleep(delay)
+                    queued += delay
+                continue
+            return _finish_result(result, limiter, ticket, queued)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        limiter  = get_limiter()
+        estimate = _estimate_tokens(messages, self.max_tokens)
+        queued   = 0.0
+        for attempt in range(MAX_RETRIES + 1):
+            wait, ticket = await limiter.aacquire(estimate)
+            queued += wait
+            try:
+                result = await super()._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+            except RETRYABLE_ERRORS as exc:
+                limiter.refund(ticket)
+                if _give_up(exc, attempt):
+                    raise
+                delay = limiter.backoff(exc, attempt)
+                if not isinstance(exc, groq.RateLimitError):
+                    await asyncio.sleep(delay)
+                    queued += delay
+                continue
+            return _finish_result(result, limiter, ticket, queued)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        # Повтор можливий лише доки жоден фрагмент не віддано
+        limiter  = get_limiter()
+        estimate = _estimate_tokens(messages, self.max_tokens)
+        queued   = 0.0
+        for attempt in range(MAX_RETRIES + 1):
+            wait, ticket = limiter.acquire(estimate)
+            queued += wait
+            usage, emitted = None, False
+            try:
+                for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    if not emitted:
+                        limiter.received(ticket)
+                        _mark_queue(chunk.message, queued)
+                        emitted = True
+                    usage = chunk.message.usage_metadata or usage
+                    yield chunk
+            except RETRYABLE_ERRORS as exc:
+                if not emitted:
+                    limiter.refund(ticket)
+                if emitted or _give_up(exc, attempt):
+                    raise
+                delay = limiter.backoff(exc, attempt)
+                if not isinstance(exc, groq.RateLimitError):
+                    time.sleep(delay)
+                    queued += delay
+                continue
+            limiter.settle(ticket, usage and usage.get("total_tokens"))
+            return
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        limiter  = get_limiter()
+        estimate = _estimate_tokens(messages, self.max_tokens)
+        queued   = 0.0
+        for attempt in range(MAX_RETRIES + 1):
+            wait, ticket = await limiter.aacquire(estimate)
+            queued += wait
+            usage, emitted = None, False
+            try:
+                async for chunk in super()._astream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    if not emitted:
+                        limiter.received(ticket)
+                        _mark_queue(chunk.message, queued)
+                        emitted = True
+                    usage = chunk.message.usage_metadata or usage
+                    yield chunk
+            except RETRYABLE_ERRORS as exc:
+                if not emitted:
+                    limiter.refund(ticket)
+                if emitted or _give_up(exc, attempt):
+                    raise
+                delay = limiter.backoff(exc, attempt)
+                if not isinstance(exc, groq.RateLimitError):
+                    await asyncio.sleep(delay)
+                    queued += delay
+                continue
+            limiter.settle(ticket, usage and usage.get("total_tokens"))
+            return
+
+
+def _mark_queue(message, queued: float) -> None:
+    message.response_metadata = {**message.response_metadata, "queue_s": queued}
+
+
+def _finish_result(result, limiter: RateLimiter, ticket: tuple, queued: float):
+    usage = (result.llm_output or {}).get("token_usage") or {}
+    limiter.received(ticket)
+    limiter.settle(ticket, usage.get("total_tokens"))
+    for generation in result.generations:
+        _mark_queue(generation.message, queued)
+    return result
+
+
+def queue_time(message) -> float:
+    """Час у черзі rate limiter-а для відповіді Groq (0 — не чекала)."""
+    return float((getattr(message, "response_metadata", None) or {}).get("queue_s", 0.0))
@@ -0,0 +1,153 @@
+"""
+src/rerank.py
+─────────────────────────────────────────────────────────────────
+Опціональний rerank-етап retrieval (FINRAG_RERANK=1):
+багатомовний cross-encoder оцінює top-N кандидатів (бюджет
+FINRAG_RERANK_CANDIDATES) разом із запитом і лишає найкращі k.
+
+Точніше ранжування дозволяє надсилати в Groq 3–4 чанки замість 8–12 →
+коротший промпт, швидша генерація. Оцінки кешуються за парою
+(запит, id чанку), тож повторні запити не проганяють модель.
+
+Порівняння "k=12 без rerank" vs "k=4 з rerank" (латентність retrieval,
+розмір контексту, з --llm — час генерації Groq):
+    python -m src.rerank --bench
+─────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import logging
+import os
+import time
+from functools import lru_cache
+
+from src.cache import RerankScoreCache, text_hash
+
+RERANK_ENABLED    = os.getenv("FINRAG_RERANK", "0") == "1"
+RERANK_MODEL      = os.getenv("FINRAG_RERANK_MODEL", "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1")
+RERANK_CANDIDATES = int(os.getenv("FINRAG_RERANK_CANDIDATES", "20"))   # бюджет кандидатів N
+RERANK_BATCH_SIZE = 32
+RERANK_MAX_LENGTH = 512     # токенів на пару (запит, чанк)
+RERANK_CACHE_SIZE = 8192
+
+# k, з яким порівнюється rerank (максимум слайдера в app.py)
+BASELINE_K = 12
+RERANK_K   = 4
+
+log = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def _get_cross_encoder():
+    """Завантажує cross-encoder один раз (CPU)."""
+    from sentence_transformers import CrossEncoder
+
+    log.info("Завантаження cross-encoder: %s", RERANK_MODEL)
+    return CrossEncoder(RERANK_MODEL, device="cpu", max_length=RERANK_MAX_LENGTH)
+
+
+@lru_cache(maxsize=1)
+def _get_score_cache() -> RerankScoreCache:
+    """Повертає singleton-кеш оцінок для поточної моделі."""
+    return RerankScoreCache(RERANK_MODEL, max_items=RERANK_CACHE_SIZE)
+
+
+def _chunk_key(doc) -> str:
+    return doc.id or text_hash(doc.page_content)
+
+
+def score(query: str, docs: list) -> list[float]:
+    """Оцінки релевантності (query, чанк); відсутні в кеші — одним батчем."""
+    cache  = _get_score_cache()
+    keys   = [_chunk_key(d) for d in docs]
+    scores = cache.get_many(query, keys)
+
+    missing = [i for i, s in enumerate(scores) if s is None]
+    if missing:
+        fresh = _get_cross_encoder().predict(
+            [(query, docs[i].page_content) for i in missing],
+            batch_size=RERANK_BATCH_SIZE,
+            show_progress_bar=False,
+        )
+        fresh = [float(s) for s in fresh]
+        cache.put_many(query, [keys[i] for i in missing], fresh)
+        for i, s in zip(missing, fresh):
+            scores[i] = s
+    return scores
+
+
+def rerank(query: str, docs: list, k: int) -> list:
+    """
+    Повертає k найкращих кандидатів за оцінкою cross-encoder-а
+    (рівні оцінки — у вихідному порядку кандидатів).
+    """
+    if len(docs) <= 1:
+        return docs[:k]
+
+    started = time.perf_counter()
+    scores  = score(query, docs)
+    order   = sorted(range(len(docs)), key=lambda i: -scores[i])
+    log.debug(
+        "Rerank: %d кандидатів → %d за %.0f мс",
+        len(docs), k, (time.perf_counter() - started) * 1000,
+    )
+    return [docs[i] for i in order[:k]]
+
+
+# ─────────────────────────────────────────────────────────────────
+# Бенчмарк: k=12 без rerank vs k=4 з rerank
+# ─────────────────────────────────────────────────────────────────
+
+def _bench_config(queries: list[str], k: int, use_rerank: bool, llm: bool) -> dict:
+    from src.generator import _build_context, _get_chain
+    from src.retrieval import retrieve
+
+    retrieval_s, llm_s, context_chars = [], [], []
+    for q in queries:
+        t0   = time.perf_counter()
+        docs = retrieve(q, k=k, rerank=use_rerank)
+        retrieval_s.append(time.perf_counter() - t0)
+
+        # Той самий контекст, що піде в Groq: злиття сусідніх чанків і бюджет токенів
+        context, _ = _build_context(docs)
+        context_chars.append(len(context))
+        if llm:
+            t0 = time.perf_counter()
+            _get_chain().invoke({"question": q, "context": context})
+            llm_s.append(time.perf_counter() - t0)
+
+    def mean_ms(values: list[float]) -> float | None:
+        return sum(values) / len(values) * 1000 if values else None
+
+    return {
+        "config":        f"k={k}" + (" + rerank" if use_rerank else ""),
+        "retrieval_ms":  mean_ms(retrieval_s),
+        "context_chars": sum(context_chars) / len(context_chars),
+        "llm_ms":        mean_ms(llm_s),
+    }
+
+
+def bench(queries: list[str], llm: bool = False) -> list[dict]:
+    """Прогріває обидві конфігурації і міряє по одному проходу кожної."""
+    configs = [(BASELINE_K, False), (RERANK_K, True)]
+    for k, use_rerank in configs:
+        _bench_config(queries[:1], k, use_rerank, llm=False)
+    return [_bench_config(queries, k, use_rerank, llm) for k, use_rerank in configs]
+
+
+if __name__ == "__main__":
+    from src.embeddings import COMPARE_QUERIES
+
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="FinRAG — cross-encoder rerank")
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--llm", action="store_true", help="Міряти також генерацію Groq (потрібен GROQ_API_KEY)")
+    args = parser.parse_args()
+
+    if not args.bench:
+        parser.print_help()
+    else:
+        print(f"\n{'конфігурація':<16} {'retrieval, мс':>14} {'контекст, симв.':>16} {'LLM, мс':>9}")
+        for r in bench(COMPARE_QUERIES, llm=args.llm):
+            llm_ms = f"{r['llm_ms']:>9.0f}" if r["llm_ms"] is not None else f"{'—':>9}"
+            print(f"{r['config']:<16} {r['retrieval_ms']:>14.1f} {r['context_chars']:>16.0f} {llm_ms}")
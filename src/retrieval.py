@@ -5,35 +5,81 @@ Retrieval-модуль: підключення до ChromaDB та пошук р
 чанків за запитом користувача.
 
 Стратегія пошуку (3 шари):
-  1. Semantic search — вектори ChromaDB.
+  1. Semantic search — вектори ChromaDB (або точний NumPy-backend,
+     див. src/vector_backend.py).
   2. Query Expansion — словник фінансових термінів → підзапити.
-  3. Keyword Scan — повний перебір 111 чанків за ключовими словами.
-     Гарантує знаходження точних тарифних рядків ("Зняття 0,9%")
-     навіть при semantic mismatch.
+  3. Keyword Scan — BM25 за ключовими словами через інвертований
+     індекс (src/keyword_index.py). Гарантує знаходження точних
+     тарифних рядків ("Зняття 0,9%") навіть при semantic mismatch.
+
+Ранжування шарів об'єднується reciprocal-rank fusion (FINRAG_FUSION=rrf);
+FINRAG_FUSION=priority — старий мерж "keyword-збіги першими".
+Опційно top-N кандидатів переранжовує cross-encoder (src/rerank.py).
 ─────────────────────────────────────────────────────────────────
 """
 
+import asyncio
 import logging
+import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
 from functools import lru_cache
 from pathlib import Path
+from threading import Lock
 
 from langchain_chroma import Chroma
-from langchain_core.documents import Document
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from src.cache import QueryEmbeddingCache
+from src.embeddings import cache_model_key, load_embeddings
+from src.keyword_index import KEYWORD_INDEX_FILE, KeywordIndex
+from src.profiling import carry, profiled
+from src.rerank import RERANK_CANDIDATES, RERANK_ENABLED, rerank as rerank_docs
+from src.vector_backend import NUMPY_SUBDIR, VECTOR_BACKEND, ChromaBackend, NumpyBackend
+
 # ─────────────────────────────────────────────────────────────────
 # Конфігурація (має збігатися з ingest.py)
 # ─────────────────────────────────────────────────────────────────
 
 PROJECT_ROOT      = Path(__file__).resolve().parent.parent
-DEFAULT_DB_DIR    = PROJECT_ROOT / "data" / "chromadb"
+DEFAULT_DB_DIR    = Path(os.getenv("FINRAG_DB_DIR", PROJECT_ROOT / "data" / "chromadb"))
 EMBEDDING_MODEL   = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
 CHROMA_COLLECTION = "finrag_tariffs"
 
+# Маркер версії індексу — оновлюється ingest.py при кожній перебудові
+INDEX_VERSION_FILE = "index_version"
+
 # Кількість фінальних унікальних чанків що повертаються на запит
 DEFAULT_K = 12
 
+# Кількість кандидатів на кожен підзапит Query Expansion
+EXPANSION_K = 4
+
+# Максимум підзапитів Query Expansion на запит (0 — без expansion)
+EXPANSION_LIMIT = 5
+
+# Keyword Scan можна вимкнути (для оцінки внеску шару, bench/eval.py)
+KEYWORD_SCAN_ENABLED = True
+
+# Об'єднання шарів: rrf (reciprocal-rank fusion) | priority (keyword першими)
+FUSION_MODE      = os.getenv("FINRAG_FUSION", "rrf")
+FUSION_MODES     = ("rrf", "priority")
+RRF_K            = 60    # згладжування рангу: 1 / (RRF_K + rank)
+EXPANSION_WEIGHT = 0.5   # вага кожного підзапиту Query Expansion у RRF
+
+# Паралельне виконання шарів: розмір спільного пулу та таймаут шару
+RETRIEVAL_WORKERS = 8
+LAYER_TIMEOUT_S   = 5.0   # повільний шар відкидається, а не блокує запит
+
+# Кеш векторів запитів: LRU у пам'яті + sqlite на диску
+# (FINRAG_QUERY_CACHE_DB="" вимикає дисковий рівень)
+QUERY_CACHE_SIZE = 2048
+QUERY_CACHE_DB   = os.getenv(
+    "FINRAG_QUERY_CACHE_DB",
+    str(PROJECT_ROOT / "data" / "cache" / "query_embeddings.sqlite"),
+)
+
 log = logging.getLogger(__name__)
 
 
@@ -81,7 +127,7 @@ def _expand_query(query: str) -> list[str]:
         if exp.lower() not in seen:
             seen.add(exp.lower())
             result.append(exp)
-    return result[:5]
+    return result[:EXPANSION_LIMIT]
 
 
 # ─────────────────────────────────────────────────────────────────
@@ -89,14 +135,15 @@ def _expand_query(query: str) -> list[str]:
 # ─────────────────────────────────────────────────────────────────
 
 @lru_cache(maxsize=1)
+def _load_embeddings() -> tuple[HuggingFaceEmbeddings, str]:
+    """Завантажує embedding-модель один раз: (embeddings, backend)."""
+    log.info("Завантаження embedding-моделі: %s", EMBEDDING_MODEL)
+    return load_embeddings(EMBEDDING_MODEL)
+
+
 def _get_embeddings() -> HuggingFaceEmbeddings:
     """Повертає singleton-екземпляр embedding-моделі."""
-    log.info("Завантаження embedding-моделі: %s", EMBEDDING_MODEL)
-    return HuggingFaceEmbeddings(
-        model_name=EMBEDDING_MODEL,
-        model_kwargs={"device": "cpu"},
-        encode_kwargs={"normalize_embeddings": True},
-    )
+    return _load_embeddings()[0]
 
 
 @lru_cache(maxsize=1)
@@ -114,6 +161,133 @@ def _get_vector_store(db_dir: str = str(DEFAULT_DB_DIR)) -> Chroma:
     return store
 
 
+@lru_cache(maxsize=4)
+def _open_backend(db_dir: str, version: str, backend: str):
+    """Відкриває векторний backend для конкретної версії індексу."""
+    if backend == "numpy":
+        try:
+            return NumpyBackend(Path(db_dir) / NUMPY_SUBDIR, version)
+        except (OSError, ValueError) as e:
+            log.warning("NumPy-індекс недоступний (%s) — використовуємо ChromaDB", e)
+    return ChromaBackend(_get_vector_store(db_dir))
+
+
+def _get_backend(db_dir: str = str(DEFAULT_DB_DIR)):
+    """
+    Повертає векторний backend (FINRAG_VECTOR_BACKEND: chroma | numpy).
+    Після перебудови індексу (нова версія) numpy-знімок перечитується.
+    """
+    return _open_backend(db_dir, index_version(db_dir), VECTOR_BACKEND)
+
+
+@lru_cache(maxsize=1)
+def _get_query_cache() -> QueryEmbeddingCache:
+    """Повертає singleton-кеш векторів запитів для поточної моделі."""
+    return QueryEmbeddingCache(
+        cache_model_key(EMBEDDING_MODEL, _load_embeddings()[1]),
+        max_items=QUERY_CACHE_SIZE,
+        db_path=QUERY_CACHE_DB or None,
+    )
+
+
+def _embed_queries(queries: list[str]) -> list[list[float]]:
+    """
+    Повертає вектори запитів: з кешу, а відсутні — одним батчем через модель.
+    """
+    cache   = _get_query_cache()
+    vectors = cache.get_many(queries)
+
+    missing = [i for i, vec in enumerate(vectors) if vec is None]
+    if missing:
+        # embed_documents використовує ті ж encode_kwargs, що й embed_query
+        fresh = _get_embeddings().embed_documents([queries[i] for i in missing])
+        cache.put_many([queries[i] for i in missing], fresh)
+        for i, vec in zip(missing, fresh):
+            vectors[i] = vec
+    return vectors
+
+
+@lru_cache(maxsize=1)
+def _get_executor() -> ThreadPoolExecutor:
+    """Спільний обмежений пул потоків для шарів retrieval."""
+    return ThreadPoolExecutor(
+        max_workers=RETRIEVAL_WORKERS,
+        thread_name_prefix="finrag-retrieval",
+    )
+
+
+def _layer_result(
+    future,
+    layer:         str,
+    deadline:      float,
+    layer_timings: dict | None = None,
+    timings:       dict | None = None,
+):
+    """
+    Чекає результат шару до спільного дедлайну.
+    Якщо шар не встиг — відкидаємо його (None) замість блокування запиту.
+
+    layer_timings — власний dict шару (потік пулу пише лише в нього);
+    у timings запиту він зливається тільки якщо шар встиг, тож запізнілий
+    потік не змінює timings, які вже повернуто й агрегуються.
+    """
+    try:
+        result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeout:
+        future.cancel()
+        log.warning("Шар '%s' перевищив таймаут %.1fс — пропущено", layer, LAYER_TIMEOUT_S)
+        return None
+    if layer_timings is not None and timings is not None:
+        timings.update(layer_timings)
+    return result
+
+
+def index_version(db_dir: str = str(DEFAULT_DB_DIR)) -> str:
+    """
+    Повертає версію індексу з маркер-файлу, який пише src.ingest.
+    Кеші, прив'язані до вмісту бази, порівнюють її для інвалідації.
+    """
+    try:
+        return (Path(db_dir) / INDEX_VERSION_FILE).read_text(encoding="utf-8").strip()
+    except OSError:
+        return ""
+
+
+def embed_query(query: str) -> list[float]:
+    """Повертає вектор запиту (через кеш векторів запитів)."""
+    return _embed_queries([query])[0]
+
+
+def _timed(timings: dict, stage: str, fn, *args):
+    """Виконує fn(*args) і записує тривалість у timings[stage] (секунди)."""
+    t0 = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        timings[stage] = time.perf_counter() - t0
+
+
+def _semantic_search_batch(
+    backend,
+    queries: list[str],
+    ks:      list[int],
+    timings: dict | None = None,
+) -> list[list]:
+    """
+    Семантичний пошук для кількох запитів за один прохід:
+    одна батчева forward-pass embedding-моделі (лише для запитів, яких
+    немає в кеші) + один пакетний пошук у векторному backend-і
+    (ChromaDB — список query_embeddings, NumPy — один матричний добуток).
+
+    ks[i] — скільки кандидатів повернути для queries[i].
+    timings — сюди пишуться "embed_queries" та "semantic_search": основний
+    запит і підзапити йдуть одним батчем, тож час спільний для всіх.
+    """
+    timings = {} if timings is None else timings
+    vectors = _timed(timings, "embed_queries", _embed_queries, queries)
+    return _timed(timings, "semantic_search", backend.search, vectors, ks)
+
+
 def _deduplicate(docs: list, limit: int) -> list:
     """Видаляє дублікати за fingerprint (перші 200 символів)."""
     seen: set[str] = set()
@@ -129,86 +303,223 @@ def _deduplicate(docs: list, limit: int) -> list:
 
 
 # ─────────────────────────────────────────────────────────────────
-# Keyword Scan — гарантований пошук за точним підрядком
+# Keyword Scan — гарантований пошук за префіксом слова
 # ─────────────────────────────────────────────────────────────────
 
-def _keyword_scan(query: str, db_dir: str = str(DEFAULT_DB_DIR)) -> list:
+_kw_index_lock = Lock()
+_kw_indexes: dict[str, tuple[tuple, KeywordIndex]] = {}
+
+
+def _get_keyword_index(db_dir: str = str(DEFAULT_DB_DIR)) -> KeywordIndex:
+    """
+    Повертає інвертований індекс для колекції в db_dir.
+
+    Береться з файлу, збереженого src.ingest для поточної версії індексу;
+    інакше будується з текстів колекції. Перечитується лише якщо
+    змінилася версія індексу або кількість чанків (повторна інгестія).
     """
-    Сканує ВСІ 111 чанків у ChromaDB та повертає ті, що містять
-    ключові слова із запиту (точний пошук підрядка).
+    backend = _get_backend(db_dir)
+    version = index_version(db_dir)
+    stamp   = (version, backend.name, backend.count())
+
+    cached = _kw_indexes.get(db_dir)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+
+    with _kw_index_lock:
+        cached = _kw_indexes.get(db_dir)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+        index = KeywordIndex.load(Path(db_dir) / KEYWORD_INDEX_FILE, version)
+        if index is not None and len(index) == stamp[2]:
+            source = "завантажено"
+        else:
+            index  = KeywordIndex(*backend.all_texts())
+            source = "побудовано"
+        _kw_indexes[db_dir] = (stamp, index)
+        log.info(
+            "Keyword-індекс %s: %d чанків, %d токенів",
+            source, len(index), index.vocabulary_size,
+        )
+        return index
+
+
+def _extract_keywords(query: str) -> list[str]:
+    """Значущі слова запиту: 4+ кириличних літер, не стоп-слова, нижній регістр."""
+    words = re.findall(r"[а-яіїєґА-ЯІЇЄҐ]{4,}", query)
+    return [w.lower() for w in words if w.lower() not in _UA_STOP]
+
+
+def _keyword_scan(
+    query:  str,
+    db_dir: str = str(DEFAULT_DB_DIR),
+    limit:  int | None = None,
+) -> list:
+    """
+    Повертає чанки, що містять ключові слова із запиту
+    (пошук за префіксом слова через інвертований індекс).
+
+    limit — top-limit чанків за BM25 (від кращого); None — усі збіги
+    у порядку колекції (режим priority).
 
     Чому: embedding може не зв'язати "зняття готівки" → "Зняття власних
     коштів за карткою 0,9%" через різницю у формулюванні. Keyword scan
     знаходить це детерміністично без залежності від векторної схожості.
     """
-    store = _get_vector_store(db_dir)
-    all_data = store._collection.get(include=["documents", "metadatas"])
-
-    # Значущі слова із запиту (4+ літер, не стоп-слова)
-    words = re.findall(r"[а-яіїєґА-ЯІЇЄҐ]{4,}", query)
-    keywords = [w.lower() for w in words if w.lower() not in _UA_STOP]
-
+    keywords = _extract_keywords(query)
     if not keywords:
         return []
 
-    matched = []
-    for i, text in enumerate(all_data["documents"]):
-        t_lower = text.lower()
-        if any(kw in t_lower for kw in keywords):
-            matched.append(Document(
-                page_content=text,
-                metadata=all_data["metadatas"][i],
-            ))
-    return matched
+    index = _get_keyword_index(db_dir)
+    if limit is None:
+        ids = index.lookup(keywords)
+    else:
+        ids = [cid for cid, _ in index.search(keywords, limit)]
+    if not ids:
+        return []
+
+    # Текст і метадані дочитуємо тільки для знайдених чанків
+    return _get_backend(db_dir).get(ids)
+
+
+def _fuse_rrf(rankings: list[tuple[list, float]]) -> list:
+    """
+    Reciprocal-rank fusion: score(d) = Σ weight / (RRF_K + rank).
+    rankings — [(документи від кращого, вага шару)]; рівні score —
+    у порядку першої появи.
+    """
+    scores: dict[str, float] = {}
+    docs:   dict[str, object] = {}
+    for ranked, weight in rankings:
+        for rank, doc in enumerate(ranked, 1):
+            key = doc.id or doc.page_content[:200].strip()
+            docs.setdefault(key, doc)
+            scores[key] = scores.get(key, 0.0) + weight / (RRF_K + rank)
+    order = sorted(scores, key=lambda key: -scores[key])
+    return [docs[key] for key in order]
 
 
 # ─────────────────────────────────────────────────────────────────
 # Публічний API
 # ─────────────────────────────────────────────────────────────────
 
+def _select(
+    query:      str,
+    k:          int,
+    kw_docs:    list,
+    batch:      list[list],
+    fusion:     str,
+    use_rerank: bool,
+    timings:    dict,
+) -> list:
+    """
+    Об'єднує шари одного запиту (kw_docs — Keyword Scan, batch[0] —
+    semantic search, batch[1:] — підзапити Query Expansion), дедублікує
+    і повертає top-k (з rerank — спершу top-N кандидатів).
+    """
+    main_docs = batch[0]
+
+    t0 = time.perf_counter()
+    if fusion == "rrf":
+        # BM25 та семантичне ранжування рівноправні; чанк, що високо
+        # в обох, випереджає чанк, знайдений лише одним шаром
+        all_raw = _fuse_rrf([
+            (kw_docs, 1.0),
+            (main_docs, 1.0),
+            *((sub_docs, EXPANSION_WEIGHT) for sub_docs in batch[1:]),
+        ])
+    else:
+        # Мерж у фіксованому пріоритеті (незалежно від порядку завершення):
+        # 1. Keyword Scan ПЕРШИМ — детермінований точний пошук має пріоритет
+        #    (гарантує що "Зняття 0,9%" не витіснять нерелевантні semantic hits)
+        # 2. Semantic search за основним запитом (k*2 кандидатів)
+        # 3. Query Expansion — підзапити (по EXPANSION_K кандидатів)
+        all_raw = [*kw_docs, *main_docs]
+        for sub_docs in batch[1:]:
+            all_raw.extend(sub_docs)
+
+    timings["fusion"] = time.perf_counter() - t0
+
+    # Дедублікація + top-k (з rerank — спершу top-N кандидатів)
+    if use_rerank:
+        candidates = _timed(timings, "dedup", _deduplicate, all_raw, max(k, RERANK_CANDIDATES))
+        docs = _timed(timings, "rerank", rerank_docs, query, candidates, k)
+    else:
+        docs = _timed(timings, "dedup", _deduplicate, all_raw, k)
+    return docs
+
+
+@profiled
 def retrieve(
     query:   str,
     k:       int  = DEFAULT_K,
     db_dir:  str  = str(DEFAULT_DB_DIR),
     verbose: bool = False,
+    rerank:  bool | None = None,
+    timings: dict | None = None,
 ) -> list:
     """
     Знаходить top-k найрелевантніших унікальних чанків до запиту.
 
     Алгоритм (3 шари):
       1. Semantic search — за повним запитом (k*2 кандидатів).
-      2. Query Expansion — підзапити за словником фінансових термінів.
-      3. Keyword Scan — O(111) перебір за ключовими словами запиту.
-    Всі результати мержаться та дедублікуються → top-k унікальних.
+      2. Query Expansion — підзапити за словником фінансових термінів
+         (ембедяться та шукаються одним батчем разом з основним запитом).
+      3. Keyword Scan — BM25 за ключовими словами запиту (k*2 кандидатів).
+    Шари виконуються паралельно (з таймаутом на шар), ранжування
+    об'єднуються RRF (або у фіксованому пріоритеті, FINRAG_FUSION=priority)
+    та дедублікуються → top-k унікальних.
+
+    rerank (None → FINRAG_RERANK): дедублікований top-N кандидатів
+    (RERANK_CANDIDATES) переранжовує cross-encoder, лишаються найкращі k.
+
+    timings (dict) заповнюється тривалостями етапів у секундах:
+    keyword_scan, embed_queries, semantic_search, fusion, dedup,
+    rerank (якщо увімкнено), retrieve (разом); expansion_queries —
+    кількість підзапитів Query Expansion.
     """
-    store = _get_vector_store(db_dir)
-    all_raw: list = []
-
-    # 1. Keyword Scan ПЕРШИМ — детермінований точний пошук має пріоритет
-    #    (гарантує що "Зняття 0,9%" не витіснять нерелевантні semantic hits)
-    kw_docs = _keyword_scan(query, db_dir)
-    all_raw.extend(kw_docs)
-
-    # 2. Semantic search — додаємо до keyword результатів
-    main_docs = store.similarity_search(query, k=k * 2)
-    all_raw.extend(main_docs)
-
-    # 3. Query Expansion — підзапити за словником фінансових термінів
+    started = time.perf_counter()
+    timings = {} if timings is None else timings
+    backend = _get_backend(db_dir)
+    pool    = _get_executor()
+    fusion  = FUSION_MODE if FUSION_MODE in FUSION_MODES else "rrf"
+
+    # Шари незалежні → запускаємо паралельно у спільному пулі.
+    # Semantic search і Query Expansion — один батчевий шар (одна
+    # forward-pass моделі), тож паралельно йдуть keyword та vector шари.
     sub_queries = _expand_query(query)
-    for sub in sub_queries:
-        try:
-            sub_docs = store.similarity_search(sub, k=4)
-            all_raw.extend(sub_docs)
-        except Exception as e:
-            log.debug("Підзапит '%s' не вдався: %s", sub, e)
+    kw_timings: dict  = {}
+    vec_timings: dict = {}
+    kw_future  = (
+        pool.submit(
+            carry(_timed), kw_timings, "keyword_scan",
+            _keyword_scan, query, db_dir, k * 2 if fusion == "rrf" else None,
+        )
+        if KEYWORD_SCAN_ENABLED else None
+    )
+    vec_future = pool.submit(
+        carry(_semantic_search_batch),
+        backend,
+        [query, *sub_queries],
+        [k * 2] + [EXPANSION_K] * len(sub_queries),
+        vec_timings,
+    )
+    timings["expansion_queries"] = len(sub_queries)
+    deadline = time.monotonic() + LAYER_TIMEOUT_S
+
+    kw_docs = (_layer_result(kw_future, "keyword", deadline, kw_timings, timings) or []) if kw_future else []
+    batch   = _layer_result(vec_future, "semantic", deadline, vec_timings, timings) or [[]]
+    main_docs = batch[0]
 
-    # 4. Дедублікація + top-k (keyword hits першими → беруться в пріоритеті)
-    docs = _deduplicate(all_raw, limit=k)
+    use_rerank = RERANK_ENABLED if rerank is None else rerank
+    docs = _select(query, k, kw_docs, batch, fusion, use_rerank, timings)
+    timings["retrieve"] = time.perf_counter() - started
 
     # 5. Verbose debug
     if verbose:
         print(f"\n{'='*60}")
-        print(f"🔍 DEBUG | query: '{query[:50]}' | k={k}")
+        print(f"🔍 DEBUG | query: '{query[:50]}' | k={k} | fusion={fusion} | rerank={use_rerank}")
         print(f"   semantic={len(main_docs)}, kw_scan={len(kw_docs)}, final={len(docs)}")
         pages = sorted(set(d.metadata.get('page') for d in docs))
         print(f"   сторінки: {pages}")
@@ -225,6 +536,68 @@ def retrieve(
     return docs
 
 
+def retrieve_batch(
+    queries: list[str],
+    k:       int  = DEFAULT_K,
+    db_dir:  str  = str(DEFAULT_DB_DIR),
+    rerank:  bool | None = None,
+) -> list[list]:
+    """
+    retrieve() для багатьох запитів одразу (той самий порядок результатів).
+
+    Усі запити разом з їхніми підзапитами Query Expansion ембедяться
+    однією батчевою forward-pass і шукаються одним викликом бекенду;
+    Keyword Scan запитів паралельно йде у спільному пулі.
+    """
+    if not queries:
+        return []
+
+    backend = _get_backend(db_dir)
+    pool    = _get_executor()
+    fusion  = FUSION_MODE if FUSION_MODE in FUSION_MODES else "rrf"
+
+    expanded = [[query, *_expand_query(query)] for query in queries]
+    flat     = [q for group in expanded for q in group]
+    ks       = [k * 2 if i == 0 else EXPANSION_K for group in expanded for i in range(len(group))]
+
+    kw_futures = [
+        pool.submit(_keyword_scan, query, db_dir, k * 2 if fusion == "rrf" else None)
+        if KEYWORD_SCAN_ENABLED else None
+        for query in queries
+    ]
+    deadline = time.monotonic() + LAYER_TIMEOUT_S      # спільний для всіх keyword-шарів батчу
+    results  = _semantic_search_batch(backend, flat, ks)
+
+    use_rerank = RERANK_ENABLED if rerank is None else rerank
+    out, start = [], 0
+    for query, group, kw_future in zip(queries, expanded, kw_futures):
+        batch  = results[start:start + len(group)]
+        start += len(group)
+        kw_docs = (_layer_result(kw_future, "keyword", deadline) or []) if kw_future else []
+        out.append(_select(query, k, kw_docs, batch, fusion, use_rerank, {}))
+
+    log.info("Batch retrieval: %d запитів, %d векторних пошуків", len(queries), len(flat))
+    return out
+
+
+async def aretrieve(
+    query:  str,
+    k:      int = DEFAULT_K,
+    db_dir: str = str(DEFAULT_DB_DIR),
+    timings: dict | None = None,
+) -> list:
+    """
+    Асинхронна версія retrieve(): embedding та запити до ChromaDB
+    виконуються в executor, не блокуючи event loop.
+    """
+    return await asyncio.to_thread(retrieve, query, k, db_dir, timings=timings)
+
+
+async def aembed_query(query: str) -> list[float]:
+    """Асинхронна версія embed_query() (forward-pass моделі в executor)."""
+    return await asyncio.to_thread(embed_query, query)
+
+
 def extract_sources(docs: list) -> list[dict]:
     """
     Витягує унікальні джерела з метаданих знайдених чанків.
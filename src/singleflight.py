@@ -0,0 +1,76 @@
+"""
+src/singleflight.py
+─────────────────────────────────────────────────────────────────
+Single-flight: однакові питання, що виконуються одночасно, рахуються
+один раз.
+
+Коли популярну кнопку-підказку натискають у багатьох сесіях Streamlit
+одночасно, перший запит (leader) виконує retrieval і виклик Groq, а
+решта з тим самим ключем (followers) чекають на його результат замість
+власного повного проходу. Помилку leader-а отримують усі, хто чекав.
+Результат не зберігається: щойно leader завершився, ключ звільнено
+(повторні питання обслуговують кеші, а не цей модуль).
+─────────────────────────────────────────────────────────────────
+"""
+
+import threading
+
+
+class Call:
+    """Одне обчислення в польоті: результат або помилка для всіх, хто чекає."""
+
+    def __init__(self):
+        self.done   = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+        self.waiters = 0
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Чекає завершення leader-а; False — не дочекався за timeout."""
+        return self.done.wait(timeout)
+
+    def get(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """
+    Реєстр обчислень у польоті за ключем (потокобезпечний).
+
+    begin(key) робить першого виклику leader-ом; leader публікує
+    результат через finish (стрімінг — щойно він готовий, ще до
+    віддачі підсумкової події), followers чекають на call.wait().
+    """
+
+    def __init__(self):
+        self._calls: dict = {}
+        self._lock  = threading.Lock()
+        self.leaders = 0
+
+    def begin(self, key) -> tuple[Call, bool]:
+        """(call, is_leader): leader мусить викликати finish(key, call, ...)."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                return call, False
+            call = self._calls[key] = Call()
+            self.leaders += 1
+            return call, True
+
+    def finish(self, key, call: Call, result=None, error: BaseException | None = None) -> None:
+        """
+        Публікує результат (або помилку) і звільняє ключ.
+        result=None без помилки — leader не завершив, followers рахують самі.
+        """
+        call.result, call.error = result, error
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"leaders": self.leaders, "in_flight": len(self._calls)}
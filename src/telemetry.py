@@ -0,0 +1,200 @@
+"""
+src/telemetry.py
+─────────────────────────────────────────────────────────────────
+Телеметрія запитів: гістограми латентності етапів та лічильники
+токенів на рівні процесу.
+
+ask_bot повертає розбивку часу по етапах ("timings") та токени Groq
+("tokens"); ті самі числа агрегуються тут і віддаються у текстовому
+форматі Prometheus (для алертів на p95 — histogram_quantile):
+
+  • FINRAG_METRICS_PORT=9464 — HTTP-ендпоінт http://127.0.0.1:9464/metrics;
+  • FINRAG_METRICS_FILE=...  — дамп у файл після кожного запиту
+                               (textfile collector node_exporter).
+─────────────────────────────────────────────────────────────────
+"""
+
+import bisect
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+METRICS_PORT = int(os.getenv("FINRAG_METRICS_PORT", "0"))    # 0 — ендпоінт вимкнено
+METRICS_FILE = os.getenv("FINRAG_METRICS_FILE", "")           # "" — дамп вимкнено
+METRICS_HOST = "127.0.0.1"
+
+# Ключі timings, що є лічильниками, а не секундами (у гістограми не йдуть)
+COUNT_KEYS = frozenset({"expansion_queries"})
+
+# Межі бакетів латентності, секунди (від кеш-хітів до повільних відповідей LLM)
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+log = logging.getLogger(__name__)
+
+
+class Histogram:
+    """Кумулятивна гістограма з фіксованими бакетами (як у Prometheus)."""
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts  = [0] * (len(buckets) + 1)     # останній — +Inf
+        self.sum     = 0.0
+        self.count   = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum   += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Оцінка квантиля за верхньою межею бакета (None — немає даних)."""
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+class Metrics:
+    """Реєстр метрик процесу (потокобезпечний)."""
+
+    def __init__(self):
+        self._stages:   dict[str, Histogram] = {}
+        self._tokens:   dict[str, int] = {"prompt": 0, "completion": 0}
+        self._requests: dict[str, int] = {}
+        self._coalesced = 0
+        self._lock = threading.Lock()
+
+    def record_request(self, timings: dict, tokens: dict | None, outcome: str) -> None:
+        """
+        Агрегує один запит: timings — {етап: секунди}, tokens —
+        {"prompt", "completion"}, outcome — answered | cached | error | not_found.
+        """
+        with self._lock:
+            for stage, seconds in timings.items():
+                if stage not in COUNT_KEYS and isinstance(seconds, (int, float)):
+                    self._stages.setdefault(stage, Histogram()).observe(seconds)
+            for kind, n in (tokens or {}).items():
+                if n:
+                    self._tokens[kind] = self._tokens.get(kind, 0) + n
+            self._requests[outcome] = self._requests.get(outcome, 0) + 1
+
+    def record_singleflight(self) -> None:
+        """Запит дочекався однакового запиту в польоті замість власного проходу."""
+        with self._lock:
+            self._coalesced += 1
+
+    def quantile(self, stage: str, q: float) -> float | None:
+        with self._lock:
+            hist = self._stages.get(stage)
+            return hist.quantile(q) if hist else None
+
+    def render_prometheus(self) -> str:
+        """Текстовий формат експозиції Prometheus."""
+        lines = [
+            "# HELP finrag_stage_seconds Latency of ask_bot pipeline stages.",
+            "# TYPE finrag_stage_seconds histogram",
+        ]
+        with self._lock:
+            for stage, hist in sorted(self._stages.items()):
+                cumulative = 0
+                for bound, n in zip(hist.buckets, hist.counts):
+                    cumulative += n
+                    lines.append(f'finrag_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'finrag_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+                lines.append(f'finrag_stage_seconds_sum{{stage="{stage}"}} {hist.sum:.6f}')
+                lines.append(f'finrag_stage_seconds_count{{stage="{stage}"}} {hist.count}')
+
+            lines += [
+                "# HELP finrag_llm_tokens_total Groq tokens consumed.",
+                "# TYPE finrag_llm_tokens_total counter",
+            ]
+            lines += [f'finrag_llm_tokens_total{{kind="{kind}"}} {n}' for kind, n in sorted(self._tokens.items())]
+
+            lines += [
+                "# HELP finrag_requests_total ask_bot requests by outcome.",
+                "# TYPE finrag_requests_total counter",
+            ]
+            lines += [f'finrag_requests_total{{outcome="{o}"}} {n}' for o, n in sorted(self._requests.items())]
+
+            lines += [
+                "# HELP finrag_singleflight_coalesced_total Requests served by an identical in-flight request.",
+                "# TYPE finrag_singleflight_coalesced_total counter",
+                f"finrag_singleflight_coalesced_total {self._coalesced}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str | Path) -> None:
+        """Атомарно записує метрики у файл."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(self.render_prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+
+
+METRICS = Metrics()
+
+
+# ─────────────────────────────────────────────────────────────────
+# Експорт
+# ─────────────────────────────────────────────────────────────────
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server_lock = threading.Lock()
+_server: ThreadingHTTPServer | None = None
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST) -> ThreadingHTTPServer | None:
+    """Запускає /metrics у фоновому потоці (один раз на процес)."""
+    global _server
+    with _server_lock:
+        if _server is None and port:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError as e:
+                log.warning("Metrics-ендпоінт не запущено (%s:%d): %s", host, port, e)
+                return None
+            threading.Thread(target=_server.serve_forever, name="finrag-metrics", daemon=True).start()
+            log.info("Metrics: http://%s:%d/metrics", host, port)
+        return _server
+
+
+def record_request(timings: dict, tokens: dict | None, outcome: str) -> None:
+    """Агрегує запит у METRICS і (якщо налаштовано) оновлює експорт."""
+    METRICS.record_request(timings, tokens, outcome)
+    if METRICS_PORT:
+        start_metrics_server()
+    if METRICS_FILE:
+        try:
+            METRICS.dump(METRICS_FILE)
+        except OSError as e:
+            log.warning("Не вдалося записати метрики у %s: %s", METRICS_FILE, e)
+
+
+def record_singleflight() -> None:
+    """Рахує запит, об'єднаний з однаковим запитом у польоті (single-flight)."""
+    METRICS.record_singleflight()
@@ -0,0 +1,260 @@
+"""
+src/vector_backend.py
+─────────────────────────────────────────────────────────────────
+Векторні backend-и для retrieval (FINRAG_VECTOR_BACKEND):
+
+  • chroma — ChromaDB (HNSW), за замовчуванням;
+  • numpy  — точний brute-force пошук: нормалізована матриця
+             embeddings у memory-mapped .npy (float32/float16) +
+             таблиця чанків. Top-k для пакета запитів — один
+             матричний добуток + argpartition. Детермінований і
+             швидший за клієнт Chroma на сотнях–десятках тисяч чанків.
+
+ChromaDB лишається джерелом правди для інгестії: src.ingest після
+кожного оновлення експортує знімок колекції у <db_dir>/numpy разом
+з версією індексу; знімок іншої версії не відкривається.
+
+Перевірка паритету top-k між backend-ами:
+    python -m src.vector_backend --compare
+─────────────────────────────────────────────────────────────────
+"""
+
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+from langchain_core.documents import Document
+
+PROJECT_ROOT      = Path(__file__).resolve().parent.parent
+DEFAULT_DB_DIR    = Path(os.getenv("FINRAG_DB_DIR", PROJECT_ROOT / "data" / "chromadb"))
+CHROMA_COLLECTION = "finrag_tariffs"
+
+VECTOR_BACKEND = os.getenv("FINRAG_VECTOR_BACKEND", "chroma")
+BACKENDS       = ("chroma", "numpy")
+
+# Знімок для numpy-backend-у (всередині теки ChromaDB)
+NUMPY_SUBDIR     = "numpy"
+NUMPY_MATRIX     = "embeddings.npy"
+NUMPY_CHUNKS     = "chunks.jsonl"
+NUMPY_VERSION    = "index_version"      # версія індексу, з якої зроблено знімок
+NUMPY_DTYPE      = os.getenv("FINRAG_NUMPY_DTYPE", "float32")   # float32 | float16
+
+log = logging.getLogger(__name__)
+
+
+# ─────────────────────────────────────────────────────────────────
+# ChromaDB
+# ─────────────────────────────────────────────────────────────────
+
+class ChromaBackend:
+    """Адаптер над колекцією ChromaDB (langchain Chroma)."""
+
+    name = "chroma"
+
+    def __init__(self, store):
+        self._collection = store._collection
+
+    def count(self) -> int:
+        return self._collection.count()
+
+    def all_texts(self) -> tuple[list[str], list[str]]:
+        """(ids, тексти) усіх чанків у порядку колекції."""
+        data = self._collection.get(include=["documents"])
+        return data["ids"], data["documents"]
+
+    def get(self, ids: list[str]) -> list[Document]:
+        """Документи за id у порядку ids (відсутні пропускаються)."""
+        data  = self._collection.get(ids=ids, include=["documents", "metadatas"])
+        by_id = {
+            cid: (text, meta)
+            for cid, text, meta in zip(data["ids"], data["documents"], data["metadatas"])
+        }
+        return [
+            Document(id=cid, page_content=by_id[cid][0], metadata=by_id[cid][1] or {})
+            for cid in ids if cid in by_id
+        ]
+
+    def search(self, vectors: list[list[float]], ks: list[int]) -> list[list[Document]]:
+        """Top-ks[i] для кожного вектора — один запит до ChromaDB."""
+        res = self._collection.query(
+            query_embeddings=vectors,
+            n_results=max(ks),
+            include=["documents", "metadatas"],
+        )
+        return [
+            [
+                Document(id=cid, page_content=text, metadata=meta or {})
+                for cid, text, meta in zip(
+                    res["ids"][i][:k_i], res["documents"][i][:k_i], res["metadatas"][i][:k_i],
+                )
+            ]
+            for i, k_i in enumerate(ks)
+        ]
+
+
+# ─────────────────────────────────────────────────────────────────
+# NumPy (точний пошук)
+# ─────────────────────────────────────────────────────────────────
+
+class NumpyBackend:
+    """
+    Точний пошук по memory-mapped матриці нормалізованих embeddings.
+    Косинус = скалярний добуток, тож порядок збігається з L2 у Chroma.
+    """
+
+    name = "numpy"
+
+    def __init__(self, directory: str | Path, version: str | None = None):
+        """version — очікувана версія індексу (None — не перевіряти)."""
+        directory = Path(directory)
+        if version is not None and (not version or numpy_index_version(directory) != version):
+            raise ValueError(f"numpy-знімок у {directory} не для версії індексу '{version}'")
+        self._matrix = np.load(directory / NUMPY_MATRIX, mmap_mode="r")
+
+        self._ids:   list[str]  = []
+        self._texts: list[str]  = []
+        self._metas: list[dict] = []
+        with open(directory / NUMPY_CHUNKS, encoding="utf-8") as f:
+            for line in f:
+                row = json.loads(line)
+                self._ids.append(row["id"])
+                self._texts.append(row["text"])
+                self._metas.append(row["metadata"])
+        self._rows = {cid: i for i, cid in enumerate(self._ids)}
+
+        if len(self._ids) != len(self._matrix):
+            raise ValueError(f"Пошкоджений numpy-індекс у {directory}: рядків матриці ≠ чанків")
+        log.info("NumPy-індекс: %d векторів (%s), %s", len(self._ids), self._matrix.dtype, directory)
+
+        # float16 на диску вдвічі менший, але матмул у float16 numpy робить
+        # без BLAS — переводимо у float32 один раз тут, а не на кожен запит
+        # (float32-матриця лишається memory-mapped без копії)
+        self._scoring = np.asarray(self._matrix, dtype=np.float32)
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def all_texts(self) -> tuple[list[str], list[str]]:
+        return list(self._ids), list(self._texts)
+
+    def _doc(self, row: int) -> Document:
+        return Document(id=self._ids[row], page_content=self._texts[row], metadata=dict(self._metas[row]))
+
+    def get(self, ids: list[str]) -> list[Document]:
+        return [self._doc(self._rows[cid]) for cid in ids if cid in self._rows]
+
+    def top_k(self, vectors, n: int) -> np.ndarray:
+        """
+        Індекси рядків top-n для кожного запиту (матриця запитів × n),
+        відсортовані за спаданням схожості; рівні — за номером рядка.
+        """
+        queries = np.asarray(vectors, dtype=np.float32)
+        norms   = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1.0)
+        scores  = queries @ self._scoring.T
+        n = min(n, scores.shape[1])
+        if n == 0:
+            return np.empty((len(queries), 0), dtype=np.int64)
+
+        part = np.argpartition(-scores, n - 1, axis=1)[:, :n]
+        top  = np.take_along_axis(scores, part, axis=1)
+        # Детермінований порядок: спершу схожість, потім номер рядка
+        order = np.lexsort((part, -top), axis=1)
+        return np.take_along_axis(part, order, axis=1)
+
+    def search(self, vectors: list[list[float]], ks: list[int]) -> list[list[Document]]:
+        rows = self.top_k(vectors, max(ks))
+        return [[self._doc(int(r)) for r in rows[i][:k_i]] for i, k_i in enumerate(ks)]
+
+
+def numpy_index_version(directory: str | Path) -> str:
+    """Версія індексу numpy-знімка ("" — немає або знімок неповний)."""
+    try:
+        return (Path(directory) / NUMPY_VERSION).read_text(encoding="utf-8").strip()
+    except OSError:
+        return ""
+
+
+def export_numpy_index(collection, db_dir: Path, version: str, dtype: str = NUMPY_DTYPE) -> Path:
+    """
+    Експортує знімок колекції ChromaDB у <db_dir>/numpy:
+    матриця embeddings (.npy) + таблиця чанків (.jsonl). Рядки — у порядку
+    колекції, тож keyword-збіги йдуть у тому ж порядку, що й з ChromaDB.
+    Версія індексу пишеться останньою: недописаний знімок її не має.
+    """
+    directory = Path(db_dir) / NUMPY_SUBDIR
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / NUMPY_VERSION).unlink(missing_ok=True)
+
+    data  = collection.get(include=["embeddings", "documents", "metadatas"])
+    total = len(data["ids"])
+    dim   = len(data["embeddings"][0]) if total else 0
+    matrix = np.asarray(data["embeddings"], dtype=np.float32).reshape(total, dim)
+    # Одиничні рядки: скалярний добуток = косинус (моделі без normalize теж)
+    norms  = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = (matrix / np.where(norms > 0, norms, 1.0)).astype(dtype)
+
+    tmp_matrix = directory / f"{NUMPY_MATRIX}.tmp.npy"
+    tmp_chunks = directory / f"{NUMPY_CHUNKS}.tmp"
+    np.save(tmp_matrix, matrix)
+    with open(tmp_chunks, "w", encoding="utf-8") as f:
+        for i in range(total):
+            f.write(json.dumps({
+                "id":       data["ids"][i],
+                "text":     data["documents"][i],
+                "metadata": data["metadatas"][i] or {},
+            }, ensure_ascii=False) + "\n")
+    os.replace(tmp_matrix, directory / NUMPY_MATRIX)
+    os.replace(tmp_chunks, directory / NUMPY_CHUNKS)
+    (directory / NUMPY_VERSION).write_text(version, encoding="utf-8")
+
+    log.info("NumPy-індекс експортовано: %d векторів (%s) → %s", total, dtype, directory)
+    return directory
+
+
+# ─────────────────────────────────────────────────────────────────
+# Паритет top-k між backend-ами
+# ─────────────────────────────────────────────────────────────────
+
+def compare_backends(db_dir: Path, queries: list[str], k: int = 10) -> list[dict]:
+    """Для кожного запиту порівнює top-k id у chroma та numpy backend-ах."""
+    from src.retrieval import _embed_queries, _get_vector_store
+
+    vectors = _embed_queries(queries)
+    chroma  = ChromaBackend(_get_vector_store(str(db_dir)))
+    exact   = NumpyBackend(Path(db_dir) / NUMPY_SUBDIR)
+
+    a = chroma.search(vectors, [k] * len(queries))
+    b = exact.search(vectors, [k] * len(queries))
+    return [
+        {
+            "query":     q,
+            "identical": [d.id for d in da] == [d.id for d in db],
+            "overlap":   len({d.id for d in da} & {d.id for d in db}) / max(len(da), 1),
+        }
+        for q, da, db in zip(queries, a, b)
+    ]
+
+
+if __name__ == "__main__":
+    from src.embeddings import COMPARE_QUERIES
+
+    logging.basicConfig(level=logging.WARNING)
+    parser = argparse.ArgumentParser(description="FinRAG — паритет chroma vs numpy backend")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--db_dir", type=Path, default=DEFAULT_DB_DIR)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    if not args.compare:
+        parser.print_help()
+    else:
+        rows = compare_backends(args.db_dir, COMPARE_QUERIES, k=args.k)
+        for r in rows:
+            mark = "==" if r["identical"] else "!="
+            print(f"  {mark}  overlap={r['overlap']:.2f}  {r['query']}")
+        same = sum(r["identical"] for r in rows)
+        print(f"\nІдентичний top-{args.k}: {same}/{len(rows)}")
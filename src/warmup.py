@@ -0,0 +1,161 @@
+"""
+src/warmup.py
+─────────────────────────────────────────────────────────────────
+Фоновий прогрів FinRAG для холодного старту Streamlit.
+
+Модуль легкий (лише stdlib): app.py імпортує його одразу, а важкі
+залежності (langchain, chromadb, torch, sentence-transformers)
+підтягуються у фоновому потоці разом із завантаженням embedding-моделі,
+відкриттям індексу та пробним запитом. Поки користувач читає
+welcome-екран, перший запит перестає платити за все це.
+
+Звіт про час старту (імпорти / модель / індекс / пробний запит):
+    python -m src.warmup
+─────────────────────────────────────────────────────────────────
+"""
+
+import importlib
+import logging
+import threading
+import time
+
+# Важкі імпорти — по одному, щоб звіт показував, хто скільки коштує
+HEAVY_IMPORTS = (
+    "langchain_core",
+    "chromadb",
+    "torch",
+    "sentence_transformers",
+    "src.generator",
+)
+
+# Пробний запит: прогріває кеш-шляхи retrieval, keyword-індекс і rerank
+WARMUP_QUERY = "Яка комісія за зняття готівки?"
+
+log = logging.getLogger(__name__)
+
+
+class Warmup:
+    """
+    Стан прогріву: етапи з часом виконання та готовність компонентів
+    ("llm", "embeddings", "index") для статус-блоку в сайдбарі.
+    """
+
+    def __init__(self):
+        self.stages: list[tuple[str, float]] = []          # (етап, секунди)
+        self.ready:  dict[str, bool] = {"llm": False, "embeddings": False, "index": False}
+        self.errors: dict[str, str]  = {}
+        self.info:   dict[str, str]  = {}
+        self.done    = threading.Event()
+        self.started = time.perf_counter()
+        self.total_s: float | None = None
+        self._lock   = threading.Lock()
+
+    def _stage(self, name: str, fn):
+        t0 = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self.stages.append((name, time.perf_counter() - t0))
+
+    def _fail(self, component: str, exc: Exception) -> None:
+        log.warning("Прогрів '%s' не вдався: %s", component, exc)
+        with self._lock:
+            self.errors[component] = str(exc).splitlines()[0] if str(exc) else type(exc).__name__
+
+    def run(self, db_dir: str | None = None) -> None:
+        """Виконує прогрів (блокуюче); помилки фіксуються, а не пробрасуються."""
+        try:
+            for module in HEAVY_IMPORTS:
+                try:
+                    self._stage(f"import {module}", lambda m=module: importlib.import_module(m))
+                except ImportError as e:
+                    self._fail("imports", e)
+
+            try:
+                from src import generator, retrieval
+            except Exception as e:
+                for component in self.ready:
+                    self._fail(component, e)
+                return
+
+            db_dir = db_dir or str(retrieval.DEFAULT_DB_DIR)
+            self.info["llm"] = generator.GROQ_MODEL
+
+            try:
+                self._stage("llm client", generator._get_llm)
+                self.ready["llm"] = True
+            except Exception as e:
+                self._fail("llm", e)
+
+            try:
+                _, backend = self._stage("embedding model", retrieval._load_embeddings)
+                self.info["embeddings"] = f"{retrieval.EMBEDDING_MODEL.split('/')[-1]} · {backend}"
+                self.ready["embeddings"] = True
+            except Exception as e:
+                self._fail("embeddings", e)
+                return
+
+            try:
+                store = self._stage("index open", lambda: retrieval._get_backend(db_dir))
+                self._stage("keyword index", lambda: retrieval._get_keyword_index(db_dir))
+                self.info["index"] = f"{store.name} · {store.count()} чанків"
+                self.ready["index"] = True
+            except Exception as e:
+                self._fail("index", e)
+                return
+
+            try:
+                self._stage("dummy query", lambda: retrieval.retrieve(WARMUP_QUERY, db_dir=db_dir))
+            except Exception as e:
+                self._fail("query", e)
+        finally:
+            self.total_s = time.perf_counter() - self.started
+            self.done.set()
+            log.info("Прогрів завершено за %.2fс", self.total_s)
+
+    def status(self, component: str) -> str:
+        """ready | loading | error — для індикатора в сайдбарі."""
+        if component in self.errors:
+            return "error"
+        if self.ready.get(component):
+            return "ready"
+        return "error" if self.done.is_set() else "loading"
+
+    def report(self) -> str:
+        """Текстовий звіт про час старту по етапах."""
+        with self._lock:
+            stages = list(self.stages)
+        width = max((len(name) for name, _ in stages), default=10)
+        lines = [f"{name:<{width}}  {seconds:>7.2f} с" for name, seconds in stages]
+        if self.total_s is not None:
+            lines.append(f"{'РАЗОМ':<{width}}  {self.total_s:>7.2f} с")
+        for component, error in self.errors.items():
+            lines.append(f"⚠ {component}: {error}")
+        return "\n".join(lines)
+
+
+_lock = threading.Lock()
+_warmup: Warmup | None = None
+
+
+def start_warmup(db_dir: str | None = None) -> Warmup:
+    """
+    Запускає прогрів у фоновому daemon-потоці (один раз на процес —
+    повторні виклики при rerun-ах Streamlit повертають той самий стан).
+    """
+    global _warmup
+    with _lock:
+        if _warmup is None:
+            _warmup = Warmup()
+            threading.Thread(
+                target=_warmup.run, args=(db_dir,), name="finrag-warmup", daemon=True,
+            ).start()
+        return _warmup
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    warmup = Warmup()
+    warmup.run()
+    print(warmup.report())